@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+Minimal runner for the asv style benchmarks, for use where asv is
+not installed.
+
+    python -m benchmarks [PATTERN...] [--max-params N] [--json FILE]
+
+time_* methods are timed with timeit, peakmem_* methods report the
+peak of the Python allocations traced by tracemalloc during the call
+(asv reports peak RSS of the process instead, so the numbers are not
+comparable with asv results). Code returned by timeraw_* methods is
+timed in a fresh interpreter, best of TIMERAW_REPEAT runs.
+"""
+import argparse
+import importlib
+import inspect
+import itertools
+import json
+import os
+import pkgutil
+import subprocess
+import sys
+import timeit
+import tracemalloc
+
+import benchmarks
+
+BENCHMARK_PREFIXES = ("time_", "peakmem_", "timeraw_")
+TIMERAW_REPEAT = 5
+TIMERAW_TEMPLATE = """
+import time
+_start = time.perf_counter()
+exec({0!r})
+print(time.perf_counter() - _start)
+"""
+
+
+def discover(patterns):
+    for modinfo in sorted(pkgutil.iter_modules(benchmarks.__path__),
+                          key=lambda mod: mod.name):
+        if not modinfo.name.startswith("bench_"):
+            continue
+
+        module = importlib.import_module("benchmarks." + modinfo.name)
+        for clsname, cls in sorted(inspect.getmembers(module,
+                                                      inspect.isclass)):
+            if cls.__module__ != module.__name__:
+                continue
+
+            for name in sorted(dir(cls)):
+                if not name.startswith(BENCHMARK_PREFIXES):
+                    continue
+
+                full_name = "{0}.{1}.{2}".format(modinfo.name[6:],
+                                                 clsname, name)
+                if patterns and not any(pat in full_name
+                                        for pat in patterns):
+                    continue
+
+                yield full_name, cls, name
+
+
+def param_combinations(cls, max_params=None):
+    params = getattr(cls, "params", None)
+    if params is None:
+        return [()]
+
+    if not params or not isinstance(params[0], (list, tuple)):
+        params = [params]
+
+    if max_params is not None:
+        params = [values[:max_params] for values in params]
+
+    return list(itertools.product(*params))
+
+
+def measure_time(func):
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    runs = timer.repeat(repeat=3, number=number)
+    return min(runs) / number
+
+
+def measure_timeraw(code):
+    runs = []
+    for _ in range(TIMERAW_REPEAT):
+        out = subprocess.check_output(
+            [sys.executable, "-c", TIMERAW_TEMPLATE.format(code)],
+            universal_newlines=True)
+        runs.append(float(out.strip().split("\n")[-1]))
+
+    return min(runs)
+
+
+def measure_peakmem(func):
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def format_value(kind, value):
+    if kind in ("time_", "timeraw_"):
+        if value < 1e-3:
+            return "{0:10.2f} us".format(value * 1e6)
+        if value < 1:
+            return "{0:10.2f} ms".format(value * 1e3)
+        return "{0:10.2f} s ".format(value)
+
+    return "{0:10.2f} MB".format(value / 1048576.0)
+
+
+def run(full_name, cls, name, max_params=None):
+    results = []
+    for params in param_combinations(cls, max_params):
+        bench = cls()
+        if hasattr(bench, "setup"):
+            bench.setup(*params)
+
+        method = getattr(bench, name)
+        try:
+            if name.startswith("time_"):
+                kind, value = "time_", measure_time(lambda: method(*params))
+            elif name.startswith("timeraw_"):
+                kind, value = "timeraw_", measure_timeraw(method(*params))
+            else:
+                kind, value = "peakmem_", measure_peakmem(
+                    lambda: method(*params))
+        finally:
+            if hasattr(bench, "teardown"):
+                bench.teardown(*params)
+
+        label = "{0}({1})".format(full_name,
+                                  ", ".join(str(par) for par in params))
+        print("{0:<72} {1}".format(label, format_value(kind, value)))
+        sys.stdout.flush()
+        results.append({"name": full_name, "params": list(params),
+                        "kind": kind.rstrip("_"), "value": value})
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("patterns", nargs="*",
+                        help="Run benchmarks with names containing any "
+                        "of the patterns")
+    parser.add_argument("--max-params", type=int,
+                        help="Only run the first N values of each "
+                        "parameter")
+    parser.add_argument("--json", help="Write the results to a file")
+    args = parser.parse_args()
+
+    results = []
+    for full_name, cls, name in discover(args.patterns):
+        results += run(full_name, cls, name, args.max_params)
+
+    if args.json:
+        with open(args.json, "w") as out_file:
+            json.dump({"python": sys.version.split()[0],
+                       "cwd": os.getcwd(),
+                       "results": results}, out_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
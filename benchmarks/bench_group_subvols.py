@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+Grouping of bricks into subvols, compared with the previous
+deepcopy based implementation.
+
+Run with asv or directly: python -m benchmarks.bench_group_subvols
+"""
+import copy
+import timeit
+
+from glustercli.cli.parsers import _get_subvol_bricks_count, _group_subvols
+
+
+def synthetic_volumes(num_bricks, bricks_per_volume=100, replica=2):
+    volumes = []
+    for vidx in range(num_bricks // bricks_per_volume):
+        volumes.append({
+            "name": "vol%d" % vidx,
+            "uuid": "00000000-0000-0000-0000-%012d" % vidx,
+            "type": "DISTRIBUTED_REPLICATE",
+            "status": "Started",
+            "num_bricks": bricks_per_volume,
+            "distribute": bricks_per_volume // replica,
+            "replica": replica,
+            "disperse": 0,
+            "disperse_redundancy": 0,
+            "transport": "TCP",
+            "snapshot_count": 0,
+            "bricks": [
+                {
+                    "name": "server%d:/bricks/vol%d/b%d" % (
+                        bidx % 16, vidx, bidx),
+                    "uuid": "node-%d" % (bidx % 16),
+                    "type": "Brick"
+                }
+                for bidx in range(bricks_per_volume)
+            ],
+            "options": [{"name": "performance.readdir-ahead",
+                         "value": "on"}]
+        })
+
+    return volumes
+
+
+def group_subvols_deepcopy(volumes):
+    # Implementation before the zero copy grouping, kept for comparison
+    out_volumes = copy.deepcopy(volumes)
+    for idx, vol in enumerate(volumes):
+        del out_volumes[idx]["bricks"]
+        out_volumes[idx]["subvols"] = []
+        subvol_type = vol["type"].split("_")[-1]
+        subvol_bricks_count = _get_subvol_bricks_count(vol["replica"],
+                                                       vol["disperse"])
+        number_of_subvols = int(len(vol["bricks"]) / subvol_bricks_count)
+        for sidx in range(number_of_subvols):
+            subvol = {
+                "name": "%s-%s-%s" % (vol["name"], subvol_type.lower(), sidx),
+                "replica": vol["replica"],
+                "disperse": vol["disperse"],
+                "disperse_redundancy": vol["disperse_redundancy"],
+                "type": subvol_type,
+                "bricks": []
+            }
+            for bidx in range(subvol_bricks_count):
+                subvol["bricks"].append(
+                    vol["bricks"][sidx * subvol_bricks_count + bidx]
+                )
+            out_volumes[idx]["subvols"].append(subvol)
+
+    return out_volumes
+
+
+class GroupSubvols(object):
+    params = [100, 1000, 10000]
+    param_names = ["bricks"]
+
+    def setup(self, bricks):
+        self.volumes = synthetic_volumes(bricks)
+
+    def time_group_subvols(self, bricks):
+        _group_subvols(self.volumes)
+
+    def time_group_subvols_deepcopy(self, bricks):
+        group_subvols_deepcopy(self.volumes)
+
+
+def main():
+    volumes = synthetic_volumes(10000)
+    assert _group_subvols(volumes) == group_subvols_deepcopy(volumes)
+    for func in (_group_subvols, group_subvols_deepcopy):
+        runs = timeit.repeat(lambda: func(volumes), number=5, repeat=3)
+        print("{0:<24} {1:8.2f} ms".format(
+            func.__name__, min(runs) / 5 * 1000))
+
+
+if __name__ == "__main__":
+    main()
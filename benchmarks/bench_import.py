@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+"""
+Cold start time of the package, each benchmark runs in a fresh
+interpreter(asv timeraw_ benchmarks).
+
+Run with asv or the bundled runner: python -m benchmarks import
+"""
+
+
+class ImportTime(object):
+    def timeraw_import_glustercli_cli(self):
+        return "import glustercli.cli"
+
+    def timeraw_import_glustercli_metrics(self):
+        return "import glustercli.metrics"
+
+    def timeraw_import_peer(self):
+        return "from glustercli.cli import peer"
+
+    def timeraw_import_volume(self):
+        return "from glustercli.cli import volume"
+
+    def timeraw_import_all(self):
+        return "from glustercli.cli import *; from glustercli.metrics import *"
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+Parse time and memory of the XML parsers at 10 to 10,000 bricks.
+
+Run with asv or the bundled runner: python -m benchmarks parsers
+"""
+from glustercli.cli import parsers
+
+from benchmarks import fixtures
+
+SCALES = [10, 100, 1000, 10000]
+
+
+class ParseVolumeInfo(object):
+    params = SCALES
+    param_names = ["bricks"]
+
+    def setup(self, bricks):
+        self.data = fixtures.volume_info_xml(fixtures.Cluster(bricks))
+
+    def time_parse_volume_info(self, bricks):
+        parsers.parse_volume_info(self.data)
+
+    def time_parse_volume_info_group_subvols(self, bricks):
+        parsers.parse_volume_info(self.data, group_subvols=True)
+
+    def time_parse_volume_info_records(self, bricks):
+        parsers.parse_volume_info(self.data, records=True)
+
+    def peakmem_parse_volume_info(self, bricks):
+        parsers.parse_volume_info(self.data)
+
+    def peakmem_parse_volume_info_records(self, bricks):
+        parsers.parse_volume_info(self.data, records=True)
+
+
+class ParseVolumeStatus(object):
+    params = SCALES
+    param_names = ["bricks"]
+
+    def setup(self, bricks):
+        cluster = fixtures.Cluster(bricks)
+        self.data = fixtures.volume_status_xml(cluster)
+        self.volinfo = parsers.parse_volume_info(
+            fixtures.volume_info_xml(cluster))
+
+    def time_parse_volume_status(self, bricks):
+        parsers.parse_volume_status(self.data, self.volinfo)
+
+    def time_parse_volume_status_group_subvols(self, bricks):
+        parsers.parse_volume_status(self.data, self.volinfo,
+                                    group_subvols=True)
+
+    def peakmem_parse_volume_status(self, bricks):
+        parsers.parse_volume_status(self.data, self.volinfo)
+
+
+class VolumeUtilizationHealth(object):
+    # Single distributed-disperse Volume with all the bricks, the
+    # layout where the per brick work of each scrape adds up
+    params = [600, 4000]
+    param_names = ["bricks"]
+
+    def setup(self, bricks):
+        cluster = fixtures.Cluster(bricks, bricks_per_volume=bricks,
+                                   replica=0, disperse=6, redundancy=2)
+        volumes = parsers.parse_volume_status(
+            fixtures.volume_status_xml(cluster),
+            parsers.parse_volume_info(fixtures.volume_info_xml(cluster)))
+        self.volumes = parsers._group_subvols(volumes)
+
+    def time_update_volume_utilization_and_health(self, bricks):
+        parsers._update_volume_utilization(self.volumes)
+        parsers._update_volume_health(self.volumes)
+
+    def time_update_volume_utilization_health(self, bricks):
+        parsers._update_volume_utilization_health(self.volumes)
+
+
+class ParseVolumeProfile(object):
+    params = SCALES
+    param_names = ["bricks"]
+
+    def setup(self, bricks):
+        # Profile info is per Volume, single Volume with all the bricks
+        cluster = fixtures.Cluster(bricks, bricks_per_volume=bricks)
+        self.data = fixtures.profile_info_xml(cluster)
+
+    def time_parse_volume_profile_info(self, bricks):
+        parsers.parse_volume_profile_info(self.data, "info")
+
+    def peakmem_parse_volume_profile_info(self, bricks):
+        parsers.parse_volume_profile_info(self.data, "info")
+
+    def time_parse_volume_profile_info_columnar(self, bricks):
+        parsers.parse_volume_profile_info(self.data, "info", columnar=True)
+
+    def peakmem_parse_volume_profile_info_columnar(self, bricks):
+        parsers.parse_volume_profile_info(self.data, "info", columnar=True)
+
+
+class ParseGeorepStatus(object):
+    params = SCALES
+    param_names = ["bricks"]
+
+    def setup(self, bricks):
+        cluster = fixtures.Cluster(bricks)
+        self.data = fixtures.georep_status_xml(cluster)
+        self.volinfo = parsers.parse_volume_info(
+            fixtures.volume_info_xml(cluster))
+
+    def time_parse_georep_status(self, bricks):
+        parsers.parse_georep_status(self.data, self.volinfo)
+
+    def peakmem_parse_georep_status(self, bricks):
+        parsers.parse_georep_status(self.data, self.volinfo)
+
+
+class ParseHealInfo(object):
+    params = SCALES
+    param_names = ["bricks"]
+
+    def setup(self, bricks):
+        cluster = fixtures.Cluster(bricks, bricks_per_volume=bricks)
+        self.data = fixtures.heal_info_xml(cluster)
+
+    def time_parse_heal_info(self, bricks):
+        parsers.parse_heal_info(self.data)
+
+
+class ParseQuotaList(object):
+    params = SCALES
+    param_names = ["paths"]
+
+    def setup(self, paths):
+        self.data = fixtures.quota_list_xml(fixtures.Cluster(), paths)
+
+    def time_parse_quota_list_paths(self, paths):
+        parsers.parse_quota_list_paths(self.data)
+
+
+class ParseRebalanceStatus(object):
+    params = [10, 100, 1000]
+    param_names = ["nodes"]
+
+    def setup(self, nodes):
+        cluster = fixtures.Cluster(nodes, num_nodes=nodes)
+        self.data = fixtures.rebalance_status_xml(cluster)
+
+    def time_parse_rebalance_status(self, nodes):
+        parsers.parse_rebalance_status(self.data)
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""
+Time to diff two Volume status snapshots at 10 to 10,000 bricks.
+
+Run with asv or the bundled runner: python -m benchmarks status_diff
+"""
+from glustercli.cli import parsers
+from glustercli.metrics.status_diff import diff_status
+
+from benchmarks import fixtures
+
+SCALES = [10, 100, 1000, 10000]
+
+
+class DiffStatus(object):
+    params = SCALES
+    param_names = ["bricks"]
+
+    def setup(self, bricks):
+        cluster = fixtures.Cluster(bricks)
+        data = fixtures.volume_status_xml(cluster)
+        volinfo = parsers.parse_volume_info(
+            fixtures.volume_info_xml(cluster))
+        self.old = parsers.parse_volume_status(data, volinfo,
+                                               group_subvols=True)
+        self.new = parsers.parse_volume_status(data, volinfo,
+                                               group_subvols=True)
+
+    def time_diff_status(self, bricks):
+        diff_status(self.old, self.new)
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+End to end latency of the wrappers, executing the fake gluster
+command(benchmarks/fake_gluster.py) as a subprocess, and with the rpc
+transport against the fake glusterd(benchmarks/fake_glusterd.py).
+
+Run with asv or the bundled runner: python -m benchmarks wrappers
+"""
+import os
+import tempfile
+
+from glustercli.cli import GlusterClient, volume, peer, heal, georep
+from glustercli.metrics import Watcher, volume_status_query
+
+from benchmarks import fake_gluster, fake_glusterd, fixtures
+
+SCALES = [10, 100, 1000, 10000]
+
+
+class WrapperBenchmark(object):
+    params = SCALES
+    param_names = ["bricks"]
+
+    def setup(self, bricks):
+        self._env = os.environ.get("GLUSTERCLI_FAKE_BRICKS")
+        os.environ["GLUSTERCLI_FAKE_BRICKS"] = str(bricks)
+        self.client = GlusterClient(gluster_path=fake_gluster.PATH)
+        self._activation = self.client.activate()
+        self._activation.__enter__()
+        # Warm the fake gluster output cache
+        volume.info()
+
+    def teardown(self, bricks):
+        self._activation.__exit__(None, None, None)
+        if self._env is None:
+            del os.environ["GLUSTERCLI_FAKE_BRICKS"]
+        else:
+            os.environ["GLUSTERCLI_FAKE_BRICKS"] = self._env
+
+
+class VolumeWrappers(WrapperBenchmark):
+    def time_volume_info(self, bricks):
+        volume.info()
+
+    def time_volume_status_detail(self, bricks):
+        volume.status_detail(group_subvols=True)
+
+    def time_volume_vollist(self, bricks):
+        volume.vollist()
+
+    def peakmem_volume_status_detail(self, bricks):
+        volume.status_detail(group_subvols=True)
+
+
+class OtherWrappers(WrapperBenchmark):
+    def time_peer_status(self, bricks):
+        peer.status()
+
+    def time_heal_info(self, bricks):
+        heal.info("vol0")
+
+    def time_georep_status(self, bricks):
+        georep.status()
+
+
+class WatchWrappers(WrapperBenchmark):
+    # Poll of an unchanged Volume status, raw outputs are hashed and
+    # not parsed. Compare with VolumeWrappers.time_volume_status_detail
+    def setup(self, bricks):
+        WrapperBenchmark.setup(self, bricks)
+        self.watcher = Watcher()
+        self.query = volume_status_query()
+        self.watcher.poll(self.query)
+
+    def time_watch_volume_status_unchanged(self, bricks):
+        self.watcher.poll(self.query)
+
+
+class RpcWrapperBenchmark(object):
+    """
+    Same wrappers with the rpc transport, against the fake glusterd
+    (benchmarks/fake_glusterd.py) serving the same cluster
+    """
+    params = SCALES
+    param_names = ["bricks"]
+
+    def setup(self, bricks):
+        self.socket_path = os.path.join(
+            tempfile.gettempdir(),
+            "glustercli-fake-glusterd-{0}.socket".format(os.getpid()))
+        self.server = fake_glusterd.FakeGlusterd(
+            self.socket_path, fixtures.Cluster(num_bricks=bricks))
+        self.server.start()
+        self.client = GlusterClient(glusterd_socket=self.socket_path,
+                                    transport="rpc")
+        self._activation = self.client.activate()
+        self._activation.__enter__()
+
+    def teardown(self, bricks):
+        self._activation.__exit__(None, None, None)
+        self.client.rpc_client().close()
+        self.server.stop()
+
+
+class RpcVolumeWrappers(RpcWrapperBenchmark):
+    def time_volume_info(self, bricks):
+        volume.info()
+
+    def time_volume_status_detail(self, bricks):
+        volume.status_detail(group_subvols=True)
+
+    def time_volume_vollist(self, bricks):
+        volume.vollist()
+
+    def time_peer_status(self, bricks):
+        peer.status()
+
+    def peakmem_volume_status_detail(self, bricks):
+        volume.status_detail(group_subvols=True)
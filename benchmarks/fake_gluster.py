@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Stand-in for the `gluster` executable, serves the synthetic XML
+outputs from benchmarks/fixtures.py so that the wrappers can be
+measured end to end without a real cluster.
+
+    set_gluster_path(benchmarks.fake_gluster.PATH)
+
+Scale is configured through the environment,
+GLUSTERCLI_FAKE_BRICKS(default 100) and
+GLUSTERCLI_FAKE_BRICKS_PER_VOLUME(default 12). Generated outputs
+are cached in the temp directory so that the time spent in this
+script stays close to the time the real CLI takes to print.
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from benchmarks import fixtures  # noqa # pylint: disable=wrong-import-position
+
+PATH = os.path.abspath(__file__)
+# Part of the cache key, bump when the fixtures change
+CACHE_VERSION = 2
+
+
+def cluster_from_env():
+    return fixtures.Cluster(
+        num_bricks=int(os.environ.get("GLUSTERCLI_FAKE_BRICKS", "100")),
+        bricks_per_volume=int(os.environ.get(
+            "GLUSTERCLI_FAKE_BRICKS_PER_VOLUME", "12")))
+
+
+def _volume_output(cluster, args):
+    # noqa # pylint: disable=too-many-return-statements
+    volname = args[1] if len(args) > 1 else None
+    if args[0] == "info":
+        return fixtures.volume_info_xml(cluster, volname)
+
+    if args[0] == "status":
+        return fixtures.volume_status_xml(cluster, volname)
+
+    if args[0] == "list":
+        return fixtures.volume_list_xml(cluster)
+
+    if args[0] == "geo-replication":
+        volname = args[1] if len(args) > 2 else None
+        return fixtures.georep_status_xml(cluster, volname)
+
+    if args[0] == "profile":
+        return fixtures.profile_info_xml(cluster, volname)
+
+    if args[0] == "heal":
+        return fixtures.heal_info_xml(cluster, volname)
+
+    if args[0] == "quota":
+        return fixtures.quota_list_xml(cluster)
+
+    if args[0] == "rebalance":
+        return fixtures.rebalance_status_xml(cluster, volname)
+
+    return None
+
+
+def _volname_arg(args):
+    if args[0] in ("info", "status") and len(args) > 1 and \
+       args[1] != "all":
+        return args[1]
+
+    if args[0] in ("profile", "heal", "quota", "rebalance") and \
+       len(args) > 1:
+        return args[1]
+
+    return None
+
+
+def output(cluster, args):
+    """
+    Returns (rc, out) for the given command arguments
+    """
+    args = [arg for arg in args if not arg.startswith("--")]
+    if not args:
+        return 1, ""
+
+    if args[0] == "peer" and args[1:2] == ["status"]:
+        return 0, fixtures.peer_status_xml(cluster)
+
+    if args[0] == "pool" and args[1:2] == ["list"]:
+        return 0, fixtures.pool_list_xml(cluster)
+
+    if args[0] != "volume" or len(args) < 2:
+        return 0, "success"
+
+    volname = _volname_arg(args[1:])
+    if volname is not None and not fixtures._select(cluster, volname):
+        return 1, fixtures.error_xml(
+            "Volume {0} does not exist".format(volname))
+
+    out = _volume_output(cluster, args[1:])
+    if out is None:
+        return 0, "volume {0}: success".format(args[1])
+
+    return 0, out
+
+
+def cached_output(cluster, args):
+    key = "glustercli-fake-{0}-{1}-{2}-{3}".format(
+        CACHE_VERSION, cluster.num_bricks, cluster.bricks_per_volume,
+        "_".join(arg.replace("/", "%") for arg in args))
+    path = os.path.join(tempfile.gettempdir(), key[:200])
+    try:
+        with open(path) as cache_file:
+            return 0, cache_file.read()
+    except IOError:
+        pass
+
+    ret, out = output(cluster, args)
+    if ret == 0 and out.startswith("<?xml"):
+        tmp_path = "{0}.{1}".format(path, os.getpid())
+        with open(tmp_path, "w") as cache_file:
+            cache_file.write(out)
+        os.rename(tmp_path, path)
+
+    return ret, out
+
+
+def main(args=None):
+    if args is None:
+        args = sys.argv[1:]
+
+    ret, out = cached_output(cluster_from_env(), args)
+    sys.stdout.write(out)
+    return ret
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Stand-in for glusterd's CLI RPC listener, serves the synthetic
+cluster of benchmarks/fixtures.py over a unix socket so that the rpc
+transport can be measured and checked without a real cluster.
+
+    python -m benchmarks.fake_glusterd /tmp/glusterd.socket
+
+or from Python,
+
+    server = FakeGlusterd(path, fixtures.Cluster(num_bricks=100))
+    server.start()
+    client = GlusterClient(glusterd_socket=path, transport="rpc")
+
+Only the procedures used by the rpc transport are implemented(volume
+info, volume status detail, volume list and peer list). Reply dicts
+are encoded here independently of glustercli.cli.rpc.
+"""
+import os
+import socketserver
+import struct
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from benchmarks import fixtures  # noqa # pylint: disable=wrong-import-position
+
+GLUSTER_CLI_PROGRAM = 1238463
+GLUSTER_CLI_VERSION = 2
+LIST_FRIENDS = 3
+GET_VOLUME = 5
+STATUS_VOLUME = 27
+LIST_VOLUME = 33
+
+# gluster CLI type numbers, 2 is replicate and 4 is disperse
+TYPE_REPLICATE = 2
+TYPE_DISPERSE = 4
+
+
+def _opaque(data):
+    return struct.pack(">I", len(data)) + data + b"\x00" * (-len(data) % 4)
+
+
+def encode_dict(data):
+    parts = [struct.pack(">I", len(data))]
+    for key, value in data.items():
+        key = key.encode()
+        value = str(value).encode() + b"\x00"
+        parts.append(struct.pack(">II", len(key), len(value)))
+        parts.append(key + b"\x00" + value)
+    return b"".join(parts)
+
+
+def decode_dict(data):
+    out = {}
+    count, = struct.unpack_from(">I", data, 0)
+    pos = 4
+    for _ in range(count):
+        keylen, vallen = struct.unpack_from(">II", data, pos)
+        pos += 8
+        key = data[pos:pos + keylen].decode()
+        pos += keylen + 1
+        out[key] = data[pos:pos + vallen].rstrip(b"\x00").decode()
+        pos += vallen
+    return out
+
+
+def _decode_opaque(data, pos):
+    size, = struct.unpack_from(">I", data, pos)
+    pos += 4
+    return data[pos:pos + size], pos + size + (-size % 4)
+
+
+def volume_info_dict(cluster, volname=None):
+    out = {}
+    vidxs = fixtures._select(cluster, volname)
+    for count, vidx in enumerate(vidxs):
+        prefix = "volume%d." % count
+        out[prefix + "name"] = "vol%d" % vidx
+        out[prefix + "type"] = TYPE_REPLICATE if cluster.replica > 1 \
+            else TYPE_DISPERSE
+        out[prefix + "status"] = 1
+        out[prefix + "brick_count"] = cluster.bricks_per_volume
+        out[prefix + "dist_count"] = cluster.subvol_size
+        out[prefix + "stripe_count"] = 1
+        out[prefix + "replica_count"] = max(cluster.replica, 1)
+        out[prefix + "arbiter_count"] = 0
+        out[prefix + "disperse_count"] = cluster.disperse
+        out[prefix + "redundancy_count"] = cluster.redundancy
+        out[prefix + "transport"] = 0
+        out[prefix + "volume_id"] = fixtures._uuid(2, vidx)
+        out[prefix + "snap_count"] = 0
+        for bidx, (host, path, node_uuid) in enumerate(
+                cluster.bricks(vidx), start=1):
+            out[prefix + "brick%d" % bidx] = "%s:%s" % (host, path)
+            out[prefix + "brick%d.uuid" % bidx] = node_uuid
+            out[prefix + "brick%d.isArbiter" % bidx] = 0
+        out[prefix + "opt_count"] = 3
+        out[prefix + "option.transport.address-family"] = "inet"
+        out[prefix + "option.nfs.disable"] = "on"
+        out[prefix + "option.performance.client-io-threads"] = "off"
+    out["count"] = len(vidxs)
+    return out
+
+
+def volume_status_dict(cluster, vidx):
+    out = {"volname": "vol%d" % vidx, "count": cluster.bricks_per_volume}
+    for bidx, (host, path, node_uuid) in enumerate(cluster.bricks(vidx)):
+        online = cluster.brick_online(vidx, bidx)
+        prefix = "brick%d." % bidx
+        out[prefix + "hostname"] = host
+        out[prefix + "path"] = path
+        out[prefix + "peerid"] = node_uuid
+        out[prefix + "status"] = 1 if online else 0
+        out[prefix + "port"] = 49152 + bidx if online else 0
+        out[prefix + "rdma_port"] = 0
+        out[prefix + "pid"] = 10000 + bidx if online else -1
+        out[prefix + "total"] = 1099511627776
+        out[prefix + "free"] = 549755813888 - bidx * 1048576
+        out[prefix + "total_inodes"] = 536870912
+        out[prefix + "free_inodes"] = 536000000 - bidx
+        out[prefix + "device"] = "/dev/mapper/vg-b%d" % bidx
+        out[prefix + "block_size"] = 4096
+        out[prefix + "mnt_options"] = "rw,noatime,inode64,noquota"
+        out[prefix + "fs_name"] = "xfs"
+    return out
+
+
+def volume_list_dict(cluster):
+    out = {"count": cluster.num_volumes}
+    for vidx, name in enumerate(cluster.volnames()):
+        out["volume%d" % vidx] = name
+    return out
+
+
+def peer_list_dict(cluster, pool=False):
+    out = {}
+    count = 0
+    for nidx in range(1, min(cluster.num_nodes, cluster.num_bricks)):
+        host, node_uuid = cluster.node(nidx)
+        count += 1
+        out["friend%d.uuid" % count] = node_uuid
+        out["friend%d.hostname" % count] = host
+        out["friend%d.port" % count] = 24007
+        out["friend%d.state" % count] = "Peer in Cluster"
+        out["friend%d.connected" % count] = 1
+    if pool:
+        count += 1
+        out["friend%d.uuid" % count] = cluster.node(0)[1]
+        out["friend%d.hostname" % count] = "localhost"
+        out["friend%d.connected" % count] = 1
+    out["count"] = count
+    return out
+
+
+def _cli_rsp(op_ret, op_errstr, data):
+    return (struct.pack(">ii", op_ret, 0 if op_ret == 0 else 30800) +
+            _opaque(op_errstr.encode()) + _opaque(encode_dict(data)))
+
+
+def _volume_error(volname):
+    return _cli_rsp(-1, "Volume %s does not exist" % volname, {})
+
+
+def reply_body(cluster, proc, args):
+    """
+    XDR encoded result of a procedure, None if not implemented
+    """
+    if proc == LIST_FRIENDS:
+        flags, = struct.unpack_from(">i", args, 0)
+        return struct.pack(">ii", 0, 0) + _opaque(encode_dict(
+            peer_list_dict(cluster, pool=flags == 2)))
+
+    req = decode_dict(_decode_opaque(args, 0)[0])
+    volname = req.get("volname")
+    if proc == GET_VOLUME:
+        if volname is not None and not fixtures._select(cluster, volname):
+            return _volume_error(volname)
+        return _cli_rsp(0, "", volume_info_dict(cluster, volname))
+
+    if proc == STATUS_VOLUME:
+        vidxs = fixtures._select(cluster, volname)
+        if volname is None or not vidxs:
+            return _volume_error(volname)
+        return _cli_rsp(0, "", volume_status_dict(cluster, vidxs[0]))
+
+    if proc == LIST_VOLUME:
+        return _cli_rsp(0, "", volume_list_dict(cluster))
+
+    return None
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def _recv(self, size):
+        data = b""
+        while len(data) < size:
+            chunk = self.request.recv(size - len(data))
+            if not chunk:
+                raise EOFError()
+            data += chunk
+        return data
+
+    def _recv_record(self):
+        record = b""
+        while True:
+            header, = struct.unpack(">I", self._recv(4))
+            record += self._recv(header & 0x7fffffff)
+            if header & 0x80000000:
+                return record
+
+    def handle(self):
+        while True:
+            try:
+                call = self._recv_record()
+            except (EOFError, OSError):
+                return
+
+            self.server.calls += 1
+            xid, _, _, prog, vers, proc = struct.unpack_from(">6I", call, 0)
+            # Skip the credentials and the verifier
+            pos = 24
+            for _ in range(2):
+                pos += 4
+                pos = _decode_opaque(call, pos)[1]
+
+            body = None
+            if prog == GLUSTER_CLI_PROGRAM and vers == GLUSTER_CLI_VERSION:
+                body = reply_body(self.server.cluster, proc, call[pos:])
+
+            # Accepted reply, AUTH_NULL verifier, SUCCESS or
+            # PROC_UNAVAIL
+            reply = struct.pack(">6I", xid, 1, 0, 0, 0,
+                                0 if body is not None else 3) + (body or b"")
+            self.request.sendall(
+                struct.pack(">I", 0x80000000 | len(reply)) + reply)
+
+
+class FakeGlusterd(socketserver.ThreadingMixIn,
+                   socketserver.UnixStreamServer):
+    """
+    Threaded unix socket server answering the CLI RPC calls
+
+    :param path: Socket path, replaced if it exists
+    :param cluster: fixtures.Cluster to serve
+    """
+    daemon_threads = True
+
+    def __init__(self, path, cluster=None):
+        if os.path.exists(path):
+            os.unlink(path)
+        self.cluster = cluster or fixtures.Cluster()
+        self.calls = 0
+        self._thread = None
+        socketserver.UnixStreamServer.__init__(self, path, _Handler)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever,
+                                        name="fake-glusterd")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+
+def main(args=None):
+    if args is None:
+        args = sys.argv[1:]
+
+    if len(args) != 1:
+        sys.stderr.write("Usage: fake_glusterd.py SOCKET_PATH\n")
+        return 1
+
+    server = FakeGlusterd(args[0], cluster=fixtures.Cluster(
+        num_bricks=int(os.environ.get("GLUSTERCLI_FAKE_BRICKS", "100")),
+        bricks_per_volume=int(os.environ.get(
+            "GLUSTERCLI_FAKE_BRICKS_PER_VOLUME", "12"))))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.unlink(args[0])
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
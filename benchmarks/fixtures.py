@@ -0,0 +1,331 @@
+# -*- coding: utf-8 -*-
+"""
+Synthetic `gluster --xml` outputs at configurable scale.
+
+All the generators are deterministic, the same arguments always
+produce the same XML. Cluster layout is derived from the total number
+of bricks: volumes of `bricks_per_volume` bricks spread round robin
+over `num_nodes` servers.
+"""
+from xml.sax.saxutils import escape
+
+XML_HEADER = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+              '<cliOutput><opRet>0</opRet><opErrno>0</opErrno>'
+              '<opErrstr/>')
+XML_FOOTER = '</cliOutput>'
+
+FOPS = ["STAT", "READ", "WRITE", "STATFS", "FLUSH", "FSYNC", "SETXATTR",
+        "GETXATTR", "OPENDIR", "CREATE", "FSTAT", "LOOKUP", "READDIRP",
+        "INODELK", "FINODELK", "ENTRYLK", "FXATTROP"]
+
+
+def _uuid(kind, idx):
+    return "%08x-0000-4000-8000-%012x" % (kind, idx)
+
+
+class Cluster(object):
+    """
+    Layout of a synthetic cluster
+
+    :param num_bricks: Total number of bricks in the cluster
+    :param bricks_per_volume: Number of bricks in each volume
+    :param replica: Replica count, 0 to create disperse volumes
+    :param disperse: Disperse count, used if replica is 0
+    :param redundancy: Disperse redundancy count
+    :param num_nodes: Number of servers
+    """
+    # noqa # pylint: disable=too-many-arguments
+    def __init__(self, num_bricks=100, bricks_per_volume=12, replica=3,
+                 disperse=6, redundancy=2, num_nodes=16):
+        subvol_size = replica if replica > 1 else disperse
+        bricks_per_volume = min(bricks_per_volume, num_bricks)
+        self.bricks_per_volume = max(
+            subvol_size, bricks_per_volume - bricks_per_volume % subvol_size)
+        self.num_volumes = max(1, num_bricks // self.bricks_per_volume)
+        self.replica = replica
+        self.disperse = 0 if replica > 1 else disperse
+        self.redundancy = 0 if replica > 1 else redundancy
+        self.subvol_size = subvol_size
+        self.num_nodes = num_nodes
+
+    @property
+    def num_bricks(self):
+        return self.num_volumes * self.bricks_per_volume
+
+    def volnames(self):
+        return ["vol%d" % vidx for vidx in range(self.num_volumes)]
+
+    def node(self, gidx):
+        nidx = gidx % self.num_nodes
+        return "server%d.example.com" % nidx, _uuid(1, nidx)
+
+    def bricks(self, vidx):
+        """
+        List of (hostname, path, node_uuid) of bricks of a volume
+        """
+        out = []
+        for bidx in range(self.bricks_per_volume):
+            gidx = vidx * self.bricks_per_volume + bidx
+            host, node_uuid = self.node(gidx)
+            out.append((host, "/bricks/vol%d/brick%d" % (vidx, bidx),
+                        node_uuid))
+        return out
+
+    def volume_type(self):
+        base = "Replicate" if self.replica > 1 else "Disperse"
+        if self.bricks_per_volume > self.subvol_size:
+            return "Distributed-" + base
+        return base
+
+    def brick_online(self, vidx, bidx):
+        # Some bricks are offline so that health computation has work
+        return (vidx * self.bricks_per_volume + bidx) % 53 != 7
+
+
+def _select(cluster, volname):
+    if volname is None or volname == "all":
+        return list(range(cluster.num_volumes))
+
+    if volname.startswith("vol") and volname[3:].isdigit() and \
+       int(volname[3:]) < cluster.num_volumes:
+        return [int(volname[3:])]
+
+    return []
+
+
+def volume_info_xml(cluster, volname=None):
+    parts = [XML_HEADER, "<volInfo><volumes>"]
+    vidxs = _select(cluster, volname)
+    for vidx in vidxs:
+        parts.append(
+            "<volume><name>vol%d</name><id>%s</id><status>1</status>"
+            "<statusStr>Started</statusStr><snapshotCount>0</snapshotCount>"
+            "<brickCount>%d</brickCount><distCount>%d</distCount>"
+            "<stripeCount>1</stripeCount><replicaCount>%d</replicaCount>"
+            "<arbiterCount>0</arbiterCount>"
+            "<disperseCount>%d</disperseCount>"
+            "<redundancyCount>%d</redundancyCount><type>7</type>"
+            "<typeStr>%s</typeStr><transport>0</transport><bricks>" % (
+                vidx, _uuid(2, vidx), cluster.bricks_per_volume,
+                cluster.subvol_size, max(cluster.replica, 1),
+                cluster.disperse, cluster.redundancy,
+                cluster.volume_type()))
+        for host, path, node_uuid in cluster.bricks(vidx):
+            parts.append(
+                '<brick uuid="%s">%s:%s<name>%s:%s</name>'
+                '<hostUuid>%s</hostUuid><isArbiter>0</isArbiter></brick>' % (
+                    node_uuid, host, path, host, path, node_uuid))
+        parts.append(
+            "</bricks><optCount>3</optCount><options>"
+            "<option><name>transport.address-family</name>"
+            "<value>inet</value></option>"
+            "<option><name>nfs.disable</name><value>on</value></option>"
+            "<option><name>performance.client-io-threads</name>"
+            "<value>off</value></option></options></volume>")
+    parts.append("<count>%d</count></volumes></volInfo>" % len(vidxs))
+    parts.append(XML_FOOTER)
+    return "".join(parts)
+
+
+def volume_status_xml(cluster, volname=None):
+    parts = [XML_HEADER, "<volStatus><volumes>"]
+    for vidx in _select(cluster, volname):
+        parts.append("<volume><volName>vol%d</volName>"
+                     "<nodeCount>%d</nodeCount>" % (
+                         vidx, cluster.bricks_per_volume))
+        for bidx, (host, path, node_uuid) in enumerate(cluster.bricks(vidx)):
+            online = cluster.brick_online(vidx, bidx)
+            parts.append(
+                "<node><hostname>%s</hostname><path>%s</path>"
+                "<peerid>%s</peerid><status>%d</status><port>%s</port>"
+                "<ports><tcp>%s</tcp><rdma>N/A</rdma></ports>"
+                "<pid>%s</pid><sizeTotal>%d</sizeTotal>"
+                "<sizeFree>%d</sizeFree><device>/dev/mapper/vg-b%d</device>"
+                "<blockSize>4096</blockSize>"
+                "<mntOptions>rw,noatime,inode64,noquota</mntOptions>"
+                "<fsName>xfs</fsName><inodeSize>xfs</inodeSize>"
+                "<inodesTotal>%d</inodesTotal><inodesFree>%d</inodesFree>"
+                "</node>" % (
+                    host, path, node_uuid, 1 if online else 0,
+                    49152 + bidx if online else "N/A",
+                    49152 + bidx if online else "N/A",
+                    10000 + bidx if online else -1,
+                    1099511627776, 549755813888 - bidx * 1048576, bidx,
+                    536870912, 536000000 - bidx))
+        parts.append("<tasks/></volume>")
+    parts.append("</volumes></volStatus>")
+    parts.append(XML_FOOTER)
+    return "".join(parts)
+
+
+def volume_list_xml(cluster):
+    return "".join([XML_HEADER, "<volList><count>%d</count>" %
+                    cluster.num_volumes] +
+                   ["<volume>%s</volume>" % name
+                    for name in cluster.volnames()] +
+                   ["</volList>", XML_FOOTER])
+
+
+def _profile_stats(tag, seed, interval=None):
+    parts = ["<%s>" % tag]
+    if interval is not None:
+        parts.append("<interval>%d</interval>" % interval)
+    parts.append("<blockStats>")
+    size = 1
+    while size <= 1048576:
+        parts.append("<block><size>%d</size><reads>%d</reads>"
+                     "<writes>%d</writes></block>" % (
+                         size, (seed * size) % 997, (seed + size) % 991))
+        size *= 2
+    parts.append("</blockStats><fopStats>")
+    for fidx, fop in enumerate(FOPS):
+        hits = (seed + 1) * (fidx + 1) * 7
+        parts.append("<fop><name>%s</name><hits>%d</hits>"
+                     "<avgLatency>%.6f</avgLatency>"
+                     "<minLatency>%.6f</minLatency>"
+                     "<maxLatency>%.6f</maxLatency></fop>" % (
+                         fop, hits, 50.0 + fidx * 3.5 + seed % 11,
+                         2.0 + fidx, 900.0 + fidx * 40 + seed % 97))
+    parts.append("</fopStats><duration>%d</duration><totalRead>%d</totalRead>"
+                 "<totalWrite>%d</totalWrite></%s>" % (
+                     3600 + seed, seed * 4096, seed * 8192, tag))
+    return "".join(parts)
+
+
+def profile_info_xml(cluster, volname="vol0", interval=1):
+    vidx = (_select(cluster, volname) or [0])[0]
+    parts = [XML_HEADER, "<volProfile><volname>%s</volname>"
+             "<profileOp>3</profileOp><info>3</info>"
+             "<brickCount>%d</brickCount>" % (volname,
+                                              cluster.bricks_per_volume)]
+    for bidx, (host, path, _) in enumerate(cluster.bricks(vidx)):
+        parts.append("<brick><brickName>%s:%s</brickName>" % (host, path))
+        parts.append(_profile_stats("cumulativeStats", bidx + interval))
+        parts.append(_profile_stats("intervalStats", bidx, interval))
+        parts.append("</brick>")
+    parts.append("</volProfile>")
+    parts.append(XML_FOOTER)
+    return "".join(parts)
+
+
+def georep_status_xml(cluster, volname=None):
+    parts = [XML_HEADER, "<geoRep>"]
+    for vidx in _select(cluster, volname):
+        parts.append("<volume><name>vol%d</name><sessions><session>"
+                     "<session_secondary>%s:ssh://backup.example.com::"
+                     "backup%d:%s</session_secondary>" % (
+                         vidx, _uuid(2, vidx), vidx, _uuid(3, vidx)))
+        for bidx, (host, path, node_uuid) in enumerate(cluster.bricks(vidx)):
+            active = bidx % cluster.subvol_size == 0
+            parts.append(
+                "<pair><primary_node>%s</primary_node>"
+                "<primary_brick>%s</primary_brick>"
+                "<secondary_user>root</secondary_user>"
+                "<secondary>ssh://backup.example.com::backup%d</secondary>"
+                "<secondary_node>backup.example.com</secondary_node>"
+                "<status>%s</status><crawl_status>%s</crawl_status>"
+                "<entry>0</entry><data>%d</data><meta>0</meta>"
+                "<failures>0</failures>"
+                "<checkpoint_completed>N/A</checkpoint_completed>"
+                "<primary_node_uuid>%s</primary_node_uuid>"
+                "<last_synced>2021-05-05 15:10:00</last_synced>"
+                "<checkpoint_time>N/A</checkpoint_time>"
+                "<checkpoint_completion_time>N/A"
+                "</checkpoint_completion_time></pair>" % (
+                    host, path, vidx,
+                    "Active" if active else "Passive",
+                    "Changelog Crawl" if active else "N/A",
+                    bidx % 5, node_uuid))
+        parts.append("</session></sessions></volume>")
+    parts.append("</geoRep>")
+    parts.append(XML_FOOTER)
+    return "".join(parts)
+
+
+def heal_info_xml(cluster, volname="vol0"):
+    vidx = (_select(cluster, volname) or [0])[0]
+    parts = [XML_HEADER, "<healInfo><bricks>"]
+    for bidx, (host, path, node_uuid) in enumerate(cluster.bricks(vidx)):
+        online = cluster.brick_online(vidx, bidx)
+        parts.append('<brick hostUuid="%s"><name>%s:%s</name>'
+                     '<status>%s</status>'
+                     '<numberOfEntries>%s</numberOfEntries></brick>' % (
+                         node_uuid, host, path,
+                         "Connected" if online else
+                         "Transport endpoint is not connected",
+                         bidx % 3 if online else "-"))
+    parts.append("</bricks></healInfo>")
+    parts.append(XML_FOOTER)
+    return "".join(parts)
+
+
+def quota_list_xml(cluster, num_paths=None):
+    if num_paths is None:
+        num_paths = cluster.num_bricks
+    parts = [XML_HEADER, "<volQuota>"]
+    for pidx in range(num_paths):
+        used = (pidx * 7919) % 10737418240
+        parts.append("<limit><path>/projects/p%d</path>"
+                     "<hard_limit>10737418240</hard_limit>"
+                     "<soft_limit_percent>80%%</soft_limit_percent>"
+                     "<soft_limit_value>8589934592</soft_limit_value>"
+                     "<used_space>%d</used_space>"
+                     "<avail_space>%d</avail_space>"
+                     "<sl_exceeded>No</sl_exceeded>"
+                     "<hl_exceeded>No</hl_exceeded></limit>" % (
+                         pidx, used, 10737418240 - used))
+    parts.append("</volQuota>")
+    parts.append(XML_FOOTER)
+    return "".join(parts)
+
+
+def _rebalance_counters(seed):
+    return ("<files>%d</files><size>%d</size><lookups>%d</lookups>"
+            "<failures>0</failures><skipped>%d</skipped>"
+            "<status>1</status><statusStr>in progress</statusStr>"
+            "<runtime>%d.00</runtime>" % (
+                seed * 100, seed * 1048576, seed * 150, seed % 3,
+                seed * 10))
+
+
+def rebalance_status_xml(cluster, volname="vol0"):
+    nodes = min(cluster.num_nodes, cluster.num_bricks)
+    parts = [XML_HEADER, "<volRebalance><task-id>%s</task-id><op>3</op>"
+             "<nodeCount>%d</nodeCount>" % (_uuid(4, 0), nodes)]
+    for nidx in range(nodes):
+        host, node_uuid = cluster.node(nidx)
+        parts.append("<node><nodeName>%s</nodeName><id>%s</id>%s</node>" % (
+            host, node_uuid, _rebalance_counters(nidx + 1)))
+    parts.append("<aggregate>%s</aggregate></volRebalance>" %
+                 _rebalance_counters(nodes))
+    parts.append(XML_FOOTER)
+    return "".join(parts)
+
+
+def peer_status_xml(cluster, pool=False):
+    parts = [XML_HEADER, "<peerStatus>"]
+    for nidx in range(1, min(cluster.num_nodes, cluster.num_bricks)):
+        host, node_uuid = cluster.node(nidx)
+        parts.append("<peer><uuid>%s</uuid><hostname>%s</hostname>"
+                     "<hostnames><hostname>%s</hostname></hostnames>"
+                     "<connected>1</connected><state>3</state>"
+                     "<stateStr>Peer in Cluster</stateStr></peer>" % (
+                         node_uuid, host, host))
+    if pool:
+        # pool list also lists the local node, without the state
+        parts.append("<peer><uuid>%s</uuid><hostname>localhost</hostname>"
+                     "<hostnames><hostname>localhost</hostname></hostnames>"
+                     "<connected>1</connected></peer>" % cluster.node(0)[1])
+    parts.append("</peerStatus>")
+    parts.append(XML_FOOTER)
+    return "".join(parts)
+
+
+def pool_list_xml(cluster):
+    return peer_status_xml(cluster, pool=True)
+
+
+def error_xml(message):
+    return ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<cliOutput><opRet>-1</opRet><opErrno>30800</opErrno>'
+            '<opErrstr>%s</opErrstr></cliOutput>' % escape(message))
@@ -1,23 +1,55 @@
 # -*- coding: utf-8 -*-
 
-from glustercli.cli import volume
-from glustercli.cli import bitrot
-from glustercli.cli import bricks
-from glustercli.cli import georep
-from glustercli.cli import peer
-from glustercli.cli import quota
-from glustercli.cli import snapshot
-from glustercli.cli import heal
-from glustercli.cli import nfs_ganesha
-from glustercli.cli import rebalance
-from glustercli.cli.gluster_version import glusterfs_version
-
-from glustercli.cli.utils import (set_gluster_path,
-                                  set_gluster_socket,
-                                  set_ssh_host,
-                                  set_ssh_pem_file,
-                                  ssh_connection,
-                                  GlusterCmdException)
+import importlib
+
+# Submodules and the names re-exported from utils are imported on first
+# access(PEP 562), so that `from glustercli.cli import peer` does not
+# pay for importing all the other modules
+_SUBMODULES = set(["volume", "bitrot", "bricks", "georep", "peer", "quota",
+                   "snapshot", "heal", "nfs_ganesha", "rebalance"])
+_REEXPORTS = {
+    "glusterfs_version": "gluster_version",
+    "set_gluster_path": "utils",
+    "set_gluster_socket": "utils",
+    "set_transport": "utils",
+    "set_ssh_host": "utils",
+    "set_ssh_pem_file": "utils",
+    "set_ssh_user": "utils",
+    "close_ssh_connections": "utils",
+    "ssh_connection": "utils",
+    "set_concurrency_limits": "utils",
+    "scheduler_stats": "utils",
+    "set_volinfo_cache_ttl": "utils",
+    "invalidate_volinfo_cache": "utils",
+    "volinfo_cache_stats": "utils",
+    "add_execute_observer": "utils",
+    "remove_execute_observer": "utils",
+    "command_family": "utils",
+    "CommandStats": "utils",
+    "GlusterClient": "utils",
+    "current_client": "utils",
+    "GlusterCmdException": "utils",
+}
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module("glustercli.cli." + name)
+
+    if name in _REEXPORTS:
+        module = importlib.import_module("glustercli.cli." +
+                                         _REEXPORTS[name])
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+
+    raise AttributeError("module {0!r} has no attribute {1!r}".format(
+        __name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
 
 # Reexport
 __all__ = ["volume",
@@ -32,7 +64,21 @@ __all__ = ["volume",
            "rebalance",
            "set_gluster_path",
            "set_gluster_socket",
+           "set_transport",
            "set_ssh_host",
            "set_ssh_pem_file",
+           "set_ssh_user",
+           "close_ssh_connections",
            "ssh_connection",
+           "set_concurrency_limits",
+           "scheduler_stats",
+           "set_volinfo_cache_ttl",
+           "invalidate_volinfo_cache",
+           "volinfo_cache_stats",
+           "add_execute_observer",
+           "remove_execute_observer",
+           "command_family",
+           "CommandStats",
+           "GlusterClient",
+           "current_client",
            "GlusterCmdException"]
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 
 from glustercli.cli.utils import bitrot_execute, bitrot_execute_xml, \
-    GlusterCmdException
+    GlusterCmdException, parse_output
 from glustercli.cli.parsers import parse_bitrot_scrub_status
 
 THROTTLE_TYPES = ["lazy", "normal", "aggressive"]
@@ -95,4 +95,5 @@ def scrub_status(volname):
      GlusterCmdException((rc, out, err)) on error
     """
     cmd = [volname, "scrub", "status"]
-    return parse_bitrot_scrub_status(bitrot_execute_xml(cmd))
+    return parse_output(cmd, parse_bitrot_scrub_status,
+                        bitrot_execute_xml(cmd))
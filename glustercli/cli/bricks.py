@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 
-from glustercli.cli.utils import volume_execute, volume_execute_xml
+from glustercli.cli.utils import volume_execute, volume_execute_xml, \
+    parse_output
 from glustercli.cli.parsers import parse_remove_brick_status
 
 
@@ -133,7 +134,8 @@ def remove_status(volname, bricks, replica=None):
     cmd += bricks
     cmd += ["status"]
 
-    return parse_remove_brick_status(volume_execute_xml(cmd))
+    return parse_output(cmd, parse_remove_brick_status,
+                        volume_execute_xml(cmd))
 
 
 def replace_commit(volname, source_brick, new_brick):
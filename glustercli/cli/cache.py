@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+
+# Cache is disabled by default, Volume info is fetched from glusterd
+# on every call unless a TTL is configured
+DEFAULT_VOLINFO_TTL = 0
+
+
+def copy_volinfo(volumes):
+    """
+    Copy parsed Volume info so that callers can modify the
+    returned data without corrupting the cached entry
+    """
+    out = []
+    for vol in volumes:
+        vol_copy = vol.copy()
+        vol_copy["bricks"] = [brick.copy() for brick in vol["bricks"]]
+        vol_copy["options"] = [opt.copy() for opt in vol["options"]]
+        out.append(vol_copy)
+
+    return out
+
+
+class VolumeInfoCache(object):
+    """
+    Process wide cache of parsed Volume info. Each entry remembers
+    the generation in which its fetch started, invalidate bumps the
+    generation so a fetch racing with a mutation never repopulates
+    the cache with stale data.
+    """
+    def __init__(self, ttl=DEFAULT_VOLINFO_TTL):
+        self.ttl = ttl
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.ttl > 0
+
+    def get(self, volname=None):
+        """
+        Get cached Volume info, returns None on miss. Info of a
+        single Volume is also served from the all Volumes entry.
+        """
+        if not self.enabled:
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            volumes = self._lookup(volname, now)
+            if volumes is None and volname is not None:
+                volumes = self._lookup(None, now)
+                if volumes is not None:
+                    volumes = [vol for vol in volumes
+                               if vol["name"] == volname] or None
+
+            if volumes is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+
+        return copy_volinfo(volumes)
+
+    def _lookup(self, key, now):
+        entry = self._entries.get(key, None)
+        if entry is None:
+            return None
+
+        expires_at, generation, volumes = entry
+        if expires_at <= now or generation != self.generation:
+            del self._entries[key]
+            return None
+
+        return volumes
+
+    def put(self, volname, volumes, generation):
+        """
+        Add Volume info fetched in the given generation
+        """
+        if not self.enabled:
+            return
+
+        with self._lock:
+            if generation != self.generation:
+                return
+
+            self._entries[volname] = (time.monotonic() + self.ttl,
+                                      generation,
+                                      copy_volinfo(volumes))
+
+    def invalidate(self):
+        """
+        Drop all the cached Volume info
+        """
+        with self._lock:
+            self.generation += 1
+            self.invalidations += 1
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "ttl": self.ttl,
+                "generation": self.generation,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations
+            }
+
+
+volinfo_cache = VolumeInfoCache()
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 
 from glustercli.cli.utils import georep_execute, georep_execute_xml, \
-    gluster_system_execute
+    georep_execute_xml_async, gluster_system_execute, parse_output
 from glustercli.cli.parsers import parse_georep_config, \
     parse_georep_status
 from glustercli.cli import volume
@@ -236,6 +236,18 @@ def config_reset(primary_volume, secondary_host, secondary_volume,
     return georep_execute(cmd)
 
 
+def _config_get_cmd(primary_volume, secondary_host, secondary_volume, key,
+                    secondary_user):
+    cmd = [primary_volume,
+           f"{secondary_user}@{secondary_host}::{secondary_volume}",
+           "config"]
+
+    if key is not None:
+        cmd += [key]
+
+    return cmd
+
+
 def config_get(primary_volume, secondary_host, secondary_volume, key=None,
                secondary_user="root"):
     """
@@ -249,29 +261,33 @@ def config_get(primary_volume, secondary_host, secondary_volume, key=None,
     :returns: Geo-rep session Config Values, raises
      GlusterCmdException((rc, out, err)) on error
     """
-    cmd = [primary_volume,
-           f"{secondary_user}@{secondary_host}::{secondary_volume}"
-           "config"]
-
-    if key is not None:
-        cmd += [key]
+    cmd = _config_get_cmd(primary_volume, secondary_host, secondary_volume,
+                          key, secondary_user)
+    return parse_output(cmd, parse_georep_config, georep_execute_xml(cmd))
 
-    return parse_georep_config(georep_execute_xml(cmd))
 
-
-def status(primary_volume=None, secondary_host=None,
-           secondary_volume=None,
-           secondary_user="root"):
+async def config_get_async(primary_volume, secondary_host, secondary_volume,
+                           key=None, secondary_user="root"):
     """
-    Status of Geo-replication Session
+    Get Configuration of Geo-replication Session, asyncio variant of
+    config_get
 
     :param primary_volume: Primary Volume Name
     :param secondary_host: Secondary Hostname or IP
     :param secondary_volume: Secondary Volume
     :param secondary_user: Secondary User, default is "root"
-    :returns: Geo-replication Status, raises
+    :param key: Config Key
+    :returns: Geo-rep session Config Values, raises
      GlusterCmdException((rc, out, err)) on error
     """
+    cmd = _config_get_cmd(primary_volume, secondary_host, secondary_volume,
+                          key, secondary_user)
+    return parse_output(cmd, parse_georep_config,
+                        await georep_execute_xml_async(cmd))
+
+
+def _status_cmd(primary_volume, secondary_host, secondary_volume,
+                secondary_user):
     cmd = []
 
     if primary_volume is not None:
@@ -284,5 +300,51 @@ def status(primary_volume=None, secondary_host=None,
         ]
 
     cmd += ["status"]
+    return cmd
+
+
+def status(primary_volume=None, secondary_host=None,
+           secondary_volume=None,
+           secondary_user="root", records=False):
+    """
+    Status of Geo-replication Session
+
+    :param primary_volume: Primary Volume Name
+    :param secondary_host: Secondary Hostname or IP
+    :param secondary_volume: Secondary Volume
+    :param secondary_user: Secondary User, default is "root"
+    :param records: Return compact GeorepPair records instead of dicts
+    :returns: Geo-replication Status, raises
+     GlusterCmdException((rc, out, err)) on error
+    """
+    cmd = _status_cmd(primary_volume, secondary_host, secondary_volume,
+                      secondary_user)
+
+    return parse_output(cmd, parse_georep_status,
+                        georep_execute_xml(cmd),
+                        volume.info(), records=records)
+
+
+async def status_async(primary_volume=None, secondary_host=None,
+                       secondary_volume=None,
+                       secondary_user="root", records=False):
+    """
+    Status of Geo-replication Session, asyncio variant of status
+
+    :param primary_volume: Primary Volume Name
+    :param secondary_host: Secondary Hostname or IP
+    :param secondary_volume: Secondary Volume
+    :param secondary_user: Secondary User, default is "root"
+    :param records: Return compact GeorepPair records instead of dicts
+    :returns: Geo-replication Status, raises
+     GlusterCmdException((rc, out, err)) on error
+    """
+    cmd = _status_cmd(primary_volume, secondary_host, secondary_volume,
+                      secondary_user)
+
+    import asyncio  # noqa # pylint: disable=import-outside-toplevel
 
-    return parse_georep_status(georep_execute_xml(cmd), volume.info())
+    out, volinfo = await asyncio.gather(georep_execute_xml_async(cmd),
+                                        volume.info_async())
+    return parse_output(cmd, parse_georep_status, out, volinfo,
+                        records=records)
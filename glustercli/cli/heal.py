@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 
 from glustercli.cli.utils import heal_execute, heal_execute_xml, \
-    GlusterCmdException
+    heal_execute_xml_async, GlusterCmdException, parse_output
 from glustercli.cli.parsers import parse_heal_statistics, parse_heal_info
 
 
@@ -53,7 +53,7 @@ def statistics(volname):
      GlusterCmdException((rc, out, err)) on error
     """
     cmd = [volname, "statistics"]
-    return parse_heal_statistics(heal_execute_xml(cmd))
+    return parse_output(cmd, parse_heal_statistics, heal_execute_xml(cmd))
 
 
 def info(volname, info_type=None):
@@ -72,7 +72,27 @@ def info(volname, info_type=None):
 
         cmd += [info_type.lower()]
 
-    return parse_heal_info(heal_execute_xml(cmd))
+    return parse_output(cmd, parse_heal_info, heal_execute_xml(cmd))
+
+
+async def info_async(volname, info_type=None):
+    """
+    Get Volume Heal Info, asyncio variant of info
+
+    :param volname: Volume Name
+    :returns: Output of Heal Info command, raises
+     GlusterCmdException((rc, out, err)) on error
+    """
+    cmd = [volname, "info"]
+
+    if info_type is not None:
+        if info_type.lower() not in HEAL_INFO_TYPES:
+            raise GlusterCmdException((-1, "", "Invalid Heal Info Types"))
+
+        cmd += [info_type.lower()]
+
+    return parse_output(cmd, parse_heal_info,
+                        await heal_execute_xml_async(cmd))
 
 
 def split_brain(volname, bigger_file=None,
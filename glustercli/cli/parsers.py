@@ -1,9 +1,11 @@
 # -*- coding: utf-8 -*-
-import copy
 import xml.etree.cElementTree as etree
+from array import array
 import math
 
-from .utils import RebalanceOperationType as ROT
+from .utils import RebalanceOperationType as ROT, GlusterCmdException
+from .records import (Record, Subvol, BrickStatus, Peer, GeorepPair,
+                      volume_record)
 
 ParseError = etree.ParseError if hasattr(etree, 'ParseError') else SyntaxError
 
@@ -24,6 +26,24 @@ STATE_STOPPED = "Stopped"
 TYPE_REPLICATE = "REPLICATE"
 TYPE_DISPERSE = "DISPERSE"
 
+# glusterfs_fop_t from libglusterfs/src/glusterfs/glusterfs-fops.x,
+# FOP_IDS[name] is the GF_FOP_<name> value
+FOP_NAMES = [
+    "NULL", "STAT", "READLINK", "MKNOD", "MKDIR", "UNLINK", "RMDIR",
+    "SYMLINK", "RENAME", "LINK", "TRUNCATE", "OPEN", "READ", "WRITE",
+    "STATFS", "FLUSH", "FSYNC", "SETXATTR", "GETXATTR", "REMOVEXATTR",
+    "OPENDIR", "FSYNCDIR", "ACCESS", "CREATE", "FTRUNCATE", "FSTAT", "LK",
+    "LOOKUP", "READDIR", "INODELK", "FINODELK", "ENTRYLK", "FENTRYLK",
+    "XATTROP", "FXATTROP", "FGETXATTR", "FSETXATTR", "RCHECKSUM",
+    "SETATTR", "FSETATTR", "READDIRP", "FORGET", "RELEASE", "RELEASEDIR",
+    "GETSPEC", "FREMOVEXATTR", "FALLOCATE", "DISCARD", "ZEROFILL", "IPC",
+    "SEEK", "LEASE", "COMPOUND", "GETACTIVELK", "SETACTIVELK", "PUT",
+    "ICREATE", "NAMELINK", "COPY_FILE_RANGE"
+]
+FOP_IDS = dict((name, fop_id) for fop_id, name in enumerate(FOP_NAMES))
+# Id of the FOPs not in the table
+FOP_UNKNOWN = -1
+
 
 def _subvol_health(subvol):
     up_bricks = 0
@@ -31,8 +51,12 @@ def _subvol_health(subvol):
         if brick["online"]:
             up_bricks += 1
 
+    return _subvol_health_counts(subvol, len(subvol["bricks"]), up_bricks)
+
+
+def _subvol_health_counts(subvol, num_bricks, up_bricks):
     health = HEALTH_UP
-    if len(subvol["bricks"]) != up_bricks:
+    if num_bricks != up_bricks:
         health = HEALTH_DOWN
         if subvol["type"] == TYPE_REPLICATE:
             if up_bricks >= math.ceil(subvol["replica"] / 2):
@@ -41,7 +65,7 @@ def _subvol_health(subvol):
         # If down bricks are less than or equal to redudancy count
         # then Volume is UP but some bricks are down
         if subvol["type"] == TYPE_DISPERSE:
-            down_bricks = (len(subvol["bricks"]) - up_bricks)
+            down_bricks = (num_bricks - up_bricks)
             if down_bricks <= subvol["disperse_redundancy"]:
                 health = HEALTH_PARTIAL
 
@@ -131,6 +155,86 @@ def _update_volume_utilization(volumes):
             vol["inodes_free"] = vol["inodes_total"] - vol["inodes_used"]
 
 
+def _update_volume_utilization_health(volumes):
+    """
+    Same as _update_volume_utilization followed by
+    _update_volume_health, in a single walk of the bricks with the
+    per subvol values kept in locals.
+    """
+    # Note: modifies volume and subvol inside loop
+    for vol in volumes:
+        started = vol["status"] == STATE_STARTED
+        health = HEALTH_UP
+        up_subvols = 0
+        size_used = size_total = inodes_used = inodes_total = 0
+
+        for subvol in vol["subvols"]:
+            bricks = subvol["bricks"]
+            used = total = iused = itotal = 0
+            up_bricks = 0
+            for brick in bricks:
+                if brick["online"]:
+                    up_bricks += 1
+
+                if brick["type"] == "Arbiter":
+                    continue
+
+                # Effective used is the max and effective total is the
+                # min of the positive values
+                value = brick["size_used"]
+                if value >= used:
+                    used = value
+
+                value = brick["size_total"]
+                if total == 0 or 0 < value <= total:
+                    total = value
+
+                value = brick["inodes_used"]
+                if value >= iused:
+                    iused = value
+
+                value = brick["inodes_total"]
+                if itotal == 0 or 0 < value <= itotal:
+                    itotal = value
+
+            if subvol["type"] == TYPE_DISPERSE:
+                # Subvol Size = Sum of size of Data bricks
+                data_bricks = subvol["disperse"] - \
+                    subvol["disperse_redundancy"]
+                used *= data_bricks
+                total *= data_bricks
+                iused *= data_bricks
+                itotal *= data_bricks
+
+            size_used += used
+            size_total += total
+            inodes_used += iused
+            inodes_total += itotal
+
+            if not started:
+                continue
+
+            subvol_health = _subvol_health_counts(subvol, len(bricks),
+                                                  up_bricks)
+            subvol["health"] = subvol_health
+            if subvol_health == HEALTH_DOWN:
+                health = HEALTH_DEGRADED
+            else:
+                up_subvols += 1
+                if subvol_health == HEALTH_PARTIAL and \
+                   health != HEALTH_DEGRADED:
+                    health = HEALTH_PARTIAL
+
+        vol["size_total"] = size_total
+        vol["size_free"] = size_total - size_used
+        vol["size_used"] = size_used
+        vol["inodes_total"] = inodes_total
+        vol["inodes_free"] = inodes_total - inodes_used
+        vol["inodes_used"] = inodes_used
+        if started:
+            vol["health"] = HEALTH_DOWN if up_subvols == 0 else health
+
+
 def _parse_a_vol(volume_el):
     value = {
         'name': volume_el.find('name').text,
@@ -186,37 +290,47 @@ def _get_subvol_bricks_count(replica_count, disperse_count):
 
 
 def _group_subvols(volumes):
-    out_volumes = copy.deepcopy(volumes)
-    for idx, vol in enumerate(volumes):
+    """
+    Group the bricks of each Volume into subvols. Output Volumes are
+    shallow copies without "bricks", subvols refer to the same brick
+    objects as the input Volumes instead of copies of them.
+    """
+    out_volumes = []
+    for vol in volumes:
         # Remove Bricks information from the output
         # and include subvols
-        del out_volumes[idx]["bricks"]
-        out_volumes[idx]["subvols"] = []
+        out_vol = vol.copy()
+        del out_vol["bricks"]
+        bricks = vol["bricks"]
         subvol_type = vol["type"].split("_")[-1]
         subvol_bricks_count = _get_subvol_bricks_count(vol["replica"],
                                                        vol["disperse"])
 
-        number_of_subvols = int(len(vol["bricks"]) / subvol_bricks_count)
+        number_of_subvols = len(bricks) // subvol_bricks_count
+        is_record = isinstance(vol, Record)
 
+        subvols = []
         for sidx in range(number_of_subvols):
+            start = sidx * subvol_bricks_count
             subvol = {
                 "name": "%s-%s-%s" % (vol["name"], subvol_type.lower(), sidx),
                 "replica": vol["replica"],
                 "disperse": vol["disperse"],
                 "disperse_redundancy": vol["disperse_redundancy"],
                 "type": subvol_type,
-                "bricks": []
+                "bricks": bricks[start:start + subvol_bricks_count]
             }
-            for bidx in range(subvol_bricks_count):
-                subvol["bricks"].append(
-                    vol["bricks"][sidx * subvol_bricks_count + bidx]
-                )
-            out_volumes[idx]["subvols"].append(subvol)
+            if is_record:
+                subvol = Subvol(**subvol)
+            subvols.append(subvol)
+
+        out_vol["subvols"] = subvols
+        out_volumes.append(out_vol)
 
     return out_volumes
 
 
-def parse_volume_info(info, group_subvols=False):
+def parse_volume_info(info, group_subvols=False, records=False):
     tree = etree.fromstring(info)
     volumes = []
     for volume_el in tree.findall('volInfo/volumes/volume'):
@@ -225,11 +339,65 @@ def parse_volume_info(info, group_subvols=False):
         except (ParseError, AttributeError, ValueError) as err:
             raise GlusterCmdOutputParseError(err)
 
+        if records:
+            volumes[-1] = volume_record(volumes[-1])
+
     if group_subvols:
         return _group_subvols(volumes)
 
     return volumes
 
+
+def _iterparse_items(stream, path):
+    """
+    Incrementally parse the XML from stream and yield the elements
+    found at the given path(relative to cliOutput). Yielded elements
+    are detached from the tree once processed to keep the memory
+    usage flat.
+    """
+    stack = []
+    op_ret = None
+    try:
+        for event, elem in etree.iterparse(stream, events=("start", "end")):
+            if event == "start":
+                stack.append(elem)
+                continue
+
+            stack.pop()
+            if len(stack) == 1:
+                if elem.tag == "opRet":
+                    op_ret = elem.text
+                elif elem.tag == "opErrstr" and op_ret == "-1":
+                    raise GlusterCmdException((-1, "", elem.text or "FAILED"))
+            elif len(stack) == len(path) and elem.tag == path[-1] and \
+                    [el.tag for el in stack[1:]] == list(path[:-1]):
+                yield elem
+                stack[-1].remove(elem)
+    except ParseError as err:
+        raise GlusterCmdOutputParseError(err)
+
+
+def iter_volume_info(stream, group_subvols=False, records=False):
+    """
+    Streaming variant of parse_volume_info, yields one Volume at a
+    time while reading the XML from stream
+    """
+    for volume_el in _iterparse_items(stream,
+                                      ("volInfo", "volumes", "volume")):
+        try:
+            vol = _parse_a_vol(volume_el)
+        except (AttributeError, ValueError) as err:
+            raise GlusterCmdOutputParseError(err)
+
+        if records:
+            vol = volume_record(vol)
+
+        if group_subvols:
+            vol = _group_subvols([vol])[0]
+
+        yield vol
+
+
 def _check_node_value(node_el, key, type, default_value):
     value = node_el.find(key)
     if value is not None:
@@ -291,58 +459,115 @@ def _parse_volume_status(data):
     return nodes
 
 
-def parse_volume_status(status_data, volinfo, group_subvols=False):
-    nodes_data = _parse_volume_status(status_data)
-    tmp_brick_status = {}
-    for node in nodes_data:
-        tmp_brick_status[node["name"]] = node
-
-    volumes = []
-    for vol in volinfo:
-        volumes.append(vol.copy())
-        volumes[-1]["bricks"] = []
+def iter_volume_status(stream):
+    """
+    Streaming variant of volume status parsing, yields
+    (VOLUME_NAME, LIST_OF_NODES) for one Volume at a time while
+    reading the XML from stream
+    """
+    for volume_el in _iterparse_items(stream,
+                                      ("volStatus", "volumes", "volume")):
+        try:
+            volname = volume_el.find('volName').text
+            nodes = [_parse_a_node(node_el)
+                     for node_el in volume_el.findall('node')]
+        except (AttributeError, ValueError) as err:
+            raise GlusterCmdOutputParseError(err)
 
-        for brick in vol["bricks"]:
-            brick_status_data = tmp_brick_status.get(brick["name"], None)
-            if brick_status_data is None:
-                use_default = True
-            else:
-                # brick could be offline
-                use_default = not brick_status_data.get("online", False)
-
-            if use_default:
-                # Default Status
-                volumes[-1]["bricks"].append({
-                    "name": brick["name"],
-                    "uuid": brick["uuid"],
-                    "type": brick["type"],
-                    "online": False,
-                    "ports": {"tcp": "N/A", "rdma": "N/A"},
-                    "pid": "N/A",
-                    "size_total": 0,
-                    "size_free": 0,
-                    "size_used": 0,
-                    "inodes_total": 0,
-                    "inodes_free": 0,
-                    "inodes_used": 0,
-                    "device": "N/A",
-                    "block_size": "N/A",
-                    "mnt_options": "N/A",
-                    "fs_name": "N/A"
-                })
-            else:
-                volumes[-1]["bricks"].append(brick_status_data.copy())
-                volumes[-1]["bricks"][-1]["type"] = brick["type"]
+        yield volname, nodes
+
+
+def _merge_volume_status(vol, tmp_brick_status):
+    volume = vol.copy()
+    volume["bricks"] = []
+
+    for brick in vol["bricks"]:
+        brick_status_data = tmp_brick_status.get(brick["name"], None)
+        if brick_status_data is None:
+            use_default = True
+        else:
+            # brick could be offline
+            use_default = not brick_status_data.get("online", False)
+
+        if use_default:
+            # Default Status
+            volume["bricks"].append({
+                "name": brick["name"],
+                "uuid": brick["uuid"],
+                "type": brick["type"],
+                "online": False,
+                "ports": {"tcp": "N/A", "rdma": "N/A"},
+                "pid": "N/A",
+                "size_total": 0,
+                "size_free": 0,
+                "size_used": 0,
+                "inodes_total": 0,
+                "inodes_free": 0,
+                "inodes_used": 0,
+                "device": "N/A",
+                "block_size": "N/A",
+                "mnt_options": "N/A",
+                "fs_name": "N/A"
+            })
+        else:
+            # Status of a brick is parsed afresh for every call and
+            # used only once, no need to copy
+            brick_status_data["type"] = brick["type"]
+            volume["bricks"].append(brick_status_data)
+
+    return volume
+
+
+def _finalize_volume_status(volumes, group_subvols, records):
+    if records:
+        volumes = [volume_record(vol, BrickStatus) for vol in volumes]
 
     if group_subvols:
         grouped_vols = _group_subvols(volumes)
-        _update_volume_utilization(grouped_vols)
-        _update_volume_health(grouped_vols)
+        _update_volume_utilization_health(grouped_vols)
         return grouped_vols
 
     return volumes
 
 
+def merge_volume_status(vol, nodes, group_subvols=False, records=False):
+    """
+    Merge the status of nodes(bricks) with the info of a Volume,
+    used along with iter_volume_status
+    """
+    tmp_brick_status = {}
+    for node in nodes:
+        tmp_brick_status[node["name"]] = node
+
+    return _finalize_volume_status(
+        [_merge_volume_status(vol, tmp_brick_status)], group_subvols,
+        records)[0]
+
+
+def parse_volume_status(status_data, volinfo, group_subvols=False,
+                        records=False):
+    return merge_volumes_status(volinfo, _parse_volume_status(status_data),
+                                group_subvols=group_subvols, records=records)
+
+
+def merge_volumes_status(volinfo, nodes_data, group_subvols=False,
+                         records=False):
+    """
+    Merge the status of nodes(bricks) of any of the Volumes with the
+    info of the Volumes, used when the nodes are not parsed from the
+    volume status XML
+    """
+    tmp_brick_status = {}
+    for node in nodes_data:
+        tmp_brick_status[node["name"]] = node
+
+    volumes = []
+    for vol in volinfo:
+        volumes.append(_merge_volume_status(vol, tmp_brick_status))
+
+    return _finalize_volume_status(volumes, group_subvols, records)
+
+
 def _parse_profile_info_clear(volume_el):
     clear = {
         'volname': volume_el.find('volname').text,
@@ -400,7 +625,59 @@ def _parse_profile_fop_stats(fop_el):
     return stats
 
 
-def _parse_profile_bricks(brick_el):
+def _parse_profile_block_columns(b_el):
+    columns = {"size": array("Q"), "reads": array("Q"),
+               "writes": array("Q")}
+    if b_el is None:
+        return columns
+
+    for block_el in b_el.findall('block'):
+        columns["size"].append(int(block_el.find('size').text))
+        columns["reads"].append(int(block_el.find('reads').text))
+        columns["writes"].append(int(block_el.find('writes').text))
+    return columns
+
+
+def _parse_profile_fop_columns(fop_el):
+    columns = {"fop_id": array("i"), "name": [], "hits": array("Q"),
+               "max_latency": array("d"), "min_latency": array("d"),
+               "avg_latency": array("d")}
+    if fop_el is None:
+        return columns
+
+    for fop in fop_el.findall('fop'):
+        name = fop.find('name').text
+        columns["fop_id"].append(FOP_IDS.get(name, FOP_UNKNOWN))
+        columns["name"].append(name)
+        columns["hits"].append(int(fop.find('hits').text))
+        columns["max_latency"].append(float(fop.find('maxLatency').text))
+        columns["min_latency"].append(float(fop.find('minLatency').text))
+        columns["avg_latency"].append(float(fop.find('avgLatency').text))
+    return columns
+
+
+def numpy_columns(columns):
+    """
+    View the array columns of a columnar profile output as NumPy
+    arrays, without copying. Requires NumPy.
+
+    :param columns: Dict of columns, for example
+     brick["interval_fop_stats"] of the columnar profile info
+    :returns: Dict with the same keys, arrays converted to
+     numpy.ndarray
+    """
+    import numpy  # noqa # pylint: disable=import-outside-toplevel
+
+    out = {}
+    for key, value in columns.items():
+        if isinstance(value, array):
+            value = numpy.frombuffer(value, dtype=value.typecode) \
+                if value else numpy.array([], dtype=value.typecode)
+        out[key] = value
+    return out
+
+
+def _parse_profile_bricks(brick_el, columnar=False):
     cumulative_block_stats = []
     cumulative_fop_stats = []
     cumulative_total_read_bytes = 0
@@ -415,10 +692,20 @@ def _parse_profile_bricks(brick_el):
 
     brick_name = brick_el.find('brickName').text
 
+    parse_block_stats = _parse_profile_block_stats
+    parse_fop_stats = _parse_profile_fop_stats
+    if columnar:
+        parse_block_stats = _parse_profile_block_columns
+        parse_fop_stats = _parse_profile_fop_columns
+        cumulative_block_stats = parse_block_stats(None)
+        cumulative_fop_stats = parse_fop_stats(None)
+        interval_block_stats = parse_block_stats(None)
+        interval_fop_stats = parse_fop_stats(None)
+
     if brick_el.find('cumulativeStats') is not None:
-        cumulative_block_stats = _parse_profile_block_stats(
+        cumulative_block_stats = parse_block_stats(
             brick_el.find('cumulativeStats/blockStats'))
-        cumulative_fop_stats = _parse_profile_fop_stats(
+        cumulative_fop_stats = parse_fop_stats(
             brick_el.find('cumulativeStats/fopStats'))
         cumulative_total_read_bytes = int(
             brick_el.find('cumulativeStats').find('totalRead').text)
@@ -428,9 +715,9 @@ def _parse_profile_bricks(brick_el):
             brick_el.find('cumulativeStats').find('duration').text)
 
     if brick_el.find('intervalStats') is not None:
-        interval_block_stats = _parse_profile_block_stats(
+        interval_block_stats = parse_block_stats(
             brick_el.find('intervalStats/blockStats'))
-        interval_fop_stats = _parse_profile_fop_stats(
+        interval_fop_stats = parse_fop_stats(
             brick_el.find('intervalStats/fopStats'))
         interval_total_read_bytes = int(
             brick_el.find('intervalStats').find('totalRead').text)
@@ -456,19 +743,32 @@ def _parse_profile_bricks(brick_el):
     return profile_brick
 
 
-def _parse_profile_info(volume_el):
+def _parse_profile_info(volume_el, columnar=False):
     profile = {
         'volname': volume_el.find('volname').text,
         'bricks': []
     }
 
     for brick_el in volume_el.findall('brick'):
-        profile['bricks'].append(_parse_profile_bricks(brick_el))
+        profile['bricks'].append(_parse_profile_bricks(brick_el, columnar))
 
     return profile
 
 
-def parse_volume_profile_info(info, opt):
+def parse_volume_profile_info(info, opt, columnar=False):
+    """
+    Parse the profile info XML
+
+    :param info: Profile info XML
+    :param opt: Operation type of info
+    :param columnar: Return the block stats and FOP stats of each brick
+     as columns of numeric arrays instead of lists of dicts. Block
+     stats are {"size", "reads", "writes"} with the exact block size
+     in bytes and FOP stats are {"fop_id"(see FOP_IDS), "name",
+     "hits", "max_latency", "min_latency", "avg_latency"}, all the
+     columns except "name" are array.array. See numpy_columns.
+    :returns: List of profile info of Volumes
+    """
     xml = etree.fromstring(info)
     profiles = []
     for prof_el in xml.findall('volProfile'):
@@ -476,7 +776,7 @@ def parse_volume_profile_info(info, opt):
             if opt == "clear":
                 profiles.append(_parse_profile_info_clear(prof_el))
             else:
-                profiles.append(_parse_profile_info(prof_el))
+                profiles.append(_parse_profile_info(prof_el, columnar))
 
         except (ParseError, AttributeError, ValueError) as err:
             raise GlusterCmdOutputParseError(err)
@@ -488,7 +788,7 @@ def parse_volume_options(data):
     raise NotImplementedError("Volume Options")
 
 
-def parse_georep_status(data, volinfo):
+def parse_georep_status(data, volinfo, records=False):
     """
     Merge Geo-rep status and Volume Info to get Offline Status
     and to sort the status in the same order as of Volume Info
@@ -587,6 +887,11 @@ def parse_georep_status(data, volinfo):
                     "checkpoint_time": "N/A",
                     "checkpoint_completion_time": "N/A"
                 })
+
+    if records:
+        out = [[GeorepPair(**pair) for pair in session]
+               for session in out]
+
     return out
 
 
@@ -782,7 +1087,7 @@ def _parse_a_peer(peer):
     return value
 
 
-def parse_peer_status(data):
+def parse_peer_status(data, records=False):
     tree = etree.fromstring(data)
     peers = []
     for peer_el in tree.findall('peerStatus/peer'):
@@ -791,10 +1096,13 @@ def parse_peer_status(data):
         except (ParseError, AttributeError, ValueError) as err:
             raise GlusterCmdOutputParseError(err)
 
+        if records:
+            peers[-1] = Peer(**peers[-1])
+
     return peers
 
 
-def parse_pool_list(data):
+def parse_pool_list(data, records=False):
     tree = etree.fromstring(data)
     pools = []
     for peer_el in tree.findall('peerStatus/peer'):
@@ -803,4 +1111,7 @@ def parse_pool_list(data):
         except (ParseError, AttributeError, ValueError) as err:
             raise GlusterCmdOutputParseError(err)
 
+        if records:
+            pools[-1] = Peer(**pools[-1])
+
     return pools
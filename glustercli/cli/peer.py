@@ -1,10 +1,20 @@
 # -*- coding: utf-8 -*-
 
+import importlib
+
 from glustercli.cli.utils import peer_execute, peer_execute_xml, \
-    gluster_execute_xml, GlusterCmdException
+    gluster_execute_xml, peer_execute_xml_async, gluster_execute_xml_async, \
+    peer_rpc_execute, peer_rpc_execute_async, rpc_execute_or_raise, \
+    rpc_execute_or_raise_async, current_client, GlusterCmdException, \
+    parse_output
 from glustercli.cli.parsers import parse_peer_status, parse_pool_list
 
 
+def _rpc():
+    # Only needed with the rpc transport, imported on first use
+    return importlib.import_module("glustercli.cli.rpc")
+
+
 def probe(host):
     """
     Add Host to Cluster
@@ -47,7 +57,8 @@ def detach_all():
     :returns: Output of peer detach command, raises
      GlusterCmdException((rc, out, err)) on error
     """
-    peers = parse_peer_status(peer_execute_xml(["status"]))
+    cmd = ["status"]
+    peers = parse_output(cmd, parse_peer_status, peer_execute_xml(cmd))
     errors_list = []
     outlist = []
     if peers:
@@ -69,23 +80,71 @@ def detach_all():
     return "\n".join(outlist)
 
 
-def status():
+def status(records=False):
     """
     Peer Status of Cluster
 
+    :param records: Return compact Peer records instead of dicts
     :returns: Output of peer status command, raises
      GlusterCmdException((rc, out, err)) on error
     """
     cmd = ["status"]
-    return parse_peer_status(peer_execute_xml(cmd))
+    if current_client().use_rpc:
+        return parse_output(cmd, _rpc().parse_peer_list_dict,
+                            peer_rpc_execute(cmd), records=records)
+
+    return parse_output(cmd, parse_peer_status,
+                        peer_execute_xml(cmd), records=records)
 
 
-def pool():
+def pool(records=False):
     """
     Cluster Pool Status
 
+    :param records: Return compact Peer records instead of dicts
+    :returns: Pool list and status, raises
+     GlusterCmdException((rc, out, err)) on error
+    """
+    cmd = ["pool", "list"]
+    if current_client().use_rpc:
+        return parse_output(cmd, _rpc().parse_peer_list_dict,
+                            rpc_execute_or_raise(cmd), records=records)
+
+    return parse_output(cmd, parse_pool_list,
+                        gluster_execute_xml(cmd), records=records)
+
+
+async def status_async(records=False):
+    """
+    Peer Status of Cluster, asyncio variant of status
+
+    :param records: Return compact Peer records instead of dicts
+    :returns: Output of peer status command, raises
+     GlusterCmdException((rc, out, err)) on error
+    """
+    cmd = ["status"]
+    if current_client().use_rpc:
+        return parse_output(cmd, _rpc().parse_peer_list_dict,
+                            await peer_rpc_execute_async(cmd),
+                            records=records)
+
+    return parse_output(cmd, parse_peer_status,
+                        await peer_execute_xml_async(cmd), records=records)
+
+
+async def pool_async(records=False):
+    """
+    Cluster Pool Status, asyncio variant of pool
+
+    :param records: Return compact Peer records instead of dicts
     :returns: Pool list and status, raises
      GlusterCmdException((rc, out, err)) on error
     """
     cmd = ["pool", "list"]
-    return parse_pool_list(gluster_execute_xml(cmd))
+    if current_client().use_rpc:
+        return parse_output(cmd, _rpc().parse_peer_list_dict,
+                            await rpc_execute_or_raise_async(cmd),
+                            records=records)
+
+    return parse_output(cmd, parse_pool_list,
+                        await gluster_execute_xml_async(cmd), records=records)
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 
 from glustercli.cli.utils import quota_execute, quota_execute_xml, \
-    volume_execute
+    quota_execute_xml_async, volume_execute, parse_output
 from glustercli.cli.parsers import parse_quota_list_paths, \
     parse_quota_list_objects
 
@@ -53,7 +53,22 @@ def list_paths(volname, paths=[]):
      GlusterCmdException((rc, out, err)) on error
     """
     cmd = [volname, "list"] + paths
-    return parse_quota_list_paths(quota_execute_xml(cmd))
+    return parse_output(cmd, parse_quota_list_paths, quota_execute_xml(cmd))
+
+
+# noqa # pylint: disable=dangerous-default-value
+async def list_paths_async(volname, paths=[]):
+    """
+    Get Quota List, asyncio variant of list_paths
+
+    :param volname: Volume Name
+    :param paths: Optional list of paths
+    :returns: Quota list of paths, raises
+     GlusterCmdException((rc, out, err)) on error
+    """
+    cmd = [volname, "list"] + paths
+    return parse_output(cmd, parse_quota_list_paths,
+                        await quota_execute_xml_async(cmd))
 
 
 # noqa # pylint: disable=dangerous-default-value
@@ -67,7 +82,22 @@ def list_objects(volname, paths=[]):
      GlusterCmdException((rc, out, err)) on error
     """
     cmd = [volname, "list"] + paths
-    return parse_quota_list_objects(quota_execute_xml(cmd))
+    return parse_output(cmd, parse_quota_list_objects, quota_execute_xml(cmd))
+
+
+# noqa # pylint: disable=dangerous-default-value
+async def list_objects_async(volname, paths=[]):
+    """
+    Get Quota Objects List, asyncio variant of list_objects
+
+    :param volname: Volume Name
+    :param paths: Optional list of paths
+    :returns: Quota list of objects, raises
+     GlusterCmdException((rc, out, err)) on error
+    """
+    cmd = [volname, "list"] + paths
+    return parse_output(cmd, parse_quota_list_objects,
+                        await quota_execute_xml_async(cmd))
 
 
 def remove_path(volname, path):
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 
-from glustercli.cli.utils import volume_execute, volume_execute_xml
+from glustercli.cli.utils import volume_execute, volume_execute_xml, \
+    parse_output
 from glustercli.cli.parsers import parse_rebalance_status
 
 
@@ -52,4 +53,4 @@ def status(volname):
      GlusterCmdException((rc, out, err)) on error
     """
     cmd = ["rebalance", volname, "status"]
-    return parse_rebalance_status(volume_execute_xml(cmd))
+    return parse_output(cmd, parse_rebalance_status, volume_execute_xml(cmd))
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+
+
+class Record(object):
+    """
+    Compact record type for the parsed output. Records use __slots__
+    instead of a per instance dict and support the dict style access
+    used with the default output(vol["name"], vol.get("health"),
+    vol.items() etc) along with attribute access(vol.name).
+    """
+    __slots__ = ()
+    _field_set = frozenset()
+
+    def __init__(self, **kwargs):
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+    def __getitem__(self, key):
+        if key not in self._field_set:
+            raise KeyError(key)
+
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in self._field_set:
+            raise KeyError(key)
+
+        setattr(self, key, value)
+
+    def __delitem__(self, key):
+        if key not in self._field_set:
+            raise KeyError(key)
+
+        try:
+            delattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in self._field_set and hasattr(self, key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return [key for key in self.__slots__ if hasattr(self, key)]
+
+    def values(self):
+        return [getattr(self, key) for key in self.keys()]
+
+    def items(self):
+        return [(key, getattr(self, key)) for key in self.keys()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __eq__(self, other):
+        if isinstance(other, (Record, dict)):
+            return dict(self.items()) == dict(other.items())
+
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        if equal is NotImplemented:
+            return equal
+
+        return not equal
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "{0}({1})".format(
+            self.__class__.__name__,
+            ", ".join("{0}={1!r}".format(key, value)
+                      for key, value in self.items()))
+
+    def __getstate__(self):
+        return dict(self.items())
+
+    def __setstate__(self, state):
+        for key, value in state.items():
+            setattr(self, key, value)
+
+    def copy(self):
+        return self.__class__(**dict(self.items()))
+
+    def to_dict(self):
+        """
+        Convert to the default dict output, recursively
+        """
+        return dict((key, to_dict(value)) for key, value in self.items())
+
+
+def to_dict(value):
+    """
+    Convert records(or lists and dicts of records) to plain dicts
+    """
+    if isinstance(value, Record):
+        return value.to_dict()
+
+    if isinstance(value, list):
+        return [to_dict(item) for item in value]
+
+    if isinstance(value, dict):
+        return dict((key, to_dict(item)) for key, item in value.items())
+
+    return value
+
+
+def _record_class(name, fields):
+    return type(name, (Record,), {
+        "__slots__": tuple(fields),
+        "_field_set": frozenset(fields)
+    })
+
+
+Volume = _record_class("Volume", [
+    "name", "uuid", "type", "status", "num_bricks", "distribute",
+    "replica", "disperse", "disperse_redundancy", "transport",
+    "snapshot_count", "bricks", "options", "subvols", "health",
+    "size_total", "size_free", "size_used", "inodes_total",
+    "inodes_free", "inodes_used"
+])
+
+Subvol = _record_class("Subvol", [
+    "name", "replica", "disperse", "disperse_redundancy", "type",
+    "bricks", "health"
+])
+
+Brick = _record_class("Brick", ["name", "uuid", "type"])
+
+BrickStatus = _record_class("BrickStatus", [
+    "name", "uuid", "type", "online", "ports", "pid", "size_total",
+    "size_free", "size_used", "inodes_total", "inodes_free",
+    "inodes_used", "device", "block_size", "mnt_options", "fs_name"
+])
+
+Peer = _record_class("Peer", ["uuid", "hostname", "connected"])
+
+GeorepPair = _record_class("GeorepPair", [
+    "primary_volume", "secondary_volume", "primary_node",
+    "primary_brick", "secondary_user", "secondary", "secondary_node",
+    "status", "crawl_status", "entry", "data", "meta", "failures",
+    "checkpoint_completed", "primary_node_uuid", "last_synced",
+    "checkpoint_time", "checkpoint_completion_time"
+])
+
+
+def volume_record(vol, brick_class=Brick):
+    """
+    Convert a parsed Volume dict to Volume record
+    """
+    value = dict(vol.items())
+    value["bricks"] = [brick_class(**dict(brick.items()))
+                       for brick in vol["bricks"]]
+    return Volume(**value)
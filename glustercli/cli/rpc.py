@@ -0,0 +1,576 @@
+# -*- coding: utf-8 -*-
+
+import os
+import socket
+import struct
+import threading
+
+from glustercli.cli.utils import GlusterCmdException
+from glustercli.cli.parsers import GlusterCmdOutputParseError
+from glustercli.cli.records import Peer
+
+# Default socket of glusterd's CLI listener
+GLUSTERD_SOCKET = "/var/run/glusterd.socket"
+DEFAULT_RPC_TIMEOUT = 120
+
+# ONC RPC(RFC 5531)
+RPC_VERSION = 2
+RPC_CALL = 0
+RPC_REPLY = 1
+MSG_ACCEPTED = 0
+MSG_DENIED = 1
+AUTH_NULL = 0
+ACCEPT_STATUS = {
+    1: "program unavailable",
+    2: "program version mismatch",
+    3: "procedure unavailable",
+    4: "garbage arguments",
+    5: "system error",
+}
+LAST_FRAGMENT = 0x80000000
+MAX_RECORD_SIZE = 256 * 1024 * 1024
+
+# from rpc/rpc-lib/src/protocol-common.h
+GLUSTER_CLI_PROGRAM = 1238463
+GLUSTER_CLI_VERSION = 2
+GLUSTER_CLI_LIST_FRIENDS = 3
+GLUSTER_CLI_GET_VOLUME = 5
+GLUSTER_CLI_STATUS_VOLUME = 27
+GLUSTER_CLI_LIST_VOLUME = 33
+
+# from rpc/xdr/src/cli1-xdr.x
+GF_CLI_LIST_PEERS = 1
+GF_CLI_LIST_POOL_NODES = 2
+GF_CLI_GET_VOLUME_ALL = 1
+GF_CLI_GET_VOLUME = 2
+GF_CLI_STATUS_DETAIL = 0x20
+GF_CLI_STATUS_VOL = 0x100
+
+# Volume type names as printed by the CLI, distributed variants are
+# at the type + GF_CLUSTER_TYPE_MAX - 1
+VOLUME_TYPES = ["Distribute", "Stripe", "Replicate", "Striped-Replicate",
+                "Disperse", "Tier", "Distributed-Stripe",
+                "Distributed-Replicate", "Distributed-Striped-Replicate",
+                "Distributed-Disperse"]
+GF_CLUSTER_TYPE_TIER = 5
+GF_CLUSTER_TYPE_MAX = 6
+VOLUME_STATUS = ["Created", "Started", "Stopped"]
+
+_UINT = struct.Struct(">I")
+_INT = struct.Struct(">i")
+_DICT_PAIR = struct.Struct(">II")
+
+
+def _pad(size):
+    return b"\x00" * ((4 - size % 4) % 4)
+
+
+def pack_opaque(data):
+    """
+    XDR variable length opaque
+    """
+    return _UINT.pack(len(data)) + data + _pad(len(data))
+
+
+class XdrUnpacker(object):
+    """
+    Reads XDR encoded values from a buffer without copying it
+    """
+    def __init__(self, data):
+        self.data = memoryview(data)
+        self.pos = 0
+
+    def _take(self, size):
+        if self.pos + size > len(self.data):
+            raise GlusterCmdException((-1, "", "Truncated RPC reply"))
+
+        out = self.data[self.pos:self.pos + size]
+        self.pos += size
+        return out
+
+    def unpack_uint(self):
+        return _UINT.unpack(self._take(4))[0]
+
+    def unpack_int(self):
+        return _INT.unpack(self._take(4))[0]
+
+    def unpack_opaque(self):
+        size = self.unpack_uint()
+        out = self._take(size)
+        self._take(len(_pad(size)))
+        return out
+
+    def unpack_string(self):
+        return bytes(self.unpack_opaque()).decode("utf-8", "replace")
+
+
+def serialize_dict(data):
+    """
+    Serialize a dict in glusterfs dict_serialize format. Values are
+    sent as NUL terminated strings, the way glusterd stores them.
+
+    :param data: Dict of key and str/int value
+    :returns: Serialized bytes
+    """
+    parts = [_UINT.pack(len(data))]
+    for key, value in data.items():
+        key = key.encode("utf-8")
+        value = "{0}".format(value).encode("utf-8") + b"\x00"
+        parts.append(_DICT_PAIR.pack(len(key), len(value)))
+        parts.append(key + b"\x00")
+        parts.append(value)
+
+    return b"".join(parts)
+
+
+def unserialize_dict(data):
+    """
+    Parse a dict serialized by glusterfs dict_serialize
+
+    :param data: Serialized bytes
+    :returns: Dict of key and str value, in serialized order
+    """
+    data = memoryview(data)
+    if not data:
+        return {}
+
+    out = {}
+    try:
+        count = _UINT.unpack_from(data, 0)[0]
+        pos = _UINT.size
+        for _ in range(count):
+            keylen, vallen = _DICT_PAIR.unpack_from(data, pos)
+            pos += _DICT_PAIR.size
+            key = bytes(data[pos:pos + keylen]).decode("utf-8", "replace")
+            pos += keylen + 1
+            value = bytes(data[pos:pos + vallen])
+            pos += vallen
+            out[key] = value.rstrip(b"\x00").decode("utf-8", "replace")
+    except struct.error:
+        raise GlusterCmdException((-1, "", "Truncated glusterd dict"))
+
+    return out
+
+
+def _volume_info_request(cmd):
+    volname = cmd[2] if len(cmd) > 2 else None
+    req = {"flags": GF_CLI_GET_VOLUME_ALL}
+    if volname is not None:
+        req = {"flags": GF_CLI_GET_VOLUME, "volname": volname}
+
+    return GLUSTER_CLI_GET_VOLUME, pack_opaque(serialize_dict(req))
+
+
+def _volume_status_request(cmd):
+    req = {"cmd": GF_CLI_STATUS_VOL | GF_CLI_STATUS_DETAIL,
+           "volname": cmd[2]}
+    return GLUSTER_CLI_STATUS_VOLUME, pack_opaque(serialize_dict(req))
+
+
+def _volume_list_request(_cmd):
+    return GLUSTER_CLI_LIST_VOLUME, pack_opaque(serialize_dict({}))
+
+
+def _peer_list_request(cmd):
+    flags = GF_CLI_LIST_POOL_NODES if cmd[0] == "pool" else \
+        GF_CLI_LIST_PEERS
+    return (GLUSTER_CLI_LIST_FRIENDS,
+            _INT.pack(flags) + pack_opaque(serialize_dict({})))
+
+
+def rpc_request(cmd):
+    """
+    Procedure and XDR encoded arguments of a gluster command. Only
+    the read only commands listed below are supported,
+    ["volume", "info"(, VOLNAME)], ["volume", "status", VOLNAME,
+    "detail"], ["volume", "list"], ["peer", "status"] and
+    ["pool", "list"].
+
+    :param cmd: Gluster command as list of arguments
+    :returns: (procedure number, arguments)
+    """
+    cmd = [arg for arg in cmd if arg != "--xml"]
+    if cmd[:2] == ["volume", "info"] and len(cmd) <= 3:
+        return _volume_info_request(cmd)
+
+    if cmd[:2] == ["volume", "status"] and len(cmd) == 4 and \
+       cmd[3] == "detail" and cmd[2] != "all":
+        return _volume_status_request(cmd)
+
+    if cmd == ["volume", "list"]:
+        return _volume_list_request(cmd)
+
+    if cmd in (["peer", "status"], ["pool", "list"]):
+        return _peer_list_request(cmd)
+
+    raise GlusterCmdException(
+        (-1, "", "Command not supported over RPC: {0}".format(
+            " ".join(cmd))))
+
+
+def _unpack_cli_reply(proc, body):
+    # gf_cli_rsp {int op_ret; int op_errno; string op_errstr<>;
+    # opaque dict<>} except for the peer list which is
+    # gf1_cli_peer_list_rsp {int op_ret; int op_errno; opaque friends<>}
+    unpacker = XdrUnpacker(body)
+    op_ret = unpacker.unpack_int()
+    unpacker.unpack_int()
+    op_errstr = ""
+    if proc != GLUSTER_CLI_LIST_FRIENDS:
+        op_errstr = unpacker.unpack_string()
+
+    return op_ret, bytes(unpacker.unpack_opaque()), op_errstr
+
+
+class RpcClient(object):
+    """
+    Client for glusterd's CLI RPC program over its unix socket, the
+    same interface the gluster binary uses. Connections are kept
+    open and reused, each one serves one request at a time.
+
+    :param path: glusterd socket path
+    :param timeout: Socket timeout in seconds
+    :param max_idle: Maximum number of idle connections kept open
+    """
+    def __init__(self, path=GLUSTERD_SOCKET, timeout=DEFAULT_RPC_TIMEOUT,
+                 max_idle=8):
+        self.path = path
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self._idle = []
+        self._lock = threading.Lock()
+        self._xid = (os.getpid() & 0xffff) << 16
+
+    def _next_xid(self):
+        with self._lock:
+            self._xid = (self._xid + 1) & 0xffffffff
+            return self._xid
+
+    def _connect(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.path)
+        except OSError:
+            sock.close()
+            raise
+
+        return sock, False
+
+    def _release(self, sock):
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(sock)
+                return
+
+        sock.close()
+
+    def close(self):
+        with self._lock:
+            idle = self._idle
+            self._idle = []
+
+        for sock in idle:
+            sock.close()
+
+    @staticmethod
+    def _recv_exact(sock, size):
+        buf = bytearray(size)
+        view = memoryview(buf)
+        pos = 0
+        while pos < size:
+            num = sock.recv_into(view[pos:])
+            if num == 0:
+                raise EOFError("glusterd closed the connection")
+            pos += num
+
+        return buf
+
+    def _recv_record(self, sock):
+        fragments = []
+        size = 0
+        while True:
+            header = _UINT.unpack(self._recv_exact(sock, 4))[0]
+            length = header & ~LAST_FRAGMENT
+            size += length
+            if size > MAX_RECORD_SIZE:
+                raise GlusterCmdException(
+                    (-1, "", "RPC reply is too large"))
+
+            fragments.append(self._recv_exact(sock, length))
+            if header & LAST_FRAGMENT:
+                break
+
+        if len(fragments) == 1:
+            return fragments[0]
+
+        return b"".join(fragments)
+
+    def _roundtrip(self, sock, xid, message):
+        sock.sendall(_UINT.pack(LAST_FRAGMENT | len(message)) + message)
+        while True:
+            reply = self._recv_record(sock)
+            if _UINT.unpack_from(reply, 0)[0] == xid:
+                return reply
+
+    def call(self, proc, args, program=GLUSTER_CLI_PROGRAM,
+             version=GLUSTER_CLI_VERSION):
+        """
+        Call a remote procedure, with AUTH_NULL credentials
+
+        :param proc: Procedure number
+        :param args: XDR encoded arguments
+        :returns: XDR encoded result, raises GlusterCmdException if
+         the call is not accepted by glusterd
+        """
+        xid = self._next_xid()
+        message = struct.pack(">10I", xid, RPC_CALL, RPC_VERSION, program,
+                              version, proc, AUTH_NULL, 0, AUTH_NULL, 0) + args
+
+        # A pooled connection may have been closed by glusterd while
+        # idle, retry once on a new connection. Only read only
+        # procedures are called, so a retry is safe.
+        for _ in range(2):
+            try:
+                sock, reused = self._connect()
+            except OSError as err:
+                raise GlusterCmdException((-1, "", "Connection failed to "
+                                           "{0}: {1}".format(self.path,
+                                                             err)))
+
+            try:
+                reply = self._roundtrip(sock, xid, message)
+            except (OSError, EOFError) as err:
+                sock.close()
+                if reused:
+                    # Other idle connections are likely stale too
+                    self.close()
+                    continue
+
+                raise GlusterCmdException((-1, "", "RPC to {0} failed: "
+                                           "{1}".format(self.path, err)))
+            except Exception:
+                sock.close()
+                raise
+
+            self._release(sock)
+            return self._accepted_result(reply)
+
+        raise GlusterCmdException(
+            (-1, "", "RPC to {0} failed".format(self.path)))
+
+    @staticmethod
+    def _accepted_result(reply):
+        unpacker = XdrUnpacker(reply)
+        unpacker.unpack_uint()
+        if unpacker.unpack_uint() != RPC_REPLY:
+            raise GlusterCmdException((-1, "", "Invalid RPC reply"))
+
+        if unpacker.unpack_uint() == MSG_DENIED:
+            raise GlusterCmdException((-1, "", "RPC call denied"))
+
+        # Verifier
+        unpacker.unpack_uint()
+        unpacker.unpack_opaque()
+        status = unpacker.unpack_uint()
+        if status != 0:
+            raise GlusterCmdException((-1, "", "RPC call failed: {0}".format(
+                ACCEPT_STATUS.get(status, status))))
+
+        return unpacker.data[unpacker.pos:]
+
+    def execute(self, cmd):
+        """
+        Run a supported read only gluster command over RPC
+
+        :param cmd: Gluster command as list of arguments, see
+         rpc_request
+        :returns: (op_ret, serialized reply dict, op_errstr)
+        """
+        proc, args = rpc_request(cmd)
+        return _unpack_cli_reply(proc, self.call(proc, args))
+
+
+def _int(data, key, default=0):
+    try:
+        return int(data.get(key, default))
+    except ValueError:
+        return default
+
+
+def _volume_type(data, prefix):
+    vol_type = _int(data, prefix + "type")
+    if vol_type != GF_CLUSTER_TYPE_TIER and vol_type > 0 and \
+       _int(data, prefix + "dist_count") < _int(data, prefix + "brick_count"):
+        vol_type += GF_CLUSTER_TYPE_MAX - 1
+
+    if 0 <= vol_type < len(VOLUME_TYPES):
+        return VOLUME_TYPES[vol_type]
+
+    return "Unknown"
+
+
+def _volume_options(data):
+    """
+    Options of all the Volumes in one pass over the reply
+
+    :returns: Dict of Volume prefix("volumeN.") => list of options
+    """
+    options = {}
+    for key, opt_value in data.items():
+        vol_key, _, name = key.partition(".")
+        if vol_key.startswith("volume") and name.startswith("option."):
+            options.setdefault(vol_key + ".", []).append({
+                "name": name[len("option."):], "value": opt_value})
+
+    return options
+
+
+def _parse_a_vol_dict(data, prefix, options):
+    status = _int(data, prefix + "status", -1)
+    transport = data.get(prefix + "transport", "0")
+    value = {
+        'name': data[prefix + "name"],
+        'uuid': data[prefix + "volume_id"],
+        'type': _volume_type(data, prefix).upper().replace('-', '_'),
+        'status': VOLUME_STATUS[status] if 0 <= status < 3 else "Unknown",
+        'num_bricks': int(data[prefix + "brick_count"]),
+        'distribute': int(data[prefix + "dist_count"]),
+        'replica': _int(data, prefix + "replica_count", 1),
+        'disperse': _int(data, prefix + "disperse_count"),
+        'disperse_redundancy': _int(data, prefix + "redundancy_count"),
+        'transport': {"0": "TCP", "1": "RDMA"}.get(transport, "TCP,RDMA"),
+        'snapshot_count': _int(data, prefix + "snap_count"),
+        'bricks': [],
+        'options': options.get(prefix, [])
+    }
+
+    for bidx in range(1, value['num_bricks'] + 1):
+        brick_prefix = "{0}brick{1}".format(prefix, bidx)
+        brick_type = "Brick"
+        if data.get(brick_prefix + ".isArbiter") == "1":
+            brick_type = "Arbiter"
+
+        value['bricks'].append({
+            "name": data[brick_prefix],
+            "uuid": data.get(brick_prefix + ".uuid"),
+            "type": brick_type
+        })
+
+    return value
+
+
+def parse_volume_info_dict(reply):
+    """
+    Parse the reply of GET_VOLUME, same output as parse_volume_info
+
+    :param reply: Serialized reply dict
+    :returns: List of Volumes
+    """
+    data = unserialize_dict(reply)
+    volumes = []
+    options = _volume_options(data)
+    try:
+        for vidx in range(_int(data, "count")):
+            volumes.append(_parse_a_vol_dict(
+                data, "volume{0}.".format(vidx), options))
+    except (KeyError, ValueError) as err:
+        raise GlusterCmdOutputParseError(err)
+
+    return volumes
+
+
+def _parse_a_node_dict(data, prefix):
+    name = data[prefix + "hostname"] + ":" + data[prefix + "path"]
+    online = data.get(prefix + "status") == "1"
+    if not online:
+        return {'name': name, 'online': online}
+
+    value = {
+        'name': name,
+        'uuid': data[prefix + "peerid"],
+        'online': online,
+        'pid': data[prefix + "pid"],
+        'size_total': int(data[prefix + "total"]),
+        'size_free': int(data[prefix + "free"]),
+        'inodes_total': _int(data, prefix + "total_inodes"),
+        'inodes_free': _int(data, prefix + "free_inodes"),
+        'device': data.get(prefix + "device"),
+        'block_size': data.get(prefix + "block_size"),
+        'mnt_options': data.get(prefix + "mnt_options"),
+        'fs_name': data.get(prefix + "fs_name"),
+    }
+    value['size_used'] = value['size_total'] - value['size_free']
+    value['inodes_used'] = value['inodes_total'] - value['inodes_free']
+
+    ports = {}
+    for name, key in (("tcp", "port"), ("rdma", "rdma_port")):
+        port = data.get(prefix + key, "0")
+        ports[name] = "N/A" if port == "0" else port
+    value['ports'] = ports
+
+    return value
+
+
+def parse_volume_status_dict(reply):
+    """
+    Parse the reply of STATUS_VOLUME(detail), same output as the
+    nodes parsed from the volume status XML
+
+    :param reply: Serialized reply dict
+    :returns: List of nodes(bricks)
+    """
+    data = unserialize_dict(reply)
+    nodes = []
+    try:
+        for bidx in range(_int(data, "count")):
+            prefix = "brick{0}.".format(bidx)
+            if prefix + "path" in data:
+                nodes.append(_parse_a_node_dict(data, prefix))
+    except (KeyError, ValueError) as err:
+        raise GlusterCmdOutputParseError(err)
+
+    return nodes
+
+
+def parse_volume_list_dict(reply):
+    """
+    Parse the reply of LIST_VOLUME, same output as parse_volume_list
+
+    :param reply: Serialized reply dict
+    :returns: List of Volume names
+    """
+    data = unserialize_dict(reply)
+    return [data["volume{0}".format(vidx)]
+            for vidx in range(_int(data, "count"))]
+
+
+def parse_peer_list_dict(reply, records=False):
+    """
+    Parse the reply of LIST_FRIENDS, same output as parse_peer_status
+
+    :param reply: Serialized friends dict
+    :param records: Return compact Peer records instead of dicts
+    :returns: List of Peers
+    """
+    data = unserialize_dict(reply)
+    peers = []
+    try:
+        for pidx in range(1, _int(data, "count") + 1):
+            prefix = "friend{0}.".format(pidx)
+            connected = data[prefix + "connected"]
+            peer = {
+                "uuid": data[prefix + "uuid"],
+                "hostname": data[prefix + "hostname"],
+                "connected": {"0": "Disconnected",
+                              "1": "Connected"}.get(connected, connected)
+            }
+            peers.append(Peer(**peer) if records else peer)
+    except KeyError as err:
+        raise GlusterCmdOutputParseError(err)
+
+    return peers
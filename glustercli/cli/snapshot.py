@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 
-from glustercli.cli.utils import snapshot_execute, snapshot_execute_xml
+from glustercli.cli.utils import snapshot_execute, snapshot_execute_xml, \
+    snapshot_execute_xml_async, parse_output
 from glustercli.cli.parsers import (parse_snapshot_status,
                                     parse_snapshot_info,
                                     parse_snapshot_list)
@@ -111,7 +112,27 @@ def info(snapname=None, volname=None):
     if volname is not None and snapname is None:
         cmd += ["volume", volname]
 
-    return parse_snapshot_info(snapshot_execute_xml(cmd))
+    return parse_output(cmd, parse_snapshot_info, snapshot_execute_xml(cmd))
+
+
+async def info_async(snapname=None, volname=None):
+    """
+    Snapshot Info, asyncio variant of info
+
+    :param snapname: Snapshot Name
+    :param volname: Volume Name
+    :returns: Snapshot Info, raises
+     GlusterCmdException((rc, out, err)) on error
+    """
+    cmd = ["info"]
+    if snapname is not None:
+        cmd += [snapname]
+
+    if volname is not None and snapname is None:
+        cmd += ["volume", volname]
+
+    return parse_output(cmd, parse_snapshot_info,
+                        await snapshot_execute_xml_async(cmd))
 
 
 def snaplist(volname=None):
@@ -127,7 +148,24 @@ def snaplist(volname=None):
     if volname is not None:
         cmd += [volname]
 
-    return parse_snapshot_list(snapshot_execute_xml(cmd))
+    return parse_output(cmd, parse_snapshot_list, snapshot_execute_xml(cmd))
+
+
+async def snaplist_async(volname=None):
+    """
+    List of Snapshots, asyncio variant of snaplist
+
+    :param volname: Volume Name
+    :returns: Output of the command, raises
+     GlusterCmdException((rc, out, err)) on error
+    """
+    cmd = ["list"]
+
+    if volname is not None:
+        cmd += [volname]
+
+    return parse_output(cmd, parse_snapshot_list,
+                        await snapshot_execute_xml_async(cmd))
 
 
 def restore(snapname):
@@ -158,7 +196,7 @@ def status(snapname=None, volname=None):
     if volname is not None and snapname is None:
         cmd += ["volume", volname]
 
-    return parse_snapshot_status(snapshot_execute_xml(cmd))
+    return parse_output(cmd, parse_snapshot_status, snapshot_execute_xml(cmd))
 
 
 def config(volname, snap_max_hard_limit=None,
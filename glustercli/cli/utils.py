@@ -1,60 +1,755 @@
 # -*- coding: utf-8 -*-
 
 import subprocess
-import xml.etree.cElementTree as ET
+import sys
+import threading
+import contextvars
+import time
+from collections import deque
 from contextlib import contextmanager
 from enum import IntEnum
 
+from glustercli.cli.cache import VolumeInfoCache, volinfo_cache
+
 GLUSTERCMD = "gluster"
 GLUSTERD_SOCKET = None
-ssh = None
 SSH_HOST = None
 SSH_PEM_FILE = None
-prev_ssh_host = None
-prev_ssh_pem_file = None
+SSH_USER = "root"
+
+# Transport of the read only commands which have an RPC equivalent
+# (volume info, volume status, volume list, peer status, pool list).
+# Other commands always run the gluster binary.
+TRANSPORT_CLI = "cli"
+TRANSPORT_RPC = "rpc"
+TRANSPORTS = (TRANSPORT_CLI, TRANSPORT_RPC)
+TRANSPORT = TRANSPORT_CLI
+
+LANE_READ = "read"
+LANE_WRITE = "write"
+DEFAULT_READ_CONCURRENCY = 8
+DEFAULT_WRITE_CONCURRENCY = 1
+
+# Sub commands which only query glusterd. A command is routed to the
+# read lane only if it has one of these and none of the mutating
+# actions below, anything else is treated as mutating.
+READ_ONLY_ACTIONS = set(["info", "status", "list", "get", "--version"])
+MUTATING_ACTIONS = set([
+    "set", "reset", "start", "stop", "create", "delete", "clear",
+    "enable", "disable", "probe", "detach", "restore", "activate",
+    "deactivate", "clone", "sync", "split-brain", "full", "commit",
+    "pause", "resume", "rotate", "clear-locks", "barrier", "add-brick",
+    "remove-brick", "replace-brick", "limit-usage", "limit-objects",
+    "remove-path", "remove-objects", "execute", "config"
+])
 
 
 @contextmanager
 def ssh_connection(hostname, pem_file):
-    global SSH_HOST, SSH_PEM_FILE
-    SSH_HOST = hostname
-    SSH_PEM_FILE = pem_file
-    yield
-    SSH_HOST = None
-    SSH_PEM_FILE = None
+    """
+    Run the gluster commands issued inside this context on the
+    remote host. Only the current thread or asyncio task is
+    affected.
+    """
+    client = current_client().derive(ssh_host=hostname,
+                                     ssh_pem_file=pem_file)
+    with client.activate():
+        yield
 
 
-def execute(cmd):
-    global prev_ssh_host, prev_ssh_pem_file
+def command_lane(cmd):
+    """
+    Classify a gluster command as read only or mutating
 
-    cmd_args = []
-    cmd_args.append(GLUSTERCMD)
+    :param cmd: Gluster command as list of arguments
+    :returns: LANE_READ or LANE_WRITE
+    """
+    args = set(cmd)
+    if args & READ_ONLY_ACTIONS and not args & MUTATING_ACTIONS:
+        return LANE_READ
 
-    if GLUSTERD_SOCKET:
-        cmd_args.append("--glusterd-sock={0}".format(GLUSTERD_SOCKET))
+    return LANE_WRITE
 
-    cmd_args.append("--mode=script")
-    cmd_args += cmd
 
-    if SSH_HOST is not None and SSH_PEM_FILE is not None:
-        # Reconnect only if first time or previously connected to different
-        # host or using different pem key
-        if ssh is None or prev_ssh_host != SSH_HOST \
-           or prev_ssh_pem_file != SSH_PEM_FILE:
-            __connect_ssh()
-            prev_ssh_host = SSH_HOST
-            prev_ssh_pem_file = SSH_PEM_FILE
+# Sub commands which have their own actions, family of
+# "volume heal gv1 info" is "volume heal info"
+NESTED_SUBCOMMANDS = set(["heal", "quota", "geo-replication", "profile",
+                          "rebalance", "bitrot", "tier", "top",
+                          "remove-brick", "barrier", "log"])
 
-        cmd_args = " ".join(cmd_args)
-        _, stdout, stderr = ssh.exec_command(cmd_args)
-        returncode = stdout.channel.recv_exit_status()
-        return (returncode, stdout.read().strip(), stderr.read().strip())
+_observers = ()
+_observers_lock = threading.Lock()
 
-    proc = subprocess.Popen(cmd_args, stdout=subprocess.PIPE,
-                            stderr=subprocess.PIPE,
-                            universal_newlines=True)
-    out, err = proc.communicate()
-    return (proc.returncode, out, err)
+
+def command_family(cmd):
+    """
+    Name of the command without the Volume names, paths and options,
+    for example "volume info", "volume heal info" or "peer status"
+
+    :param cmd: Gluster command as list of arguments
+    :returns: Command family
+    """
+    words = [word for word in cmd if not word.startswith("-")]
+    if not words:
+        return "version" if "--version" in cmd else "unknown"
+
+    if words[0] not in ("volume", "snapshot", "peer", "pool", "system::",
+                        "nfs-ganesha") or len(words) == 1:
+        return words[0]
+
+    family = [words[0], words[1]]
+    if words[1] in NESTED_SUBCOMMANDS:
+        for word in words[2:]:
+            if word in READ_ONLY_ACTIONS or word in MUTATING_ACTIONS:
+                family.append(word)
+                break
+
+    return " ".join(family)
+
+
+def add_execute_observer(observer):
+    """
+    Register an observer called for every gluster command executed and
+    every command output parsed, in the calling thread. Observer is
+    called with a dict, command events have
+    {"event": "command", "family", "cmd", "lane", "queue_time",
+    "wall_time", "returncode", "stdout_size"}(returncode is None if the
+    command raised, stdout_size is None for streamed output) and parse
+    events have
+    {"event": "parse", "family", "parser", "parse_time", "error"}.
+    Exceptions raised by observers are ignored.
+
+    :param observer: Callable accepting the event dict
+    """
+    global _observers
+
+    with _observers_lock:
+        _observers = _observers + (observer,)
+
+
+def remove_execute_observer(observer):
+    """
+    Unregister an observer added with add_execute_observer
+
+    :param observer: Observer to remove
+    """
+    global _observers
+
+    with _observers_lock:
+        _observers = tuple(obs for obs in _observers if obs is not observer)
+
+
+def _notify(event):
+    for observer in _observers:
+        try:
+            observer(event)
+        except Exception:  # noqa # pylint: disable=broad-except
+            pass
+
+
+def _notify_command(cmd, lane, queue_time, wall_time, returncode,
+                    stdout_size):
+    if not _observers:
+        return
+
+    _notify({
+        "event": "command",
+        "family": command_family(cmd),
+        "cmd": list(cmd),
+        "lane": lane,
+        "queue_time": queue_time,
+        "wall_time": wall_time,
+        "returncode": returncode,
+        "stdout_size": stdout_size
+    })
+
+
+def parse_output(cmd, parser, *args, **kwargs):
+    """
+    Call the parser with the given arguments, reporting the parse
+    time to the observers
+
+    :param cmd: Gluster command whose output is parsed
+    :param parser: Parser function
+    :returns: Parser's return value
+    """
+    if not _observers:
+        return parser(*args, **kwargs)
+
+    started_at = time.monotonic()
+    error = True
+    try:
+        out = parser(*args, **kwargs)
+        error = False
+        return out
+    finally:
+        _notify({
+            "event": "parse",
+            "family": command_family(cmd),
+            "parser": parser.__name__,
+            "parse_time": time.monotonic() - started_at,
+            "error": error
+        })
+
+
+# Upper bounds(seconds) of the latency histogram buckets
+LATENCY_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+                   0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0]
+
+
+class LatencyHistogram(object):
+    """
+    Counts of observations per latency bucket, last count is of the
+    observations above the largest bucket
+    """
+    def __init__(self, buckets=None):
+        self.buckets = list(buckets or LATENCY_BUCKETS)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        idx = 0
+        while idx < len(self.buckets) and value > self.buckets[idx]:
+            idx += 1
+        self.counts[idx] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def quantile(self, fraction):
+        """
+        Upper bound of the bucket containing the given quantile
+        """
+        if not self.count:
+            return 0.0
+
+        rank = fraction * self.count
+        seen = 0
+        for idx, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self.buckets[idx] if idx < len(self.buckets) \
+                    else self.max
+
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "total": self.total,
+            "avg": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+            "buckets": list(zip(self.buckets + [float("inf")],
+                                self.counts))
+        }
+
+
+class CommandStats(object):
+    """
+    In-memory aggregator of command and parse events per command
+    family, register with add_execute_observer(stats)
+    """
+    def __init__(self, buckets=None):
+        self.buckets = buckets
+        self._families = {}
+        self._lock = threading.Lock()
+
+    def _family(self, name):
+        family = self._families.get(name, None)
+        if family is None:
+            family = {
+                "calls": 0,
+                "errors": 0,
+                "parse_errors": 0,
+                "stdout_bytes": 0,
+                "wall_time": LatencyHistogram(self.buckets),
+                "queue_time": LatencyHistogram(self.buckets),
+                "parse_time": LatencyHistogram(self.buckets)
+            }
+            self._families[name] = family
+
+        return family
+
+    def __call__(self, event):
+        with self._lock:
+            family = self._family(event["family"])
+            if event["event"] == "parse":
+                family["parse_time"].observe(event["parse_time"])
+                if event["error"]:
+                    family["parse_errors"] += 1
+                return
+
+            family["calls"] += 1
+            family["wall_time"].observe(event["wall_time"])
+            family["queue_time"].observe(event["queue_time"])
+            if event["returncode"] != 0:
+                family["errors"] += 1
+            if event["stdout_size"] is not None:
+                family["stdout_bytes"] += event["stdout_size"]
+
+    def stats(self):
+        """
+        Stats of each command family, sorted by the total wall time
+
+        :returns: List of dicts with family, calls, errors,
+         parse_errors, stdout_bytes and wall_time, queue_time and
+         parse_time histograms
+        """
+        with self._lock:
+            out = []
+            for name, family in self._families.items():
+                value = {"family": name}
+                for key, val in family.items():
+                    value[key] = val.to_dict() \
+                        if isinstance(val, LatencyHistogram) else val
+                out.append(value)
+
+        out.sort(key=lambda value: value["wall_time"]["total"],
+                 reverse=True)
+        return out
+
+    def reset(self):
+        with self._lock:
+            self._families.clear()
+
+
+def _wake_future(fut):
+    if not fut.done():
+        fut.set_result(None)
+
+
+def _in_event_loop():
+    # True if the calling thread runs an asyncio event loop. A sync
+    # caller blocking there would also block the async callers it
+    # waits for, asyncio is not loaded if no loop is running
+    asyncio = sys.modules.get("asyncio", None)
+    if asyncio is None:
+        return False
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+
+    return True
+
+
+class _Lane(object):
+    """
+    FIFO concurrency limiter shared by threads and asyncio tasks.
+    A released slot is handed over to the oldest waiter, so waiters
+    are served in the order they arrived. A sync acquire from a
+    thread running an event loop does not wait, it takes a slot over
+    the limit, since the slot holders may be tasks of the same loop
+    which can not progress while it is blocked.
+    """
+    def __init__(self, name, limit):
+        self.name = name
+        self.limit = limit
+        self.active = 0
+        self._lock = threading.Lock()
+        self._waiters = deque()
+        self.calls = 0
+        self.errors = 0
+        self.max_queued = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.run_time_total = 0.0
+        self.run_time_min = None
+        self.run_time_max = 0.0
+
+    def _acquire_now(self):
+        # Caller must hold the lock
+        if self._waiters:
+            return False
+
+        if self.limit is None or self.active < self.limit:
+            self.active += 1
+            return True
+
+        return False
+
+    def _enqueue(self, waker):
+        # Caller must hold the lock
+        self._waiters.append(waker)
+        if len(self._waiters) > self.max_queued:
+            self.max_queued = len(self._waiters)
+
+    def acquire(self):
+        with self._lock:
+            if self._acquire_now():
+                return
+
+            if _in_event_loop():
+                self.active += 1
+                return
+
+            event = threading.Event()
+            self._enqueue(event.set)
+
+        event.wait()
+
+    async def acquire_async(self):
+        import asyncio  # noqa # pylint: disable=import-outside-toplevel
+
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+
+        def waker():
+            loop.call_soon_threadsafe(_wake_future, fut)
+
+        with self._lock:
+            if self._acquire_now():
+                return
+            self._enqueue(waker)
+
+        try:
+            await fut
+        except asyncio.CancelledError:
+            with self._lock:
+                try:
+                    self._waiters.remove(waker)
+                    handed_over = False
+                except ValueError:
+                    handed_over = True
+            # Slot was already handed to this waiter, pass it on
+            if handed_over:
+                self.release()
+            raise
+
+    def release(self):
+        with self._lock:
+            # Slot is handed over, active count is unchanged. Not if
+            # the limit was lowered below the active count
+            if self._waiters and (self.limit is None or
+                                  self.active <= self.limit):
+                waker = self._waiters.popleft()
+            else:
+                waker = None
+                self.active -= 1
+
+        if waker is not None:
+            waker()
+
+    def set_limit(self, limit):
+        """
+        Change the limit, if raised the queued waiters are woken up
+        to use the new slots
+        """
+        wakers = []
+        with self._lock:
+            self.limit = limit
+            while self._waiters and (limit is None or self.active < limit):
+                wakers.append(self._waiters.popleft())
+                self.active += 1
+
+        for waker in wakers:
+            waker()
+
+    def record(self, wait_time, run_time, failed):
+        with self._lock:
+            self.calls += 1
+            if failed:
+                self.errors += 1
+            self.wait_time_total += wait_time
+            self.wait_time_max = max(self.wait_time_max, wait_time)
+            self.run_time_total += run_time
+            self.run_time_max = max(self.run_time_max, run_time)
+            if self.run_time_min is None or run_time < self.run_time_min:
+                self.run_time_min = run_time
+
+    def stats(self):
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "active": self.active,
+                "queued": len(self._waiters),
+                "max_queued": self.max_queued,
+                "calls": self.calls,
+                "errors": self.errors,
+                "wait_time_total": self.wait_time_total,
+                "wait_time_max": self.wait_time_max,
+                "wait_time_avg": (self.wait_time_total / self.calls
+                                  if self.calls else 0.0),
+                "run_time_total": self.run_time_total,
+                "run_time_min": self.run_time_min or 0.0,
+                "run_time_max": self.run_time_max,
+                "run_time_avg": (self.run_time_total / self.calls
+                                 if self.calls else 0.0),
+            }
+
+
+class _Flight(object):
+    __slots__ = ("result", "error", "wakers")
+
+    def __init__(self):
+        self.result = None
+        self.error = None
+        self.wakers = []
+
+
+class _Abandoned(Exception):
+    """
+    Leader of a flight was interrupted(KeyboardInterrupt, asyncio
+    cancellation), waiters retry instead of failing
+    """
+
+
+class SingleFlight(object):
+    """
+    Coalesces concurrent calls with the same key, the first caller
+    runs the function and the callers arriving while it is running
+    wait for and share its result(or exception). Works across threads
+    and asyncio tasks. Sync calls from a thread running an event loop
+    are not coalesced, the leader may be a task of the same loop
+    which can not progress while the call waits.
+    """
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.shared = 0
+
+    def _join(self, key, waker):
+        with self._lock:
+            flight = self._flights.get(key, None)
+            if flight is None:
+                flight = _Flight()
+                self._flights[key] = flight
+                self.calls += 1
+                return flight, True
+
+            flight.wakers.append(waker)
+            self.shared += 1
+            return flight, False
+
+    def _finish(self, key, flight, result, error):
+        with self._lock:
+            if self._flights.get(key, None) is flight:
+                del self._flights[key]
+            flight.result = result
+            flight.error = error
+            wakers = flight.wakers
+            flight.wakers = []
+
+        for waker in wakers:
+            waker()
+
+        return len(wakers) > 0
+
+    def do(self, key, func):
+        """
+        Run func or wait for the in-flight call with the same key
+
+        :returns: (result, shared), shared is True if the result is
+         also returned to other callers
+        """
+        if _in_event_loop():
+            return func(), False
+
+        while True:
+            event = threading.Event()
+            flight, leader = self._join(key, event.set)
+            if leader:
+                try:
+                    result = func()
+                except Exception as err:
+                    self._finish(key, flight, None, err)
+                    raise
+                except BaseException:
+                    self._finish(key, flight, None, _Abandoned())
+                    raise
+
+                return result, self._finish(key, flight, result, None)
+
+            event.wait()
+            if isinstance(flight.error, _Abandoned):
+                continue
+
+            if flight.error is not None:
+                raise flight.error
+
+            return flight.result, True
+
+    async def do_async(self, key, func):
+        """
+        Asyncio variant of do, func is a coroutine function
+        """
+        import asyncio  # noqa # pylint: disable=import-outside-toplevel
+
+        loop = asyncio.get_running_loop()
+        while True:
+            fut = loop.create_future()
+
+            def waker(fut=fut):
+                loop.call_soon_threadsafe(_wake_future, fut)
+
+            flight, leader = self._join(key, waker)
+            if leader:
+                try:
+                    result = await func()
+                except Exception as err:
+                    self._finish(key, flight, None, err)
+                    raise
+                except BaseException:
+                    self._finish(key, flight, None, _Abandoned())
+                    raise
+
+                return result, self._finish(key, flight, result, None)
+
+            try:
+                await fut
+            except asyncio.CancelledError:
+                with self._lock:
+                    if waker in flight.wakers:
+                        flight.wakers.remove(waker)
+                raise
+
+            if isinstance(flight.error, _Abandoned):
+                continue
+
+            if flight.error is not None:
+                raise flight.error
+
+            return flight.result, True
+
+    def stats(self):
+        with self._lock:
+            return {"calls": self.calls, "shared": self.shared,
+                    "in_flight": len(self._flights)}
+
+
+class CommandScheduler(object):
+    """
+    Routes gluster commands through separate concurrency lanes for
+    read only and mutating commands so that parallel collectors do
+    not trip glusterd's transaction lock. Limit of None means
+    unlimited.
+    """
+    def __init__(self, read_limit=DEFAULT_READ_CONCURRENCY,
+                 write_limit=DEFAULT_WRITE_CONCURRENCY):
+        self.lanes = {
+            LANE_READ: _Lane(LANE_READ, read_limit),
+            LANE_WRITE: _Lane(LANE_WRITE, write_limit),
+        }
+
+    def set_limits(self, read_limit=None, write_limit=None):
+        if read_limit is not None:
+            self.lanes[LANE_READ].set_limit(read_limit)
+
+        if write_limit is not None:
+            self.lanes[LANE_WRITE].set_limit(write_limit)
+
+    def run(self, cmd, func):
+        lane = self.lanes[command_lane(cmd)]
+        queued_at = time.monotonic()
+        lane.acquire()
+        started_at = time.monotonic()
+        failed = True
+        ret = None
+        try:
+            ret = func(cmd)
+            failed = ret[0] != 0
+            return ret
+        finally:
+            lane.release()
+            finished_at = time.monotonic()
+            lane.record(started_at - queued_at,
+                        finished_at - started_at, failed)
+            _notify_command(cmd, lane.name, started_at - queued_at,
+                            finished_at - started_at,
+                            None if ret is None else ret[0],
+                            None if ret is None else len(ret[1]))
+
+    @contextmanager
+    def slot(self, cmd):
+        """
+        Hold a lane slot for the duration of the context, used when
+        the command output is consumed incrementally
+        """
+        lane = self.lanes[command_lane(cmd)]
+        queued_at = time.monotonic()
+        lane.acquire()
+        started_at = time.monotonic()
+        failed = True
+        try:
+            yield
+            failed = False
+        finally:
+            lane.release()
+            finished_at = time.monotonic()
+            lane.record(started_at - queued_at,
+                        finished_at - started_at, failed)
+            # Output is consumed incrementally, size is not known
+            _notify_command(cmd, lane.name, started_at - queued_at,
+                            finished_at - started_at,
+                            None if failed else 0, None)
+
+    async def run_async(self, cmd, func):
+        lane = self.lanes[command_lane(cmd)]
+        queued_at = time.monotonic()
+        await lane.acquire_async()
+        started_at = time.monotonic()
+        failed = True
+        ret = None
+        try:
+            ret = await func(cmd)
+            failed = ret[0] != 0
+            return ret
+        finally:
+            lane.release()
+            finished_at = time.monotonic()
+            lane.record(started_at - queued_at,
+                        finished_at - started_at, failed)
+            _notify_command(cmd, lane.name, started_at - queued_at,
+                            finished_at - started_at,
+                            None if ret is None else ret[0],
+                            None if ret is None else len(ret[1]))
+
+    def stats(self):
+        return dict((name, lane.stats()) for name, lane in self.lanes.items())
+
+
+scheduler = CommandScheduler()
+
+
+def set_concurrency_limits(read_limit=None, write_limit=None):
+    """
+    Set the maximum number of gluster commands run concurrently.
+    Raising a limit starts the queued commands right away, a lowered
+    limit applies as the running commands finish.
+
+    :param read_limit: Limit for read only commands(info, status, list)
+    :param write_limit: Limit for mutating commands(set, start, stop)
+    """
+    current_client().scheduler.set_limits(read_limit, write_limit)
+
+
+def scheduler_stats():
+    """
+    Queueing and latency stats of each lane of the command scheduler
+
+    :returns: Dict with lane name as key and stats as value
+    """
+    return current_client().scheduler.stats()
+
+
+def execute(cmd):
+    return current_client().execute(cmd)
+
+
+async def execute_async(cmd):
+    """
+    Asyncio variant of execute, runs the gluster command without
+    blocking the event loop. Remote(SSH) execution is delegated to
+    the default executor since paramiko is blocking.
+    """
+    return await current_client().execute_async(cmd)
 
 
 class RebalanceOperationType(IntEnum):
@@ -95,27 +790,288 @@ def set_ssh_pem_file(pem_file):
     global USE_SSH, SSH_PEM_FILE
     USE_SSH = True
     SSH_PEM_FILE = pem_file
+    volinfo_cache.invalidate()
 
 
 def set_ssh_host(hostname):
     global SSH_HOST
     SSH_HOST = hostname
+    # Cached Volume info belongs to the previous cluster
+    volinfo_cache.invalidate()
 
 
-def __connect_ssh():
-    global ssh
+def set_ssh_user(username):
+    global SSH_USER
+    SSH_USER = username
 
-    import paramiko  # noqa # pylint: disable=import-outside-toplevel
 
-    if ssh is None:
-        ssh = paramiko.SSHClient()
+class _SSHConnection(object):
+    def __init__(self, key, client, max_channels):
+        self.key = key
+        self.client = client
+        self.in_use = 0
+        self.last_used = time.monotonic()
+        self.channels = threading.BoundedSemaphore(max_channels)
+
+    def is_healthy(self, keepalive):
+        transport = self.client.get_transport()
+        if transport is None or not transport.is_active() \
+           or not transport.is_authenticated():
+            return False
+
+        # Probe the connections which were idle longer than the
+        # keepalive interval, dead peers are detected on send
+        if time.monotonic() - self.last_used > keepalive:
+            try:
+                transport.send_ignore()
+            except Exception:  # noqa # pylint: disable=broad-except
+                return False
+
+        return True
+
+    def close(self):
         try:
-            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            ssh.connect(SSH_HOST, username="root", key_filename=SSH_PEM_FILE)
-        except paramiko.ssh_exception.AuthenticationException as err:
+            self.client.close()
+        except Exception:  # noqa # pylint: disable=broad-except
+            pass
+
+
+class SSHConnectionPool(object):
+    """
+    Pool of SSH connections keyed by (host, user, pem_file).
+    A connection is shared by all the callers of the same key and
+    each command runs in its own channel over the same transport,
+    at most max_channels at a time. Connections unused for
+    idle_timeout seconds are closed on the next acquire or release.
+    max_size is a soft limit, idle connections are evicted in LRU
+    order to make room but busy ones are never closed.
+    """
+    def __init__(self, max_size=32, idle_timeout=300, keepalive=30,
+                 max_channels=8):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.keepalive = keepalive
+        self.max_channels = max_channels
+        self._conns = {}
+        self._connect_locks = {}
+        self._lock = threading.Lock()
+
+    def _connect(self, key):
+        import paramiko  # noqa # pylint: disable=import-outside-toplevel
+
+        host, user, pem_file = key
+        client = paramiko.SSHClient()
+        try:
+            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            client.connect(host, username=user, key_filename=pem_file)
+        except (paramiko.ssh_exception.SSHException, OSError) as err:
+            client.close()
             raise GlusterCmdException("Unable to establish SSH connection "
-                                      "to root@{0}:\n{1}".format(
-                                          SSH_HOST, err))
+                                      "to {0}@{1}:\n{2}".format(
+                                          user, host, err))
+
+        transport = client.get_transport()
+        if self.keepalive:
+            transport.set_keepalive(self.keepalive)
+
+        return _SSHConnection(key, client, self.max_channels)
+
+    def _pop_idle(self, reserve=0):
+        # Caller must hold the lock, returns connections to close.
+        # reserve is the number of connections about to be added
+        now = time.monotonic()
+        idle = [conn for conn in self._conns.values()
+                if conn.in_use == 0 and
+                now - conn.last_used > self.idle_timeout]
+
+        # Evict least recently used idle connections if pool is full
+        lru = sorted([conn for conn in self._conns.values()
+                      if conn.in_use == 0 and conn not in idle],
+                     key=lambda conn: conn.last_used)
+        excess = len(self._conns) - len(idle) - self.max_size + reserve
+        if excess > 0:
+            idle += lru[:excess]
+
+        for conn in idle:
+            del self._conns[conn.key]
+
+        return idle
+
+    def acquire(self, host, user, pem_file):
+        key = (host, user, pem_file)
+        with self._lock:
+            connect_lock = self._connect_locks.setdefault(
+                key, threading.Lock())
+
+        # Only one connect per key at a time, others reuse it
+        with connect_lock:
+            with self._lock:
+                evicted = self._pop_idle()
+                conn = self._conns.get(key, None)
+                # Idle connection needs a health check, reserve it so
+                # that it is not evicted while probing
+                probe = conn is not None and conn.in_use == 0
+                if conn is not None:
+                    conn.in_use += 1
+
+            for old_conn in evicted:
+                old_conn.close()
+
+            # The probe may block on a slow host, run it without
+            # holding the pool lock
+            if probe and not conn.is_healthy(self.keepalive):
+                self.release(conn, broken=True)
+                conn = None
+
+            if conn is not None:
+                conn.last_used = time.monotonic()
+                return conn
+
+            conn = self._connect(key)
+            with self._lock:
+                evicted = self._pop_idle(reserve=1)
+                conn.in_use = 1
+                self._conns[key] = conn
+
+        for old_conn in evicted:
+            old_conn.close()
+
+        return conn
+
+    def release(self, conn, broken=False):
+        with self._lock:
+            conn.in_use -= 1
+            conn.last_used = time.monotonic()
+            if broken and self._conns.get(conn.key, None) is conn:
+                del self._conns[conn.key]
+
+            close_now = conn.in_use == 0 and \
+                self._conns.get(conn.key, None) is not conn
+            evicted = self._pop_idle()
+
+        if close_now:
+            evicted.append(conn)
+
+        for old_conn in evicted:
+            old_conn.close()
+
+    def close_all(self):
+        with self._lock:
+            conns = list(self._conns.values())
+            self._conns.clear()
+
+        for conn in conns:
+            conn.close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "connections": len(self._conns),
+                "in_use": sum(conn.in_use for conn in self._conns.values())
+            }
+
+
+ssh_pool = SSHConnectionPool()
+
+
+def close_ssh_connections():
+    """
+    Close all the pooled SSH connections
+    """
+    ssh_pool.close_all()
+
+
+def _ssh_error(user, host, error):
+    return GlusterCmdException("SSH command failed on {0}@{1}:\n{2}".format(
+        user, host, error))
+
+
+def _execute_ssh(host, user, pem_file, cmd):
+    import paramiko  # noqa # pylint: disable=import-outside-toplevel
+
+    ssh_errors = (paramiko.ssh_exception.SSHException, EOFError, OSError)
+
+    # Retry once with a fresh connection if the pooled connection
+    # turns out to be dead. Only failures to open the channel or to
+    # start the command are retried, once the exec request is
+    # accepted the command may have run and running it again is not
+    # safe for the mutating commands(volume create, snapshot create..)
+    for attempt in range(2):
+        conn = ssh_pool.acquire(host, user, pem_file)
+        broken = False
+        try:
+            with conn.channels:
+                try:
+                    _, stdout, stderr = conn.client.exec_command(cmd)
+                except ssh_errors as error:
+                    broken = True
+                    if attempt > 0:
+                        raise _ssh_error(user, host, error)
+                    continue
+
+                try:
+                    # Read before waiting for the exit status, else the
+                    # remote end blocks once the channel window is full
+                    out = stdout.read().strip()
+                    err = stderr.read().strip()
+                    return (stdout.channel.recv_exit_status(), out, err)
+                except ssh_errors as error:
+                    broken = True
+                    raise _ssh_error(user, host, error)
+        finally:
+            ssh_pool.release(conn, broken)
+
+
+@contextmanager
+def _stream_ssh(host, user, pem_file, cmd):
+    conn = ssh_pool.acquire(host, user, pem_file)
+    broken = True
+    try:
+        with conn.channels:
+            _, stdout, stderr = conn.client.exec_command(cmd)
+            try:
+                yield stdout
+            except Exception:
+                stdout.channel.close()
+                raise
+
+            stdout.read()
+            err = stderr.read().strip()
+            returncode = stdout.channel.recv_exit_status()
+            broken = False
+            if returncode != 0:
+                raise GlusterCmdException((returncode, "", err))
+    finally:
+        ssh_pool.release(conn, broken)
+
+
+@contextmanager
+def _stream_local(cmd_args):
+    proc = subprocess.Popen(cmd_args, stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE)
+    try:
+        yield proc.stdout
+    except BaseException:
+        # Consumer stopped early or failed to parse the output, if
+        # the command itself failed report that instead
+        if proc.poll() is None:
+            proc.kill()
+        proc.wait()
+        err = proc.stderr.read().decode()
+        proc.stdout.close()
+        proc.stderr.close()
+        if proc.returncode > 0:
+            raise GlusterCmdException((proc.returncode, "", err))
+        raise
+
+    # Drain the remaining output so that the process can exit
+    proc.stdout.read()
+    err = proc.stderr.read().decode()
+    proc.wait()
+    proc.stdout.close()
+    proc.stderr.close()
+    if proc.returncode != 0:
+        raise GlusterCmdException((proc.returncode, "", err))
 
 
 def set_gluster_path(path):
@@ -126,6 +1082,352 @@ def set_gluster_path(path):
 def set_gluster_socket(path):
     global GLUSTERD_SOCKET
     GLUSTERD_SOCKET = path
+    volinfo_cache.invalidate()
+
+
+def _check_transport(transport):
+    if transport not in TRANSPORTS:
+        raise ValueError("Invalid transport {0}, valid values are: "
+                         "{1}".format(transport, ", ".join(TRANSPORTS)))
+
+
+def set_transport(transport):
+    """
+    Set the transport used for the read only commands which glusterd
+    serves over its CLI RPC(volume info, volume status detail, volume
+    list, peer status and pool list). With "rpc" these are sent to
+    glusterd directly over the glusterd socket instead of running the
+    gluster binary. Commands run over SSH always use the binary.
+
+    :param transport: "cli"(default) or "rpc"
+    """
+    global TRANSPORT
+
+    _check_transport(transport)
+    TRANSPORT = transport
+
+
+class GlusterClient(object):
+    """
+    Execution context for gluster commands. Carries the gluster
+    binary path, glusterd socket, SSH target, Volume info cache and
+    command scheduler so that multiple clusters can be queried
+    concurrently from one process. Activate a client with
+    `with client.activate():`, all the wrappers called in that thread
+    or asyncio task use it. Outside of any active client the module
+    level settings(set_gluster_path, set_ssh_host etc) are used.
+
+    :param gluster_path: Path of gluster binary
+    :param glusterd_socket: glusterd socket path
+    :param ssh_host: Run commands on this host over SSH
+    :param ssh_pem_file: Private key for SSH
+    :param ssh_user: SSH user, default is "root"
+    :param volinfo_cache_ttl: Volume info cache TTL in seconds
+    :param read_limit: Concurrency limit for read only commands
+    :param write_limit: Concurrency limit for mutating commands
+    :param coalesce: Share one execution of a read only command among
+     the concurrent callers issuing the same command
+    :param transport: "rpc" to query glusterd over its socket instead
+     of running the gluster binary, see set_transport
+    """
+    # noqa # pylint: disable=too-many-arguments
+    def __init__(self, gluster_path="gluster", glusterd_socket=None,
+                 ssh_host=None, ssh_pem_file=None, ssh_user="root",
+                 volinfo_cache_ttl=0,
+                 read_limit=DEFAULT_READ_CONCURRENCY,
+                 write_limit=DEFAULT_WRITE_CONCURRENCY, coalesce=True,
+                 transport=TRANSPORT_CLI):
+        _check_transport(transport)
+        self.gluster_path = gluster_path
+        self.glusterd_socket = glusterd_socket
+        self.ssh_host = ssh_host
+        self.ssh_pem_file = ssh_pem_file
+        self.ssh_user = ssh_user
+        self.volinfo_cache = VolumeInfoCache(volinfo_cache_ttl)
+        self.scheduler = CommandScheduler(read_limit, write_limit)
+        self.coalesce = coalesce
+        self.transport = transport
+        self.singleflight = SingleFlight()
+        self._rpc_client = None
+        self._derived = {}
+        self._derived_lock = threading.Lock()
+
+    @property
+    def use_ssh(self):
+        return self.ssh_host is not None and self.ssh_pem_file is not None
+
+    @property
+    def use_rpc(self):
+        return self.transport == TRANSPORT_RPC and not self.use_ssh
+
+    def config(self):
+        return {
+            "gluster_path": self.gluster_path,
+            "glusterd_socket": self.glusterd_socket,
+            "ssh_host": self.ssh_host,
+            "ssh_pem_file": self.ssh_pem_file,
+            "ssh_user": self.ssh_user,
+            "transport": self.transport
+        }
+
+    def derive(self, **overrides):
+        """
+        Client with the same settings except the given overrides.
+        Derived clients are reused so that their Volume info cache
+        survives across uses.
+        """
+        config = self.config()
+        config.update(overrides)
+        key = tuple(sorted(config.items()))
+        with self._derived_lock:
+            client = self._derived.get(key, None)
+            if client is None:
+                lanes = self.scheduler.lanes
+                client = GlusterClient(
+                    volinfo_cache_ttl=self.volinfo_cache.ttl,
+                    read_limit=lanes[LANE_READ].limit,
+                    write_limit=lanes[LANE_WRITE].limit,
+                    coalesce=self.coalesce,
+                    **config)
+                self._derived[key] = client
+
+        return client
+
+    @contextmanager
+    def activate(self):
+        token = _current_client.set(self)
+        try:
+            yield self
+        finally:
+            _current_client.reset(token)
+
+    def cmd_args(self, cmd):
+        cmd_args = []
+        cmd_args.append(self.gluster_path)
+
+        if self.glusterd_socket:
+            cmd_args.append("--glusterd-sock={0}".format(
+                self.glusterd_socket))
+
+        cmd_args.append("--mode=script")
+        cmd_args += cmd
+        return cmd_args
+
+    def _flight_key(self, key):
+        # Module level settings of the default client can change, so
+        # the settings are part of the key. Cache generation changes
+        # on every mutation, callers issuing a command after a
+        # mutation never join a flight started before it.
+        return (tuple(sorted(self.config().items())),
+                self.volinfo_cache.generation) + tuple(key)
+
+    def run_once(self, key, func):
+        """
+        Run func once for the concurrent callers using the same key,
+        see SingleFlight.do
+
+        :returns: (result, shared)
+        """
+        if not self.coalesce:
+            return func(), False
+
+        return self.singleflight.do(self._flight_key(key), func)
+
+    async def run_once_async(self, key, func):
+        """
+        Asyncio variant of run_once, func is a coroutine function
+        """
+        if not self.coalesce:
+            return await func(), False
+
+        return await self.singleflight.do_async(self._flight_key(key), func)
+
+    def execute(self, cmd):
+        if command_lane(cmd) != LANE_READ:
+            return self.scheduler.run(cmd, self._execute)
+
+        cmd = list(cmd)
+        return self.run_once(
+            ["execute"] + cmd,
+            lambda: self.scheduler.run(cmd, self._execute))[0]
+
+    def _execute(self, cmd):
+        cmd_args = self.cmd_args(cmd)
+
+        if self.use_ssh:
+            return _execute_ssh(self.ssh_host, self.ssh_user,
+                                self.ssh_pem_file, " ".join(cmd_args))
+
+        proc = subprocess.Popen(cmd_args, stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE,
+                                universal_newlines=True)
+        out, err = proc.communicate()
+        return (proc.returncode, out, err)
+
+    @contextmanager
+    def stream(self, cmd):
+        """
+        Run the command and provide its stdout as a binary file
+        object to be consumed incrementally. Raises
+        GlusterCmdException if the command fails.
+        """
+        cmd_args = self.cmd_args(cmd)
+        with self.scheduler.slot(cmd):
+            if self.use_ssh:
+                stream_cm = _stream_ssh(self.ssh_host, self.ssh_user,
+                                        self.ssh_pem_file,
+                                        " ".join(cmd_args))
+            else:
+                stream_cm = _stream_local(cmd_args)
+
+            with stream_cm as stdout:
+                yield stdout
+
+    async def execute_async(self, cmd):
+        if command_lane(cmd) != LANE_READ:
+            return await self.scheduler.run_async(cmd, self._execute_async)
+
+        cmd = list(cmd)
+        out = await self.run_once_async(
+            ["execute"] + cmd,
+            lambda: self.scheduler.run_async(cmd, self._execute_async))
+        return out[0]
+
+    def rpc_client(self):
+        """
+        Client of the glusterd CLI RPC, created on first use
+
+        :returns: glustercli.cli.rpc.RpcClient
+        """
+        from glustercli.cli import rpc  # noqa # pylint: disable=import-outside-toplevel
+
+        path = self.glusterd_socket or rpc.GLUSTERD_SOCKET
+        with self._derived_lock:
+            # Socket of the default client can be changed at any time
+            if self._rpc_client is None or self._rpc_client.path != path:
+                if self._rpc_client is not None:
+                    self._rpc_client.close()
+                self._rpc_client = rpc.RpcClient(path)
+
+            return self._rpc_client
+
+    def execute_rpc(self, cmd):
+        """
+        Run a read only command over glusterd's CLI RPC, through the
+        scheduler and coalescing like execute
+
+        :param cmd: Gluster command, see glustercli.cli.rpc.rpc_request
+        :returns: (op_ret, serialized reply dict, op_errstr)
+        """
+        cmd = list(cmd)
+        return self.run_once(
+            ["rpc"] + cmd,
+            lambda: self.scheduler.run(cmd, self._execute_rpc))[0]
+
+    def _execute_rpc(self, cmd):
+        return self.rpc_client().execute(cmd)
+
+    async def execute_rpc_async(self, cmd):
+        """
+        Asyncio variant of execute_rpc, the blocking socket IO is
+        delegated to the default executor
+        """
+        cmd = list(cmd)
+        out = await self.run_once_async(
+            ["rpc"] + cmd,
+            lambda: self.scheduler.run_async(cmd, self._execute_rpc_async))
+        return out[0]
+
+    async def _execute_rpc_async(self, cmd):
+        import asyncio  # noqa # pylint: disable=import-outside-toplevel
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._execute_rpc, cmd)
+
+    async def _execute_async(self, cmd):
+        import asyncio  # noqa # pylint: disable=import-outside-toplevel
+
+        if self.use_ssh:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self._execute, cmd)
+
+        proc = await asyncio.create_subprocess_exec(
+            *self.cmd_args(cmd),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE)
+        out, err = await proc.communicate()
+        return (proc.returncode, out.decode(), err.decode())
+
+
+class _DefaultClient(GlusterClient):
+    """
+    Client used when no client is active, backed by the module level
+    settings for backward compatibility
+    """
+    # noqa # pylint: disable=super-init-not-called
+    def __init__(self):
+        self.volinfo_cache = volinfo_cache
+        self.scheduler = scheduler
+        self.coalesce = True
+        self.singleflight = SingleFlight()
+        self._rpc_client = None
+        self._derived = {}
+        self._derived_lock = threading.Lock()
+
+    gluster_path = property(lambda self: GLUSTERCMD)
+    transport = property(lambda self: TRANSPORT)
+    glusterd_socket = property(lambda self: GLUSTERD_SOCKET)
+    ssh_host = property(lambda self: SSH_HOST)
+    ssh_pem_file = property(lambda self: SSH_PEM_FILE)
+    ssh_user = property(lambda self: SSH_USER)
+
+
+_default_client = _DefaultClient()
+_current_client = contextvars.ContextVar("glustercli_client", default=None)
+
+
+def current_client():
+    """
+    Client active in the current thread or asyncio task
+
+    :returns: Active GlusterClient, module level default if none
+    """
+    client = _current_client.get()
+    if client is None:
+        return _default_client
+
+    return client
+
+
+def set_volinfo_cache_ttl(ttl):
+    """
+    Cache parsed Volume info for the given number of seconds.
+    Mutating commands(Volume, Brick, Snapshot, Quota, Bitrot, Heal
+    changes..) run using this library invalidate the cache
+    automatically.
+
+    :param ttl: Time to live in seconds, 0 disables the cache
+    """
+    cache = current_client().volinfo_cache
+    cache.ttl = ttl
+    cache.invalidate()
+
+
+def invalidate_volinfo_cache():
+    """
+    Drop all the cached Volume info
+    """
+    current_client().volinfo_cache.invalidate()
+
+
+def volinfo_cache_stats():
+    """
+    Volume info cache hit/miss counters
+
+    :returns: Dict with ttl, generation, entries, hits, misses
+     and invalidations
+    """
+    return current_client().volinfo_cache.stats()
 
 
 def check_for_xml_errors(data):
@@ -145,6 +1447,8 @@ def check_for_xml_errors(data):
     # return to stdout instead of stderr and vice versa
     error = stdout if stdout else stderr or None
     if error is not None:
+        import xml.etree.cElementTree as ET  # noqa # pylint: disable=import-outside-toplevel
+
         try:
             error = ET.fromstring(error)
         except ET.ParseError:
@@ -162,16 +1466,60 @@ def check_for_xml_errors(data):
             raise GlusterCmdException((int(op_ret), '', op_err))
 
 
+def execute_stream(cmd):
+    """
+    Context manager providing the stdout of the command as a
+    binary file object, see GlusterClient.stream
+    """
+    return current_client().stream(cmd)
+
+
+def _command_done(cmd):
+    # Mutating commands(volume set, bitrot enable, quota disable,
+    # snapshot restore..) may change the Volume info, cached Volume
+    # info is no longer valid
+    if command_lane(cmd) != LANE_READ:
+        current_client().volinfo_cache.invalidate()
+
+
 def execute_or_raise(cmd):
     returncode, out, err = execute(cmd)
     if returncode != 0:
         raise GlusterCmdException((returncode, out, err))
 
     check_for_xml_errors((out, err))
+    _command_done(cmd)
+
+    return out.strip()
+
+
+async def execute_or_raise_async(cmd):
+    returncode, out, err = await execute_async(cmd)
+    if returncode != 0:
+        raise GlusterCmdException((returncode, out, err))
+
+    check_for_xml_errors((out, err))
+    _command_done(cmd)
 
     return out.strip()
 
 
+def rpc_execute_or_raise(cmd):
+    returncode, out, err = current_client().execute_rpc(cmd)
+    if returncode != 0:
+        raise GlusterCmdException((returncode, "", err or "FAILED"))
+
+    return out
+
+
+async def rpc_execute_or_raise_async(cmd):
+    returncode, out, err = await current_client().execute_rpc_async(cmd)
+    if returncode != 0:
+        raise GlusterCmdException((returncode, "", err or "FAILED"))
+
+    return out
+
+
 def gluster_system_execute(cmd):
     cmd.insert(0, "system::")
     cmd.insert(1, "execute")
@@ -202,6 +1550,22 @@ def volume_execute_xml(cmd):
     return gluster_execute_xml(cmd)
 
 
+def volume_rpc_execute(cmd):
+    cmd.insert(0, "volume")
+    return rpc_execute_or_raise(cmd)
+
+
+def peer_rpc_execute(cmd):
+    cmd.insert(0, "peer")
+    return rpc_execute_or_raise(cmd)
+
+
+def volume_stream_xml(cmd):
+    cmd.insert(0, "volume")
+    cmd.append("--xml")
+    return execute_stream(cmd)
+
+
 def peer_execute_xml(cmd):
     cmd.insert(0, "peer")
     return gluster_execute_xml(cmd)
@@ -275,3 +1639,51 @@ def tier_execute_xml(cmd):
     cmd.insert(0, "volume")
     cmd.insert(1, "tier")
     return gluster_execute_xml(cmd)
+
+
+async def gluster_execute_xml_async(cmd):
+    cmd.append("--xml")
+    return await execute_or_raise_async(cmd)
+
+
+async def volume_execute_xml_async(cmd):
+    cmd.insert(0, "volume")
+    return await gluster_execute_xml_async(cmd)
+
+
+async def peer_execute_xml_async(cmd):
+    cmd.insert(0, "peer")
+    return await gluster_execute_xml_async(cmd)
+
+
+async def georep_execute_xml_async(cmd):
+    cmd.insert(0, "volume")
+    cmd.insert(1, "geo-replication")
+    return await gluster_execute_xml_async(cmd)
+
+
+async def quota_execute_xml_async(cmd):
+    cmd.insert(0, "volume")
+    cmd.insert(1, "quota")
+    return await gluster_execute_xml_async(cmd)
+
+
+async def heal_execute_xml_async(cmd):
+    cmd.insert(0, "volume")
+    cmd.insert(1, "heal")
+    return await gluster_execute_xml_async(cmd)
+
+
+async def snapshot_execute_xml_async(cmd):
+    cmd.insert(0, "snapshot")
+    return await gluster_execute_xml_async(cmd)
+
+
+async def volume_rpc_execute_async(cmd):
+    cmd.insert(0, "volume")
+    return await rpc_execute_or_raise_async(cmd)
+
+
+async def peer_rpc_execute_async(cmd):
+    cmd.insert(0, "peer")
+    return await rpc_execute_or_raise_async(cmd)
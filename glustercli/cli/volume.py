@@ -1,20 +1,41 @@
 # -*- coding: utf-8 -*-
 
+import importlib
+
 from glustercli.cli.utils import volume_execute, volume_execute_xml, \
-    GlusterCmdException
-from glustercli.cli.parsers import (parse_volume_info,
+    volume_execute_xml_async, volume_stream_xml, volume_rpc_execute, \
+    volume_rpc_execute_async, current_client, GlusterCmdException, \
+    parse_output
+from glustercli.cli.cache import copy_volinfo
+from glustercli.cli.records import volume_record
+from glustercli.cli.parsers import (_group_subvols,
+                                    parse_volume_info,
                                     parse_volume_status,
                                     parse_volume_options,
                                     parse_volume_list,
-                                    parse_volume_profile_info)
+                                    parse_volume_profile_info,
+                                    iter_volume_info,
+                                    iter_volume_status,
+                                    merge_volume_status,
+                                    merge_volumes_status,
+                                    STATE_STARTED)
+
+# Following modules are made available via volume.(for example
+# volume.heal), imported on first access
+_SUBMODULES = set(["bitrot", "bricks", "heal", "quota", "rebalance"])
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module("glustercli.cli." + name)
 
-# Following import are not used in this file, but imported to make
-# it available via volume.(noqa to ignore in pep8 check)
-from glustercli.cli import bitrot     # noqa # pylint: disable=unused-import
-from glustercli.cli import bricks     # noqa # pylint: disable=unused-import
-from glustercli.cli import heal       # noqa # pylint: disable=unused-import
-from glustercli.cli import quota      # noqa # pylint: disable=unused-import
-from glustercli.cli import rebalance  # noqa # pylint: disable=unused-import
+    raise AttributeError("module {0!r} has no attribute {1!r}".format(
+        __name__, name))
+
+
+def _rpc():
+    # Only needed with the rpc transport, imported on first use
+    return importlib.import_module("glustercli.cli.rpc")
 
 
 LOCK_KINDS = ["blocked", "granted", "all"]
@@ -136,57 +157,280 @@ def create(volname, volbricks, replica=0, stripe=0, arbiter=0, disperse=0,
     return volume_execute(cmd)
 
 
-def info(volname=None, group_subvols=False):
+def _fetch_volinfo(volname):
+    # Concurrent callers share one fetch and parse, each of them gets
+    # its own copy of the shared result
+    client = current_client()
+    cache = client.volinfo_cache
+
+    def fetch():
+        generation = cache.generation
+        cmd = ["info"]
+        if volname is not None:
+            cmd += [volname]
+
+        if client.use_rpc:
+            volumes = parse_output(cmd, _rpc().parse_volume_info_dict,
+                                   volume_rpc_execute(cmd))
+        else:
+            volumes = parse_output(cmd, parse_volume_info,
+                                   volume_execute_xml(cmd))
+        cache.put(volname, volumes, generation)
+        return volumes
+
+    volumes, shared = client.run_once(["volinfo", volname], fetch)
+    return copy_volinfo(volumes) if shared else volumes
+
+
+async def _fetch_volinfo_async(volname):
+    client = current_client()
+    cache = client.volinfo_cache
+
+    async def fetch():
+        generation = cache.generation
+        cmd = ["info"]
+        if volname is not None:
+            cmd += [volname]
+
+        if client.use_rpc:
+            volumes = parse_output(cmd, _rpc().parse_volume_info_dict,
+                                   await volume_rpc_execute_async(cmd))
+        else:
+            volumes = parse_output(cmd, parse_volume_info,
+                                   await volume_execute_xml_async(cmd))
+        cache.put(volname, volumes, generation)
+        return volumes
+
+    volumes, shared = await client.run_once_async(["volinfo", volname],
+                                                  fetch)
+    return copy_volinfo(volumes) if shared else volumes
+
+
+def info(volname=None, group_subvols=False, records=False):
     """
     Get Gluster Volume Info
 
     :param volname: Volume Name
     :param group_subvols: Show Subvolume Information in Groups
+    :param records: Return compact Volume records instead of dicts
     :returns: Returns Volume Info, raises
      GlusterCmdException((rc, out, err)) on error
     """
+    volumes = current_client().volinfo_cache.get(volname)
+    if volumes is None:
+        volumes = _fetch_volinfo(volname)
+
+    if records:
+        volumes = [volume_record(vol) for vol in volumes]
+
+    if group_subvols:
+        return _group_subvols(volumes)
+
+    return volumes
+
+
+def iter_info(volname=None, group_subvols=False, records=False):
+    """
+    Get Gluster Volume Info one Volume at a time. Output of the
+    command is parsed incrementally, so the peak memory usage does
+    not grow with the number of Volumes.
+
+    :param volname: Volume Name
+    :param group_subvols: Show Subvolume Information in Groups
+    :param records: Return compact Volume records instead of dicts
+    :returns: Generator of Volume Info, raises
+     GlusterCmdException((rc, out, err)) on error
+    """
     cmd = ["info"]
     if volname is not None:
         cmd += [volname]
 
-    return parse_volume_info(volume_execute_xml(cmd),
-                             group_subvols=group_subvols)
+    with volume_stream_xml(cmd) as stream:
+        for vol in iter_volume_info(stream, group_subvols=group_subvols,
+                                    records=records):
+            yield vol
 
 
-def status_detail(volname=None, group_subvols=False):
+def iter_status_detail(volname=None, group_subvols=False, records=False):
     """
-    Get Gluster Volume Status
+    Get Gluster Volume Status one Volume at a time. Output of the
+    status command is parsed incrementally.
 
-    :param volname: Volume Name or List of volumes
+    :param volname: Volume Name
     :param group_subvols: Show Subvolume Information in Groups
-    :returns: Returns Volume Status, raises
+    :param records: Return compact Volume records instead of dicts
+    :returns: Generator of Volume Status, raises
      GlusterCmdException((rc, out, err)) on error
     """
+    pending = {}
+    volnames = []
+    for vol in info(volname):
+        pending[vol["name"]] = vol
+        volnames.append(vol["name"])
+
     cmd = ["status"]
     if volname is not None:
+        cmd += [volname, "detail"]
+    else:
+        cmd += ["all", "detail"]
+
+    with volume_stream_xml(cmd) as stream:
+        for name, nodes in iter_volume_status(stream):
+            vol = pending.pop(name, None)
+            if vol is not None:
+                yield merge_volume_status(vol, nodes,
+                                          group_subvols=group_subvols,
+                                          records=records)
+
+    # Volumes which are not started are not part of the status
+    # output, all their bricks are offline
+    for name in volnames:
+        if name in pending:
+            yield merge_volume_status(pending[name], [],
+                                      group_subvols=group_subvols,
+                                      records=records)
+
+
+def _status_detail_cmd(volname):
+    if type(volname) == list and len(volname) != 1:
+        # Status of all the Volumes in a single round trip, demultiplexed
+        # by _select_volumes
+        return ["status", "all", "detail"]
+
+    if type(volname) == list:
+        volname = volname[0]
+
+    return ["status", "all" if volname is None else volname, "detail"]
+
+
+def _select_volumes(volinfo, volnames):
+    """
+    Volume info of the requested Volumes in the requested order,
+    raises GlusterCmdException if a Volume does not exist
+    """
+    volinfo_index = dict((vol["name"], vol) for vol in volinfo)
+    selected = []
+    for volname in volnames:
+        vol = volinfo_index.get(volname, None)
+        if vol is None:
+            raise GlusterCmdException(
+                (1, "", "Volume {0} does not exist".format(volname)))
+
+        selected.append(vol)
+
+    return selected
+
+
+def _rpc_status_cmds(volname, volinfo):
+    # glusterd serves the status of one Volume per call, status of all
+    # the Volumes is collected from each started Volume(as the gluster
+    # CLI does)
+    cmd = _status_detail_cmd(volname)
+    if cmd[1] != "all":
+        return [cmd]
+
+    return [["status", vol["name"], "detail"] for vol in volinfo
+            if vol["status"] == STATE_STARTED]
+
+
+def status_detail(volname=None, group_subvols=False, records=False):
+    """
+    Get Gluster Volume Status. If list of volumes is given, status of
+    all the volumes is fetched with one status and one info command.
+
+    :param volname: Volume Name or List of volumes
+    :param group_subvols: Show Subvolume Information in Groups
+    :param records: Return compact Volume records instead of dicts
+    :returns: Returns Volume Status, raises
+     GlusterCmdException((rc, out, err)) on error
+    """
+    if type(volname) == list:
+        volinfo = _select_volumes(info(), volname)
+    else:
+        volinfo = info(volname)
+
+    if current_client().use_rpc:
+        nodes = []
+        for cmd in _rpc_status_cmds(volname, volinfo):
+            nodes += parse_output(cmd, _rpc().parse_volume_status_dict,
+                                  volume_rpc_execute(cmd))
+
+        return merge_volumes_status(volinfo, nodes,
+                                    group_subvols=group_subvols,
+                                    records=records)
+
+    cmd = _status_detail_cmd(volname)
+    return parse_output(cmd, parse_volume_status, volume_execute_xml(cmd),
+                        volinfo, group_subvols=group_subvols,
+                        records=records)
+
+
+async def info_async(volname=None, group_subvols=False,
+                     records=False):
+    """
+    Get Gluster Volume Info, asyncio variant of info
+
+    :param volname: Volume Name
+    :param group_subvols: Show Subvolume Information in Groups
+    :param records: Return compact Volume records instead of dicts
+    :returns: Returns Volume Info, raises
+     GlusterCmdException((rc, out, err)) on error
+    """
+    volumes = current_client().volinfo_cache.get(volname)
+    if volumes is None:
+        volumes = await _fetch_volinfo_async(volname)
+
+    if records:
+        volumes = [volume_record(vol) for vol in volumes]
+
+    if group_subvols:
+        return _group_subvols(volumes)
+
+    return volumes
+
+
+async def status_detail_async(volname=None, group_subvols=False,
+                              records=False):
+    """
+    Get Gluster Volume Status, asyncio variant of status_detail.
+    Status and info commands are run concurrently.
+
+    :param volname: Volume Name or List of volumes
+    :param group_subvols: Show Subvolume Information in Groups
+    :param records: Return compact Volume records instead of dicts
+    :returns: Returns Volume Status, raises
+     GlusterCmdException((rc, out, err)) on error
+    """
+    import asyncio  # noqa # pylint: disable=import-outside-toplevel
+
+    if current_client().use_rpc:
         if type(volname) == list:
-            volumes = []
-            volinfo = {}
-
-            for vi in info():
-                volinfo[vi['name']] = vi
-
-            for v in volname:
-                cmd += [v, "detail"]
-                volumes.append(parse_volume_status(volume_execute_xml(cmd),
-                                                   [volinfo[v]],
-                                                   group_subvols=\
-                                                   group_subvols).pop())
-                cmd = ["status"]
-            return(volumes)
+            volinfo = _select_volumes(await info_async(), volname)
         else:
-            cmd += [volname, "detail"]
+            volinfo = await info_async(volname)
+
+        cmds = _rpc_status_cmds(volname, volinfo)
+        outs = await asyncio.gather(*[volume_rpc_execute_async(cmd)
+                                      for cmd in cmds])
+        nodes = []
+        for cmd, out in zip(cmds, outs):
+            nodes += parse_output(cmd, _rpc().parse_volume_status_dict, out)
+
+        return merge_volumes_status(volinfo, nodes,
+                                    group_subvols=group_subvols,
+                                    records=records)
+
+    cmd = _status_detail_cmd(volname)
+    if type(volname) == list:
+        out, volinfo = await asyncio.gather(volume_execute_xml_async(cmd),
+                                            info_async())
+        volinfo = _select_volumes(volinfo, volname)
     else:
-        cmd += ["all", "detail"]
+        out, volinfo = await asyncio.gather(volume_execute_xml_async(cmd),
+                                            info_async(volname))
 
-    return parse_volume_status(volume_execute_xml(cmd),
-                               info(volname),
-                               group_subvols=group_subvols)
+    return parse_output(cmd, parse_volume_status, out, volinfo,
+                        group_subvols=group_subvols, records=records)
 
 
 def optset(volname, opts):
@@ -215,7 +459,7 @@ def optget(volname, opt="all"):
      GlusterCmdException((rc, out, err)) on error
     """
     cmd = ["get", volname, opt]
-    return parse_volume_options(volume_execute_xml(cmd))
+    return parse_output(cmd, parse_volume_options, volume_execute_xml(cmd))
 
 
 def optreset(volname, opt=None, force=False):
@@ -247,7 +491,27 @@ def vollist():
      GlusterCmdException((rc, out, err)) on error
     """
     cmd = ["list"]
-    return parse_volume_list(volume_execute_xml(cmd))
+    if current_client().use_rpc:
+        return parse_output(cmd, _rpc().parse_volume_list_dict,
+                            volume_rpc_execute(cmd))
+
+    return parse_output(cmd, parse_volume_list, volume_execute_xml(cmd))
+
+
+async def vollist_async():
+    """
+    Volumes List, asyncio variant of vollist
+
+    :returns: List of Volumes, raises
+     GlusterCmdException((rc, out, err)) on error
+    """
+    cmd = ["list"]
+    if current_client().use_rpc:
+        return parse_output(cmd, _rpc().parse_volume_list_dict,
+                            await volume_rpc_execute_async(cmd))
+
+    return parse_output(cmd, parse_volume_list,
+                        await volume_execute_xml_async(cmd))
 
 
 def log_rotate(volname, brick):
@@ -357,7 +621,7 @@ def profile_stop(volname):
     return volume_execute(cmd)
 
 
-def profile_info(volname, opt, peek=False):
+def profile_info(volname, opt, peek=False, columnar=False):
     """
     Get Profile info
 
@@ -365,6 +629,38 @@ def profile_info(volname, opt, peek=False):
     :param opt: Operation type of info,
      like peek, incremental, cumulative, clear
     :param peek: Use peek or not, default is False
+    :param columnar: Return block and FOP stats as numeric array
+     columns, see parsers.parse_volume_profile_info
+    :return: Return profile info, raises
+     GlusterCmdException((rc, out, err)) on error
+    """
+
+    if opt.lower() not in INFO_OPS:
+        raise GlusterCmdException((
+            -1,
+            "",
+            "Invalid Info Operation Type, use peek, "
+            "incremental, cumulative, clear"
+        ))
+    cmd = ["profile", volname, "info", opt.lower()]
+
+    if opt.lower() == INFO_OPS[1] and peek:
+        cmd += ["peek"]
+
+    return parse_output(cmd, parse_volume_profile_info,
+                        volume_execute_xml(cmd), opt, columnar=columnar)
+
+
+async def profile_info_async(volname, opt, peek=False, columnar=False):
+    """
+    Get Profile info, asyncio variant of profile_info
+
+    :param volname: Volume Name
+    :param opt: Operation type of info,
+     like peek, incremental, cumulative, clear
+    :param peek: Use peek or not, default is False
+    :param columnar: Return block and FOP stats as numeric array
+     columns, see parsers.parse_volume_profile_info
     :return: Return profile info, raises
      GlusterCmdException((rc, out, err)) on error
     """
@@ -381,7 +677,9 @@ def profile_info(volname, opt, peek=False):
     if opt.lower() == INFO_OPS[1] and peek:
         cmd += ["peek"]
 
-    return parse_volume_profile_info(volume_execute_xml(cmd), opt)
+    return parse_output(cmd, parse_volume_profile_info,
+                        await volume_execute_xml_async(cmd), opt,
+                        columnar=columnar)
 
 # TODO: Pending Wrappers
 # volume statedump <VOLNAME> [nfs|quotad] [all|mem|iobuf|
@@ -1,12 +1,58 @@
 # -*- coding: utf-8 -*-
 
-from glustercli.metrics.process import local_processes
-from glustercli.metrics.utilization import local_utilization
-from glustercli.metrics.diskstats import local_diskstats
+import importlib
+
+# Collectors are imported on first access(PEP 562)
+_REEXPORTS = {
+    "local_processes": "process",
+    "ProcessCollector": "process",
+    "local_utilization": "utilization",
+    "local_diskstats": "diskstats",
+    "DiskstatsSampler": "diskstats",
+    "ProfileCollector": "profile",
+    "diff_status": "status_diff",
+    "StatusDiffer": "status_diff",
+    "Watcher": "watch",
+    "WatchQuery": "watch",
+    "volume_status_query": "watch",
+    "heal_info_query": "watch",
+    "georep_status_query": "watch",
+    "rebalance_status_query": "watch",
+    "set_brick_discovery": "utils",
+}
+
+
+def __getattr__(name):
+    if name in _REEXPORTS:
+        module = importlib.import_module("glustercli.metrics." +
+                                         _REEXPORTS[name])
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+
+    raise AttributeError("module {0!r} has no attribute {1!r}".format(
+        __name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
 
 # Reexport
 __all__ = [
     "local_processes",
+    "ProcessCollector",
     "local_utilization",
-    "local_diskstats"
+    "local_diskstats",
+    "DiskstatsSampler",
+    "ProfileCollector",
+    "diff_status",
+    "StatusDiffer",
+    "Watcher",
+    "WatchQuery",
+    "volume_status_query",
+    "heal_info_query",
+    "georep_status_query",
+    "rebalance_status_query",
+    "set_brick_discovery"
 ]
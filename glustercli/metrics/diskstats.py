@@ -1,8 +1,13 @@
 import os
-import subprocess
+import select
+import threading
+import time
 
 from glustercli.metrics.utils import get_local_bricks
 
+DISKSTATS = "/proc/diskstats"
+MOUNTINFO = "/proc/self/mountinfo"
+SYS_DEV_BLOCK = "/sys/dev/block"
 
 DEFAULT_DISKSTAT = {
     "major_number": 0,
@@ -21,39 +26,191 @@ DEFAULT_DISKSTAT = {
 }
 
 
-def local_diskstats(volname=None):
+def _unescape_mountinfo(value):
+    # Space, tab, newline and backslash are octal escaped in mountinfo
+    return value.replace("\\040", " ").replace("\\011", "\t").replace(
+        "\\012", "\n").replace("\\134", "\\")
+
+
+def read_mountinfo(path=MOUNTINFO):
     """
-    Collect Diskstats info of local bricks
+    List of (mount point, "major:minor", mount source) of all mounts
+    """
+    mounts = []
+    with open(path) as mountinfo_file:
+        for line in mountinfo_file:
+            pre, _, post = line.partition(" - ")
+            pre = pre.split()
+            post = post.split()
+            if len(pre) < 5 or len(post) < 2:
+                continue
 
-    :param volname: Volume Name
-    :returns: List of diskstats information
-        {
-            "volume": VOLUME_NAME,
-            "brick_index": BRICK_INDEX_IN_VOL_INFO,
-            "node_id": NODE_ID,
-            "brick": BRICK_NAME,
-            "fs": BRICK_FILESYSTEM,
-            "device": BRICK_DEVICE,
-            "major_number": MAJOR_NUMBER,
-            "minor_number": MINOR_NUMBER,
-            "reads_completed": READS_COMPLETED,
-            "reads_merged": READS_MERGED,
-            "sectors_read": SECTORS_READ,
-            "time_spent_reading": TIME_SPENT_READING,
-            "writes_completed": WRITES_COMPLETED,
-            "writes_merged": WRITES_MERGED,
-            "sectors_written": SECTORS_WRITTEN,
-            "time_spent_writing": TIME_SPENT_WRITING,
-            "ios_currently_in_progress": IOS_CURRENTLY_IN_PROGRESS,
-            "time_spent_doing_ios": TIME_SPENT_DOING_IOS,
-            "weighted_time_spent_doing_ios": WEIGHTED_TIME_SPENT_DOING_IOS
-        }
+            mounts.append((_unescape_mountinfo(pre[4]), pre[2],
+                           _unescape_mountinfo(post[1])))
+
+    return mounts
+
+
+def block_device(major, minor, sys_dev_block=SYS_DEV_BLOCK):
     """
-    local_bricks = get_local_bricks(volname)
-    cmd = ["df", "--output=source"]
+    Kernel name(as in /proc/diskstats) and the parent devices of a
+    block device. Parent of a partition is the whole disk and the
+    parents of a device mapper(LVM etc) device are its slaves(and
+    their parents). Returns (None, []) if not a block device.
+    """
+    sys_path = os.path.join(sys_dev_block, "{0}:{1}".format(major, minor))
+    if not os.path.exists(sys_path):
+        return None, []
+
+    sys_path = os.path.realpath(sys_path)
+    return os.path.basename(sys_path), _parent_devices(sys_path)
 
+
+def _parent_devices(sys_path):
+    parents = []
+    if os.path.exists(os.path.join(sys_path, "partition")):
+        disk_path = os.path.dirname(sys_path)
+        parents.append(os.path.basename(disk_path))
+        parents += _parent_devices(disk_path)
+
+    try:
+        slaves = sorted(os.listdir(os.path.join(sys_path, "slaves")))
+    except OSError:
+        slaves = []
+
+    for slave in slaves:
+        slave_path = os.path.realpath(os.path.join(sys_path, "slaves",
+                                                   slave))
+        parents.append(slave)
+        parents += [dev for dev in _parent_devices(slave_path)
+                    if dev not in parents]
+
+    return parents
+
+
+class DeviceResolver(object):
+    """
+    Resolves brick paths to the block devices, results are cached till
+    the mounts change. Changes are detected by polling mountinfo(the
+    kernel signals POLLPRI on mount and unmount), where poll is not
+    available the mountinfo content is compared on every call.
+    """
+    def __init__(self, mountinfo=MOUNTINFO, sys_dev_block=SYS_DEV_BLOCK):
+        self.mountinfo = mountinfo
+        self.sys_dev_block = sys_dev_block
+        self.generation = 0
+        self._cache = {}
+        self._mounts = None
+        self._mountinfo_file = None
+        self._mountinfo_content = None
+        self._poller = None
+        self._lock = threading.Lock()
+
+    def _mounts_changed(self):
+        if self._mountinfo_file is None:
+            self._mountinfo_file = open(self.mountinfo)
+            if hasattr(select, "poll"):
+                self._poller = select.poll()
+                self._poller.register(self._mountinfo_file,
+                                      select.POLLPRI | select.POLLERR)
+            return True
+
+        if self._poller is not None:
+            if not self._poller.poll(0):
+                return False
+
+            # Reading the file again clears the event
+            self._mountinfo_file.seek(0)
+            self._mountinfo_file.read()
+            return True
+
+        self._mountinfo_file.seek(0)
+        content = self._mountinfo_file.read()
+        changed = content != self._mountinfo_content
+        self._mountinfo_content = content
+        return changed
+
+    def _refresh(self):
+        if self._mounts_changed():
+            self.generation += 1
+            self._cache.clear()
+            self._mounts = read_mountinfo(self.mountinfo)
+
+    def _mount_source(self, path, dev_id):
+        # Source of the longest mount point containing the path,
+        # that is what df reports
+        best = None
+        for mount_point, dev, source in self._mounts:
+            if dev != dev_id:
+                continue
+
+            if path == mount_point or mount_point == "/" or \
+               path.startswith(mount_point + "/"):
+                if best is None or len(mount_point) > len(best[0]):
+                    best = (mount_point, source)
+
+        return None if best is None else best[1]
+
+    def resolve(self, path):
+        """
+        Resolve a path to its device
+
+        :param path: Brick path
+        :returns: {"fs": MOUNT_SOURCE, "device": DEVICE_NAME,
+         "parent_devices": PARENT_DEVICE_NAMES}, fs and device are
+         "unknown" if not resolvable
+        """
+        with self._lock:
+            self._refresh()
+            device = self._cache.get(path, None)
+            if device is None:
+                device = self._resolve(path)
+                self._cache[path] = device
+
+        return dict(device, parent_devices=list(device["parent_devices"]))
+
+    def _resolve(self, path):
+        try:
+            st_dev = os.stat(path).st_dev
+        except OSError:
+            return {"fs": "unknown", "device": "unknown",
+                    "parent_devices": []}
+
+        major, minor = os.major(st_dev), os.minor(st_dev)
+        source = self._mount_source(os.path.realpath(path),
+                                    "{0}:{1}".format(major, minor))
+        name, parents = block_device(major, minor, self.sys_dev_block)
+        if name is None and source is not None and source.startswith("/"):
+            # Device number is not of a block device(btrfs subvolumes
+            # etc), fall back to the mount source
+            try:
+                src_rdev = os.stat(source).st_rdev
+                name, parents = block_device(os.major(src_rdev),
+                                             os.minor(src_rdev),
+                                             self.sys_dev_block)
+            except OSError:
+                pass
+
+            if name is None:
+                name = os.path.basename(os.path.realpath(source))
+
+        return {"fs": "unknown" if source is None else source,
+                "device": "unknown" if name is None else name,
+                "parent_devices": parents}
+
+
+device_resolver = DeviceResolver()
+
+
+def read_diskstats(devices=None):
+    """
+    Read /proc/diskstats
+
+    :param devices: Optional set of device names to read
+    :returns: Dict of device name to the counters
+    """
     diskstat_data_raw = ""
-    with open("/proc/diskstats") as stat_file:
+    with open(DISKSTATS) as stat_file:
         diskstat_data_raw = stat_file.read()
 
     # /proc/diskstats fields
@@ -74,7 +231,7 @@ def local_diskstats(volname=None):
     diskstat_data = {}
     for row in diskstat_data_raw.strip().split("\n"):
         row = row.split()
-        if not row:
+        if not row or (devices is not None and row[2] not in devices):
             continue
 
         diskstat_data[row[2]] = {
@@ -93,29 +250,224 @@ def local_diskstats(volname=None):
             "weighted_time_spent_doing_ios": row[13]
         }
 
-    for brick in local_bricks:
-        bpath = brick["brick"].split(":", 1)[-1]
-        proc = subprocess.Popen(cmd + [bpath],
-                                stdout=subprocess.PIPE,
-                                stderr=subprocess.PIPE,
-                                universal_newlines=True)
-        out, _ = proc.communicate()
-
-        # `df` command error
-        if proc.returncode != 0:
-            brick["fs"] = "unknown"
-            brick["device"] = "unknown"
-            brick.update(DEFAULT_DISKSTAT)
-            continue
+    return diskstat_data
 
-        df_data = out.strip()
-        df_data = df_data.split("\n")[-1].strip()  # First line is header
-        brick["fs"] = df_data
-        if os.path.islink(df_data):
-            brick["device"] = os.readlink(df_data).split("/")[-1]
-        else:
-            brick["device"] = df_data.split("/")[-1]
 
+def local_diskstats(volname=None):
+    """
+    Collect Diskstats info of local bricks
+
+    :param volname: Volume Name
+    :returns: List of diskstats information
+        {
+            "volume": VOLUME_NAME,
+            "brick_index": BRICK_INDEX_IN_VOL_INFO,
+            "node_id": NODE_ID,
+            "brick": BRICK_NAME,
+            "fs": BRICK_FILESYSTEM,
+            "device": BRICK_DEVICE,
+            "parent_devices": PARENT_DEVICES,
+            "major_number": MAJOR_NUMBER,
+            "minor_number": MINOR_NUMBER,
+            "reads_completed": READS_COMPLETED,
+            "reads_merged": READS_MERGED,
+            "sectors_read": SECTORS_READ,
+            "time_spent_reading": TIME_SPENT_READING,
+            "writes_completed": WRITES_COMPLETED,
+            "writes_merged": WRITES_MERGED,
+            "sectors_written": SECTORS_WRITTEN,
+            "time_spent_writing": TIME_SPENT_WRITING,
+            "ios_currently_in_progress": IOS_CURRENTLY_IN_PROGRESS,
+            "time_spent_doing_ios": TIME_SPENT_DOING_IOS,
+            "weighted_time_spent_doing_ios": WEIGHTED_TIME_SPENT_DOING_IOS
+        }
+    """
+    local_bricks = get_local_bricks(volname)
+    diskstat_data = read_diskstats()
+
+    for brick in local_bricks:
+        bpath = brick["brick"].split(":", 1)[-1]
+        brick.update(device_resolver.resolve(bpath))
         brick.update(diskstat_data.get(brick["device"], DEFAULT_DISKSTAT))
 
     return local_bricks
+
+
+# Counters are unsigned long in the kernel, 32 bit on 32 bit kernels
+COUNTER_WRAP_32 = 2 ** 32
+COUNTER_WRAP_64 = 2 ** 64
+# A decrease is a wraparound only if the wrapped delta is less than
+# this fraction of the counter range, else the counter was reset(for
+# example a dm or md device re-created with the same name)
+COUNTER_WRAP_MAX_DELTA = 0.25
+
+RATE_COUNTERS = ["reads_completed", "sectors_read", "time_spent_reading",
+                 "writes_completed", "sectors_written",
+                 "time_spent_writing", "time_spent_doing_ios",
+                 "weighted_time_spent_doing_ios"]
+
+SECTOR_SIZE = 512
+
+
+def counter_delta(prev, cur):
+    """
+    Difference between two samples of a counter, handling the
+    wraparound of 32 and 64 bit counters
+
+    :returns: Difference, None if the counter was reset
+    """
+    if cur >= prev:
+        return cur - prev
+
+    wrap = COUNTER_WRAP_32 if prev < COUNTER_WRAP_32 else COUNTER_WRAP_64
+    delta = cur + wrap - prev
+    if delta < wrap * COUNTER_WRAP_MAX_DELTA:
+        return delta
+
+    return None
+
+
+def diskstats_rates(prev, cur, interval):
+    """
+    Per second rates between two samples of the counters of a device
+
+    :param prev: Counters of the previous sample
+    :param cur: Counters of the current sample
+    :param interval: Seconds between the samples
+    :returns: Dict of rates, None if any of the counters was reset
+    """
+    delta = {}
+    for key in RATE_COUNTERS:
+        delta[key] = counter_delta(prev[key], cur[key])
+        if delta[key] is None:
+            return None
+
+    ios = delta["reads_completed"] + delta["writes_completed"]
+    interval_ms = interval * 1000.0
+
+    def _await(time_spent, completed):
+        return float(time_spent) / completed if completed else 0.0
+
+    return {
+        "read_iops": delta["reads_completed"] / interval,
+        "write_iops": delta["writes_completed"] / interval,
+        "read_bytes_per_sec":
+        delta["sectors_read"] * SECTOR_SIZE / interval,
+        "write_bytes_per_sec":
+        delta["sectors_written"] * SECTOR_SIZE / interval,
+        "read_mb_per_sec":
+        delta["sectors_read"] * SECTOR_SIZE / interval / 1048576,
+        "write_mb_per_sec":
+        delta["sectors_written"] * SECTOR_SIZE / interval / 1048576,
+        "read_await_ms": _await(delta["time_spent_reading"],
+                                delta["reads_completed"]),
+        "write_await_ms": _await(delta["time_spent_writing"],
+                                 delta["writes_completed"]),
+        "await_ms": _await(delta["time_spent_reading"] +
+                           delta["time_spent_writing"], ios),
+        "utilization_percent":
+        min(delta["time_spent_doing_ios"] * 100.0 / interval_ms, 100.0),
+        "queue_depth":
+        delta["weighted_time_spent_doing_ios"] / interval_ms,
+        "ios_in_progress": cur["ios_currently_in_progress"]
+    }
+
+
+class DiskstatsSampler(object):
+    """
+    Computes per second IO rates of the devices of local bricks
+    between successive samples. Previous counters are kept per
+    device, a device that disappears is forgotten and starts afresh
+    when it comes back. List of local bricks is refreshed every
+    brick_refresh_interval seconds so that sampling at sub second
+    intervals reads only /proc/diskstats.
+
+    :param volname: Volume Name
+    :param brick_refresh_interval: Seconds to cache the list of local
+     bricks
+    """
+    def __init__(self, volname=None, brick_refresh_interval=60):
+        self.volname = volname
+        self.brick_refresh_interval = brick_refresh_interval
+        self._bricks = None
+        self._bricks_time = None
+        self._prev = {}
+        self._lock = threading.Lock()
+
+    def _local_bricks(self, now):
+        if self._bricks is None or \
+           now - self._bricks_time >= self.brick_refresh_interval:
+            bricks = get_local_bricks(self.volname)
+            for brick in bricks:
+                bpath = brick["brick"].split(":", 1)[-1]
+                brick.update(device_resolver.resolve(bpath))
+
+            self._bricks = bricks
+            self._bricks_time = now
+
+        return self._bricks
+
+    def sample(self):
+        """
+        Take a sample of the counters
+
+        :returns: List of brick details with the rates since the
+         previous sample, rates are None in the first sample of a
+         device, if its counters were reset since the previous
+         sample or if the device is not found
+            {
+                "volume": VOLUME_NAME,
+                "brick_index": BRICK_INDEX_IN_VOL_INFO,
+                "node_id": NODE_ID,
+                "brick": BRICK_NAME,
+                "fs": BRICK_FILESYSTEM,
+                "device": BRICK_DEVICE,
+                "parent_devices": PARENT_DEVICES,
+                "interval": SECONDS_SINCE_PREVIOUS_SAMPLE,
+                "rates": {
+                    "read_iops": READS_PER_SEC,
+                    "write_iops": WRITES_PER_SEC,
+                    "read_bytes_per_sec": READ_BYTES_PER_SEC,
+                    "write_bytes_per_sec": WRITE_BYTES_PER_SEC,
+                    "read_mb_per_sec": READ_MB_PER_SEC,
+                    "write_mb_per_sec": WRITE_MB_PER_SEC,
+                    "read_await_ms": AVG_READ_WAIT_MS,
+                    "write_await_ms": AVG_WRITE_WAIT_MS,
+                    "await_ms": AVG_WAIT_MS,
+                    "utilization_percent": UTILIZATION_PERCENT,
+                    "queue_depth": AVG_QUEUE_DEPTH,
+                    "ios_in_progress": IOS_CURRENTLY_IN_PROGRESS
+                }
+            }
+        """
+        with self._lock:
+            now = time.monotonic()
+            bricks = self._local_bricks(now)
+            devices = set(brick["device"] for brick in bricks)
+            raw = read_diskstats(devices)
+
+            current = {}
+            for device, counters in raw.items():
+                current[device] = (now, dict(
+                    (key, int(value)) for key, value in counters.items()))
+
+            rates = {}
+            for device, (sample_time, counters) in current.items():
+                prev = self._prev.get(device, None)
+                if prev is not None and sample_time > prev[0]:
+                    rates[device] = (sample_time - prev[0], diskstats_rates(
+                        prev[1], counters, sample_time - prev[0]))
+
+            # Devices not found in this sample are forgotten
+            self._prev = current
+
+        out = []
+        for brick in bricks:
+            interval, device_rates = rates.get(brick["device"],
+                                               (None, None))
+            brick = dict(brick, parent_devices=list(brick["parent_devices"]))
+            brick["interval"] = interval
+            brick["rates"] = device_rates
+            out.append(brick)
+
+        return out
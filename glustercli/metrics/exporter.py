@@ -0,0 +1,466 @@
+from argparse import ArgumentParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import logging
+import threading
+import time
+
+from glustercli.cli import volume
+from glustercli.metrics import utils
+from glustercli.metrics.process import local_processes
+from glustercli.metrics.utilization import local_utilization
+from glustercli.metrics.diskstats import local_diskstats
+
+DEFAULT_PORT = 9713
+DEFAULT_INTERVAL = 15
+DEFAULT_STATVFS_TIMEOUT = 5
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+DURATION_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+                    5.0, 10.0, 30.0, 60.0]
+
+SECTOR_SIZE = 512
+
+logger = logging.getLogger(__name__)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace(
+        "\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        if value == float("inf"):
+            return "+Inf"
+        return repr(value)
+
+    return str(int(value))
+
+
+class MetricFamily(object):
+    """
+    Samples of a metric, rendered in the OpenMetrics text format
+
+    :param name: Metric name, without the _total suffix for counters
+    :param metric_type: gauge, counter, info or histogram
+    :param help_text: Description of the metric
+    :param unit: Optional unit, name must end with it
+    """
+    def __init__(self, name, metric_type, help_text, unit=None):
+        self.name = name
+        self.metric_type = metric_type
+        self.help_text = help_text
+        self.unit = unit
+        self.samples = []
+
+    def add(self, labels, value, suffix=None):
+        """
+        Add a sample, None values are skipped. Suffix defaults to
+        _total for counters and _info for info metrics.
+        """
+        if value is None:
+            return
+
+        if suffix is None:
+            suffix = {"counter": "_total", "info": "_info"}.get(
+                self.metric_type, "")
+
+        self.samples.append((suffix, labels, value))
+
+    def render(self, out):
+        out.append("# TYPE {0} {1}".format(self.name, self.metric_type))
+        if self.unit is not None:
+            out.append("# UNIT {0} {1}".format(self.name, self.unit))
+        out.append("# HELP {0} {1}".format(self.name,
+                                           _escape(self.help_text)))
+        for suffix, labels, value in self.samples:
+            if labels:
+                label_str = "{" + ",".join(
+                    '{0}="{1}"'.format(key, _escape(val))
+                    for key, val in sorted(labels.items())) + "}"
+            else:
+                label_str = ""
+
+            out.append("{0}{1}{2} {3}".format(self.name, suffix, label_str,
+                                              _format_value(value)))
+
+
+class Histogram(object):
+    """
+    Cumulative histogram of observations
+    """
+    def __init__(self, buckets=None):
+        self.buckets = list(buckets or DURATION_BUCKETS)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for idx, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[idx] += 1
+        self.count += 1
+        self.sum += value
+
+    def add_to(self, family, labels):
+        for bound, count in zip(self.buckets, self.counts):
+            family.add(dict(labels, le=repr(float(bound))), count,
+                       suffix="_bucket")
+        family.add(dict(labels, le="+Inf"), self.count, suffix="_bucket")
+        family.add(labels, self.count, suffix="_count")
+        family.add(labels, self.sum, suffix="_sum")
+
+
+def collect_processes(options):
+    labels_keys = ["name", "volname", "brick_path", "role", "node_id",
+                   "hostname"]
+    families = {
+        "cpu": MetricFamily("gluster_process_cpu_percent", "gauge",
+                            "CPU usage since the previous collection"),
+        "mem": MetricFamily("gluster_process_memory_percent", "gauge",
+                            "Resident memory usage percentage"),
+        "rss": MetricFamily("gluster_process_resident_memory_bytes",
+                            "gauge", "Resident memory", "bytes"),
+        "vsz": MetricFamily("gluster_process_virtual_memory_bytes",
+                            "gauge", "Virtual memory", "bytes"),
+        "elapsed": MetricFamily("gluster_process_elapsed_seconds", "gauge",
+                                "Time since the process start", "seconds"),
+        "threads": MetricFamily("gluster_process_threads", "gauge",
+                                "Number of threads"),
+        "fds": MetricFamily("gluster_process_open_fds", "gauge",
+                            "Number of open file descriptors"),
+        "read": MetricFamily("gluster_process_read_bytes", "counter",
+                             "Bytes read from the storage", "bytes"),
+        "write": MetricFamily("gluster_process_write_bytes", "counter",
+                              "Bytes written to the storage", "bytes"),
+        "vctx": MetricFamily("gluster_process_voluntary_ctxt_switches",
+                             "counter", "Voluntary context switches"),
+        "nvctx": MetricFamily(
+            "gluster_process_nonvoluntary_ctxt_switches", "counter",
+            "Nonvoluntary context switches"),
+        "pid": MetricFamily("gluster_process_pid", "gauge", "Process ID")
+    }
+    # Processes are identified by their labels and not by the pid so
+    # that a restart does not create new series. Processes with the
+    # same labels(gsyncd workers) are numbered in the order they
+    # started.
+    procs = []
+    groups = {}
+    for proc in local_processes():
+        labels = dict((key if key != "volname" else "volume", proc[key])
+                      for key in labels_keys if proc.get(key) is not None)
+        procs.append((proc, labels))
+        groups.setdefault(tuple(sorted(labels.items())), []).append(
+            (proc, labels))
+
+    for group in groups.values():
+        if len(group) > 1:
+            group.sort(key=lambda item: (-item[0]["elapsed_time_sec"],
+                                         item[0]["pid"]))
+            for idx, (_, labels) in enumerate(group):
+                labels["index"] = idx
+
+    for proc, labels in procs:
+        families["pid"].add(labels, proc["pid"])
+        families["cpu"].add(labels, proc["percentage_cpu"])
+        families["mem"].add(labels, proc["percentage_memory"])
+        families["rss"].add(labels, proc["resident_memory"] * 1024)
+        families["vsz"].add(labels, proc["virtual_memory"] * 1024)
+        families["elapsed"].add(labels, proc["elapsed_time_sec"])
+        families["threads"].add(labels, proc["num_threads"])
+        families["fds"].add(labels, proc["num_fds"])
+        families["read"].add(labels, proc["read_bytes"])
+        families["write"].add(labels, proc["write_bytes"])
+        families["vctx"].add(labels, proc["voluntary_ctxt_switches"])
+        families["nvctx"].add(labels, proc["nonvoluntary_ctxt_switches"])
+
+    return list(families.values())
+
+
+def _brick_labels(brick):
+    return {"volume": brick["volume"], "brick": brick["brick"],
+            "node_id": brick["node_id"]}
+
+
+def collect_utilization(options):
+    fields = [
+        ("blocks_total", "gluster_brick_capacity_bytes",
+         "Brick filesystem size", True),
+        ("blocks_free", "gluster_brick_free_bytes",
+         "Brick filesystem free space", True),
+        ("blocks_avail", "gluster_brick_available_bytes",
+         "Brick filesystem space available to non root users", True),
+        ("inodes_total", "gluster_brick_inodes", "Brick filesystem inodes",
+         False),
+        ("inodes_free", "gluster_brick_inodes_free",
+         "Brick filesystem free inodes", False),
+        ("inodes_avail", "gluster_brick_inodes_available",
+         "Brick filesystem inodes available to non root users", False)
+    ]
+    families = [MetricFamily(name, "gauge", help_text,
+                             "bytes" if in_bytes else None)
+                for _, name, help_text, in_bytes in fields]
+    errors = MetricFamily("gluster_brick_utilization_error", "gauge",
+                          "1 if statvfs of the brick failed or timed out")
+    for brick in local_utilization(timeout=options.get("statvfs_timeout")):
+        labels = _brick_labels(brick)
+        errors.add(labels, 0 if brick.get("error") is None else 1)
+        for family, (key, _, _, in_bytes) in zip(families, fields):
+            value = brick[key]
+            if value is not None and in_bytes:
+                value = value * brick["block_size"]
+            family.add(labels, value)
+
+    return families + [errors]
+
+
+def collect_diskstats(options):
+    fields = [
+        ("reads_completed", "gluster_brick_device_reads",
+         "Reads completed", 1),
+        ("writes_completed", "gluster_brick_device_writes",
+         "Writes completed", 1),
+        ("sectors_read", "gluster_brick_device_read_bytes",
+         "Bytes read", SECTOR_SIZE),
+        ("sectors_written", "gluster_brick_device_written_bytes",
+         "Bytes written", SECTOR_SIZE),
+        ("time_spent_reading", "gluster_brick_device_read_time_seconds",
+         "Time spent reading", 0.001),
+        ("time_spent_writing", "gluster_brick_device_write_time_seconds",
+         "Time spent writing", 0.001),
+        ("time_spent_doing_ios", "gluster_brick_device_io_time_seconds",
+         "Time spent doing IOs", 0.001),
+        ("weighted_time_spent_doing_ios",
+         "gluster_brick_device_io_time_weighted_seconds",
+         "Weighted time spent doing IOs", 0.001)
+    ]
+    families = []
+    for _, name, help_text, scale in fields:
+        unit = None
+        if scale == SECTOR_SIZE:
+            unit = "bytes"
+        elif scale != 1:
+            unit = "seconds"
+        families.append(MetricFamily(name, "counter", help_text, unit))
+
+    in_progress = MetricFamily("gluster_brick_device_ios_in_progress",
+                               "gauge", "IOs currently in progress")
+    for brick in local_diskstats():
+        if brick["device"] == "unknown":
+            continue
+
+        labels = _brick_labels(brick)
+        labels["device"] = brick["device"]
+        for family, (key, _, _, scale) in zip(families, fields):
+            value = int(brick[key])
+            family.add(labels, value * scale)
+        in_progress.add(labels, int(brick["ios_currently_in_progress"]))
+
+    return families + [in_progress]
+
+
+def collect_volume_status(options):
+    vol_info = MetricFamily("gluster_volume", "info",
+                            "Volume type, status and health")
+    size_families = [
+        ("size_total", MetricFamily("gluster_volume_capacity_bytes",
+                                    "gauge", "Volume size", "bytes")),
+        ("size_used", MetricFamily("gluster_volume_used_bytes", "gauge",
+                                   "Volume used space", "bytes")),
+        ("size_free", MetricFamily("gluster_volume_free_bytes", "gauge",
+                                   "Volume free space", "bytes"))
+    ]
+    brick_online = MetricFamily("gluster_brick_online", "gauge",
+                                "1 if the brick process is online")
+    for vol in volume.status_detail(group_subvols=True):
+        labels = {"volume": vol["name"]}
+        vol_info.add(dict(labels, type=vol["type"], status=vol["status"],
+                          health=vol.get("health", "unknown")), 1)
+        for key, family in size_families:
+            family.add(labels, vol.get(key))
+
+        for subvol in vol["subvols"]:
+            for brick in subvol["bricks"]:
+                brick_online.add({"volume": vol["name"],
+                                  "brick": brick["name"],
+                                  "node_id": brick["uuid"]},
+                                 1 if brick["online"] else 0)
+
+    return [vol_info] + [family for _, family in size_families] + \
+        [brick_online]
+
+
+COLLECTORS = {
+    "processes": collect_processes,
+    "utilization": collect_utilization,
+    "diskstats": collect_diskstats,
+    "volume_status": collect_volume_status
+}
+
+
+class Exporter(object):
+    """
+    Runs the collectors in a background thread and keeps the rendered
+    output of the last collection
+
+    :param collectors: Names of the collectors to run, default is all
+    :param interval: Seconds between collections
+    :param options: Options passed to the collectors
+    """
+    def __init__(self, collectors=None, interval=DEFAULT_INTERVAL,
+                 options=None):
+        self.collectors = list(collectors or COLLECTORS)
+        for name in self.collectors:
+            if name not in COLLECTORS:
+                raise ValueError("Unknown collector: {0}".format(name))
+
+        self.interval = interval
+        self.options = options or {}
+        self._durations = dict((name, Histogram())
+                               for name in self.collectors)
+        self._errors = dict((name, 0) for name in self.collectors)
+        self._output = b"# EOF\n"
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def collect(self):
+        """
+        Run all the collectors once and update the output
+        """
+        families = []
+        for name in self.collectors:
+            start = time.monotonic()
+            try:
+                families += COLLECTORS[name](self.options)
+            except Exception:  # noqa # pylint: disable=broad-except
+                logger.exception("Collector %s failed", name)
+                self._errors[name] += 1
+            self._durations[name].observe(time.monotonic() - start)
+
+        families += self._self_metrics()
+        lines = []
+        for family in families:
+            family.render(lines)
+        lines.append("# EOF")
+        output = ("\n".join(lines) + "\n").encode("utf-8")
+        with self._lock:
+            self._output = output
+
+    def _self_metrics(self):
+        durations = MetricFamily(
+            "gluster_exporter_collection_duration_seconds", "histogram",
+            "Time taken by the collectors", "seconds")
+        errors = MetricFamily("gluster_exporter_collection_errors",
+                              "counter", "Failed collections")
+        last = MetricFamily("gluster_exporter_last_collection_seconds",
+                            "gauge", "Unix time of the last collection",
+                            "seconds")
+        for name in self.collectors:
+            self._durations[name].add_to(durations, {"collector": name})
+            errors.add({"collector": name}, self._errors[name])
+        last.add({}, time.time())
+        return [durations, errors, last]
+
+    def output(self):
+        with self._lock:
+            return self._output
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.collect()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """
+        Start the background collection thread
+        """
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run,
+                                        name="glustercli-exporter")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def make_handler(exporter):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):  # noqa # pylint: disable=invalid-name
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+
+            output = exporter.output()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(output)))
+            self.end_headers()
+            self.wfile.write(output)
+
+        def log_message(self, *args):  # noqa # pylint: disable=arguments-differ
+            logger.debug(*args)
+
+    return MetricsHandler
+
+
+def serve(exporter, address="", port=DEFAULT_PORT):
+    """
+    Start the exporter and serve the metrics over HTTP, blocks till
+    interrupted
+    """
+    exporter.start()
+    server = ThreadingHTTPServer((address, port), make_handler(exporter))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        exporter.stop()
+
+
+def main(args=None):
+    """
+    Exporter entry point, metrics are collected in a background thread
+    every interval seconds and the scrapes return the output of the
+    last collection.
+
+        glustercli-exporter --port 9713
+    """
+    parser = ArgumentParser(prog="glustercli-exporter",
+                            description="Gluster metrics exporter")
+    parser.add_argument("--address", default="",
+                        help="Address to listen on")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT,
+                        help="Port to listen on")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL,
+                        help="Seconds between collections")
+    parser.add_argument("--collectors", default=",".join(COLLECTORS),
+                        help="Comma separated list of collectors")
+    parser.add_argument("--statvfs-timeout", type=float,
+                        default=DEFAULT_STATVFS_TIMEOUT,
+                        help="Timeout for statvfs of bricks")
+    parser.add_argument("--brick-discovery", default=None,
+                        choices=utils.BRICK_DISCOVERY_BACKENDS,
+                        help="How to discover the local bricks")
+    pargs = parser.parse_args(args)
+
+    logging.basicConfig(level=logging.INFO)
+    if pargs.brick_discovery is not None:
+        utils.set_brick_discovery(pargs.brick_discovery)
+
+    exporter = Exporter(
+        collectors=[name.strip() for name in pargs.collectors.split(",")
+                    if name.strip()],
+        interval=pargs.interval,
+        options={"statvfs_timeout": pargs.statvfs_timeout})
+    serve(exporter, pargs.address, pargs.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,6 @@
-import subprocess
+import os
+import threading
+import time
 
 from glustercli.metrics import cmdlineparser
 
@@ -11,76 +13,259 @@ GLUSTER_PROCS = [
     "ssh",  # gsyncd related ssh connections
 ]
 
+PROC_ROOT = "/proc"
+
+# Fields of /proc/<pid>/stat after the command name(see proc(5)),
+# index 0 is the third field(state)
+STAT_UTIME = 11
+STAT_STIME = 12
+STAT_NUM_THREADS = 17
+STAT_STARTTIME = 19
+
+CLK_TCK = os.sysconf("SC_CLK_TCK")
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+def _split_cmdline(data):
+    # Arguments from the content of /proc/<pid>/cmdline, empty list
+    # for kernel threads and zombies
+    data = data.strip(b"\x00")
+    if not data:
+        return []
+
+    return data.decode("utf-8", "replace").split("\x00")
+
 
 def get_cmdline(pid):
-    args = []
     try:
-        with open("/proc/{0}/cmdline".format(pid), "r") as cmdline_file:
-            args = cmdline_file.read().strip("\x00").split("\x00")
+        with open("/proc/{0}/cmdline".format(pid), "rb") as cmdline_file:
+            return _split_cmdline(cmdline_file.read())
     except IOError:
-        pass
+        return []
 
-    return args
 
+class ProcessCollector(object):
+    """
+    Collects the details of Gluster processes by scanning /proc,
+    without running ps. Files are read into a buffer reused across
+    reads and calls.
 
-def local_processes():
-    # Run ps command and get all the details for all gluster processes
-    # ps --no-header -ww -o pid,pcpu,pmem,rsz,vsz,etimes,comm -C glusterd,..
-    # command can be used instead of comm, but if an argument has space then
-    # it is a problem
-    # for example `mytool "hello world" arg2` will be displayed as
-    # `mytool hello world arg2` in ps output
-    # Read cmdline from `/proc/<pid>/cmdline` to get full commands
-    # Use argparse to parse the output and form the key
-    # Example output of ps command:
-    # 6959  0.0  0.6 12840 713660  504076 glusterfs
-    details = []
-    cmd = ["ps",
-           "--no-header",  # No header in the output
-           "-ww",  # To set unlimited width to avoid crop
-           "-o",  # Output Format
-           "pid,pcpu,pmem,rsz,vsz,etimes,comm",
-           "-C",
-           ",".join(GLUSTER_PROCS)]
-
-    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE,
-                            stderr=subprocess.PIPE,
-                            universal_newlines=True)
-    out, _ = proc.communicate()
-    # No records in `ps` output
-    if proc.returncode != 0:
-        return details
+    CPU usage is computed from the CPU time consumed since the
+    previous collect of the same process, the first time a process is
+    seen the average since the process start is reported(as ps does).
+
+    :param proc_root: Path where procfs is mounted
+    :param names: Process(command) names to collect
+    """
+    def __init__(self, proc_root=PROC_ROOT, names=None):
+        self.proc_root = proc_root
+        self.names = frozenset(
+            name.encode() for name in (names or GLUSTER_PROCS))
+        self._buf = bytearray(4096)
+        self._lock = threading.Lock()
+        # (pid, starttime) => (cpu ticks, monotonic time)
+        self._prev = {}
+        self._mem_total_kb = None
+
+    def _read(self, path):
+        """
+        Read the file into the shared buffer, returns the number of
+        bytes read. Buffer is grown if the file does not fit.
+        """
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            size = 0
+            while True:
+                view = memoryview(self._buf)[size:]
+                num = os.readv(fd, [view])
+                view.release()
+                if num == 0:
+                    return size
+
+                size += num
+                if size == len(self._buf):
+                    self._buf.extend(bytes(len(self._buf)))
+        finally:
+            os.close(fd)
+
+    def _read_bytes(self, path):
+        # Buffer can not be resized while exported, read before taking
+        # the view
+        size = self._read(path)
+        return bytes(memoryview(self._buf)[:size])
+
+    def _mem_total(self):
+        if self._mem_total_kb is None:
+            data = self._read_bytes(os.path.join(self.proc_root, "meminfo"))
+            for line in data.split(b"\n"):
+                if line.startswith(b"MemTotal:"):
+                    self._mem_total_kb = int(line.split()[1])
+                    break
+            else:
+                self._mem_total_kb = 0
+
+        return self._mem_total_kb
 
-    data = out.strip()
+    def _uptime(self):
+        data = self._read_bytes(os.path.join(self.proc_root, "uptime"))
+        return float(data.split()[0])
 
-    for line in data.split("\n"):
-        # Sample data:
-        # 6959  0.0  0.6 12840 713660  504076 glusterfs
+    def _key_values(self, path, keys):
+        # Parse "Key: value" style files(status, io), returns None
+        # if the file is not readable
         try:
-            pid, pcpu, pmem, rsz, vsz, etimes, _ = line.strip().split()
-        except ValueError:
-            # May be bad ps output, for example
-            # 30916  0.0  0.0     0      0       7 python <defunct>
-            continue
+            data = self._read_bytes(path)
+        except OSError:
+            return None
+
+        values = {}
+        for line in data.split(b"\n"):
+            key, _, value = line.partition(b":")
+            if key in keys:
+                values[key] = int(value.split()[0])
+
+        return values
+
+    def _num_fds(self, pid):
+        try:
+            return len(os.listdir(os.path.join(self.proc_root, pid, "fd")))
+        except OSError:
+            return None
+
+    # noqa # pylint: disable=too-many-locals
+    def _process(self, pid, uptime, now, seen):
+        proc_dir = os.path.join(self.proc_root, pid)
+        stat = self._read_bytes(os.path.join(proc_dir, "stat"))
+        comm_start = stat.find(b"(")
+        comm_end = stat.rfind(b")")
+        if stat[comm_start + 1:comm_end] not in self.names:
+            return None
 
-        args = get_cmdline(int(pid))
+        fields = stat[comm_end + 2:].split()
+        cpu_ticks = int(fields[STAT_UTIME]) + int(fields[STAT_STIME])
+        starttime = int(fields[STAT_STARTTIME])
+
+        args = _split_cmdline(self._read_bytes(
+            os.path.join(proc_dir, "cmdline")))
         if not args:
-            # Unable to collect the cmdline, may be IO error and process died?
-            continue
+            # Kernel thread, zombie or the process exited
+            return None
 
         cmdname = args[0].split("/")[-1]
-        func_name = "parse_cmdline_" + cmdname
-        details_func = getattr(cmdlineparser, func_name, None)
-
-        if details_func is not None:
-            data = details_func(args)
-            if data is not None:
-                data["percentage_cpu"] = float(pcpu)
-                data["percentage_memory"] = float(pmem)
-                data["resident_memory"] = int(rsz)
-                data["virtual_memory"] = int(vsz)
-                data["elapsed_time_sec"] = int(etimes)
-                data["pid"] = int(pid)
-                details.append(data)
-
-    return details
+        details_func = getattr(cmdlineparser, "parse_cmdline_" + cmdname,
+                               None)
+        if details_func is None:
+            return None
+
+        data = details_func(args)
+        if data is None:
+            return None
+
+        statm = self._read_bytes(os.path.join(proc_dir, "statm")).split()
+        resident_kb = int(statm[1]) * PAGE_SIZE // 1024
+        elapsed = max(uptime - float(starttime) / CLK_TCK, 0)
+
+        key = (pid, starttime)
+        seen.add(key)
+        prev = self._prev.get(key, None)
+        self._prev[key] = (cpu_ticks, now)
+        if prev is not None and now > prev[1]:
+            pcpu = (cpu_ticks - prev[0]) * 100.0 / CLK_TCK / (now - prev[1])
+        elif elapsed > 0:
+            pcpu = cpu_ticks * 100.0 / CLK_TCK / elapsed
+        else:
+            pcpu = 0.0
+
+        mem_total = self._mem_total()
+        status = self._key_values(
+            os.path.join(proc_dir, "status"),
+            (b"voluntary_ctxt_switches", b"nonvoluntary_ctxt_switches"))
+        io_counters = self._key_values(os.path.join(proc_dir, "io"),
+                                       (b"read_bytes", b"write_bytes"))
+
+        data["percentage_cpu"] = round(pcpu, 1)
+        data["percentage_memory"] = round(
+            resident_kb * 100.0 / mem_total, 1) if mem_total else 0.0
+        data["resident_memory"] = resident_kb
+        data["virtual_memory"] = int(statm[0]) * PAGE_SIZE // 1024
+        data["elapsed_time_sec"] = int(elapsed)
+        data["pid"] = int(pid)
+        data["num_threads"] = int(fields[STAT_NUM_THREADS])
+        data["num_fds"] = self._num_fds(pid)
+        data["read_bytes"] = None
+        data["write_bytes"] = None
+        data["voluntary_ctxt_switches"] = None
+        data["nonvoluntary_ctxt_switches"] = None
+        if io_counters:
+            data["read_bytes"] = io_counters.get(b"read_bytes")
+            data["write_bytes"] = io_counters.get(b"write_bytes")
+        if status:
+            data["voluntary_ctxt_switches"] = status.get(
+                b"voluntary_ctxt_switches")
+            data["nonvoluntary_ctxt_switches"] = status.get(
+                b"nonvoluntary_ctxt_switches")
+
+        return data
+
+    def collect(self):
+        """
+        Collect the details of the running Gluster processes
+
+        :returns: List of process details, see local_processes
+        """
+        details = []
+        with self._lock:
+            now = time.monotonic()
+            uptime = self._uptime()
+            seen = set()
+            for pid in os.listdir(self.proc_root):
+                if not pid.isdigit():
+                    continue
+
+                try:
+                    data = self._process(pid, uptime, now, seen)
+                except (OSError, ValueError, IndexError):
+                    # Process exited while reading
+                    continue
+
+                if data is not None:
+                    details.append(data)
+
+            # Forget the processes which are no longer running
+            for key in set(self._prev) - seen:
+                del self._prev[key]
+
+        return details
+
+
+_collector = ProcessCollector()
+
+
+def local_processes():
+    """
+    Collect the details of local Gluster processes from /proc
+
+    :returns: List of process details, percentage_cpu is the CPU usage
+     since the previous call(average since the process start on the
+     first call). Fields that could not be read(for example io
+     counters of other users' processes) are None.
+        {
+            "name": PROCESS_NAME,
+            "node_id": NODE_ID,
+            "hostname": HOSTNAME,
+            ...(fields parsed from the cmdline)
+            "percentage_cpu": PERCENTAGE_CPU,
+            "percentage_memory": PERCENTAGE_MEMORY,
+            "resident_memory": RESIDENT_MEMORY_KB,
+            "virtual_memory": VIRTUAL_MEMORY_KB,
+            "elapsed_time_sec": ELAPSED_TIME_SEC,
+            "pid": PID,
+            "num_threads": NUM_THREADS,
+            "num_fds": NUM_OPEN_FDS,
+            "read_bytes": IO_READ_BYTES,
+            "write_bytes": IO_WRITE_BYTES,
+            "voluntary_ctxt_switches": VOLUNTARY_CTXT_SWITCHES,
+            "nonvoluntary_ctxt_switches": NONVOLUNTARY_CTXT_SWITCHES
+        }
+    """
+    return _collector.collect()
@@ -0,0 +1,302 @@
+from array import array
+from collections import deque
+import logging
+import threading
+import time
+
+from glustercli.cli import volume
+
+DEFAULT_HISTORY = 60
+DEFAULT_PROFILE_INTERVAL = 10
+
+# Fields of a FOP sample in the ring buffer
+SAMPLE_TIME = 0
+SAMPLE_DURATION = 1
+SAMPLE_HITS = 2
+SAMPLE_AVG_LATENCY = 3
+SAMPLE_MIN_LATENCY = 4
+SAMPLE_MAX_LATENCY = 5
+
+logger = logging.getLogger(__name__)
+
+
+def _fop_stats(stats):
+    """
+    (name, hits, avg_latency, min_latency, max_latency) of each FOP in
+    the parsed FOP stats, columnar or list of single key dicts
+    [{FOP_NAME: {"hits", "avg_latency", ...}}, ...]
+    """
+    if isinstance(stats, dict):
+        return zip(stats["name"], stats["hits"], stats["avg_latency"],
+                   stats["min_latency"], stats["max_latency"])
+
+    return [(name, values["hits"], values["avg_latency"],
+             values["min_latency"], values["max_latency"])
+            for fop in stats for name, values in fop.items()]
+
+
+def _add_samples(total, samples):
+    hits = 0
+    duration = 0.0
+    for sample in samples:
+        duration += sample[SAMPLE_DURATION]
+        if not sample[SAMPLE_HITS]:
+            continue
+
+        hits += sample[SAMPLE_HITS]
+        total[2] += sample[SAMPLE_HITS] * sample[SAMPLE_AVG_LATENCY]
+        if total[3] is None or sample[SAMPLE_MIN_LATENCY] < total[3]:
+            total[3] = sample[SAMPLE_MIN_LATENCY]
+        if sample[SAMPLE_MAX_LATENCY] > total[4]:
+            total[4] = sample[SAMPLE_MAX_LATENCY]
+
+    total[0] += hits
+    if duration:
+        # Rates of the bricks are summed
+        total[1] += hits / duration
+
+
+class ProfileCollector(object):
+    """
+    Polls the incremental profile info of a Volume and keeps a ring
+    buffer of the interval samples per brick and FOP. Profiling must
+    be started on the Volume(volume.profile_start).
+
+    Incremental info reports the stats since its previous call, by
+    any client. Poll a Volume from only one collector, otherwise the
+    intervals are split between the pollers.
+
+    :param volname: Volume Name
+    :param history: Number of samples kept per brick and FOP
+    :param interval: Seconds between polls of the background thread
+    """
+    def __init__(self, volname, history=DEFAULT_HISTORY,
+                 interval=DEFAULT_PROFILE_INTERVAL):
+        self.volname = volname
+        self.history = history
+        self.interval = interval
+        self.samples = 0
+        self.errors = 0
+        # brick => {fop => deque of sample tuples}
+        self._fops = {}
+        # brick => deque of (time, duration, read bytes, write bytes)
+        self._bricks = {}
+        self._last_poll = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _ring(self, rings, key):
+        ring = rings.get(key, None)
+        if ring is None:
+            ring = deque(maxlen=self.history)
+            rings[key] = ring
+
+        return ring
+
+    def add(self, profile, sample_time=None):
+        """
+        Add a parsed incremental profile info to the ring buffers
+
+        :param profile: Volume profile, as returned by
+         volume.profile_info(volname, "incremental")[0](columnar or
+         not)
+        :param sample_time: Unix time of the sample, default is now
+        """
+        if sample_time is None:
+            sample_time = time.time()
+
+        with self._lock:
+            elapsed = None
+            if self._last_poll is not None:
+                elapsed = sample_time - self._last_poll
+            self._last_poll = sample_time
+
+            for brick in profile["bricks"]:
+                name = brick["brick_name"]
+                # Duration is reported in whole seconds, fallback to
+                # the time since the previous poll if it is zero
+                duration = brick["interval_total_duration"] or elapsed or 0
+                self._ring(self._bricks, name).append((
+                    sample_time, duration,
+                    brick["interval_total_read_bytes"],
+                    brick["interval_total_write_bytes"]))
+
+                brick_fops = self._fops.setdefault(name, {})
+                seen = set()
+                for fop, hits, avg_latency, min_latency, max_latency in \
+                        _fop_stats(brick["interval_fop_stats"]):
+                    seen.add(fop)
+                    self._ring(brick_fops, fop).append((
+                        sample_time, duration, hits, avg_latency,
+                        min_latency, max_latency))
+
+                # FOPs without calls in this interval are not listed,
+                # record zero hits so that the series stay aligned
+                for fop, ring in brick_fops.items():
+                    if fop not in seen:
+                        ring.append((sample_time, duration, 0, 0.0, 0.0, 0.0))
+
+            self.samples += 1
+
+    def sample(self):
+        """
+        Poll the incremental profile info of the Volume once
+
+        :returns: Cluster wide rollup of the new interval, see rollup
+        """
+        profile = volume.profile_info(self.volname, "incremental",
+                                      columnar=True)
+        if profile:
+            self.add(profile[0])
+
+        return self.rollup(window=1)
+
+    def fops(self):
+        """
+        :returns: Sorted list of FOP names seen so far
+        """
+        with self._lock:
+            return sorted(set(fop for brick_fops in self._fops.values()
+                              for fop in brick_fops))
+
+    def bricks(self):
+        """
+        :returns: List of brick names seen so far
+        """
+        with self._lock:
+            return list(self._bricks)
+
+    def series(self, brick, fop):
+        """
+        Samples of a FOP of a brick as columns, oldest first
+
+        :param brick: Brick name
+        :param fop: FOP name, for example "LOOKUP"
+        :returns: Dict of columns, empty columns if no samples
+            {
+                "time": array("d"),  # Unix time of the samples
+                "duration": array("d"),  # Interval in seconds
+                "hits": array("Q"),
+                "hits_per_sec": array("d"),
+                "avg_latency": array("d"),  # Microseconds
+                "min_latency": array("d"),
+                "max_latency": array("d")
+            }
+        """
+        with self._lock:
+            samples = list(self._fops.get(brick, {}).get(fop, ()))
+
+        out = {
+            "time": array("d", [sample[SAMPLE_TIME] for sample in samples]),
+            "duration": array("d", [sample[SAMPLE_DURATION]
+                                    for sample in samples]),
+            "hits": array("Q", [sample[SAMPLE_HITS] for sample in samples]),
+            "avg_latency": array("d", [sample[SAMPLE_AVG_LATENCY]
+                                       for sample in samples]),
+            "min_latency": array("d", [sample[SAMPLE_MIN_LATENCY]
+                                       for sample in samples]),
+            "max_latency": array("d", [sample[SAMPLE_MAX_LATENCY]
+                                       for sample in samples]),
+        }
+        out["hits_per_sec"] = array("d", [
+            hits / duration if duration else 0.0
+            for hits, duration in zip(out["hits"], out["duration"])])
+        return out
+
+    def brick_series(self, brick):
+        """
+        Read and write bytes of a brick as columns, oldest first
+
+        :param brick: Brick name
+        :returns: Dict of columns "time", "duration"(array("d")),
+         "read_bytes" and "write_bytes"(array("Q"))
+        """
+        with self._lock:
+            samples = list(self._bricks.get(brick, ()))
+
+        return {
+            "time": array("d", [sample[0] for sample in samples]),
+            "duration": array("d", [sample[1] for sample in samples]),
+            "read_bytes": array("Q", [sample[2] for sample in samples]),
+            "write_bytes": array("Q", [sample[3] for sample in samples]),
+        }
+
+    def rollup(self, window=None, brick=None):
+        """
+        Aggregate the samples of each FOP across the bricks. Hits per
+        second are summed across the bricks, average latency is
+        weighted by the hits.
+
+        :param window: Number of latest samples to aggregate, default
+         is all the samples in the ring buffers
+        :param brick: Aggregate only this brick
+        :returns: Dict of columns, one entry per FOP in "fops" order
+            {
+                "fops": [FOP_NAME, ...],
+                "hits": array("Q"),
+                "hits_per_sec": array("d"),
+                "avg_latency": array("d"),  # Microseconds
+                "min_latency": array("d"),
+                "max_latency": array("d")
+            }
+        """
+        totals = {}
+        with self._lock:
+            for name, brick_fops in self._fops.items():
+                if brick is not None and name != brick:
+                    continue
+
+                for fop, ring in brick_fops.items():
+                    samples = list(ring)
+                    if window is not None:
+                        samples = samples[-window:]
+
+                    # hits, hits/s, latency sum, min, max
+                    total = totals.setdefault(fop, [0, 0.0, 0.0, None, 0.0])
+                    _add_samples(total, samples)
+
+        fops = sorted(totals)
+        out = {
+            "fops": fops,
+            "hits": array("Q"),
+            "hits_per_sec": array("d"),
+            "avg_latency": array("d"),
+            "min_latency": array("d"),
+            "max_latency": array("d"),
+        }
+        for fop in fops:
+            hits, hits_per_sec, latency_sum, min_latency, max_latency = \
+                totals[fop]
+            out["hits"].append(hits)
+            out["hits_per_sec"].append(hits_per_sec)
+            out["avg_latency"].append(latency_sum / hits if hits else 0.0)
+            out["min_latency"].append(min_latency or 0.0)
+            out["max_latency"].append(max_latency)
+
+        return out
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.sample()
+            except Exception:  # noqa # pylint: disable=broad-except
+                logger.exception("Profile info of %s failed", self.volname)
+                self.errors += 1
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """
+        Start polling in a background thread, every interval seconds
+        """
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run,
+                                        name="glustercli-profile")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,260 @@
+from bisect import bisect_right
+import threading
+
+from glustercli.cli import volume
+
+EVENT_VOLUME_ADDED = "volume_added"
+EVENT_VOLUME_REMOVED = "volume_removed"
+EVENT_VOLUME_STATUS = "volume_status"
+EVENT_VOLUME_HEALTH = "volume_health"
+EVENT_SUBVOL_HEALTH = "subvol_health"
+EVENT_BRICK_ADDED = "brick_added"
+EVENT_BRICK_REMOVED = "brick_removed"
+EVENT_BRICK_ONLINE = "brick_online"
+EVENT_BRICK_OFFLINE = "brick_offline"
+EVENT_BRICK_RESTARTED = "brick_restarted"
+EVENT_BRICK_PORT = "brick_port"
+EVENT_CAPACITY_ABOVE = "capacity_above"
+EVENT_CAPACITY_BELOW = "capacity_below"
+
+# Fraction of the size or inodes used
+DEFAULT_CAPACITY_THRESHOLDS = (0.8, 0.9, 0.95)
+
+CAPACITY_SIZE = "size"
+CAPACITY_INODES = "inodes"
+
+
+def _event(event_type, vol, old, new, subvol=None, brick=None):
+    return {
+        "type": event_type,
+        "volume": vol["name"],
+        "subvol": subvol,
+        "brick": brick,
+        "old": old,
+        "new": new,
+    }
+
+
+def _vol_bricks(vol):
+    """
+    Index of the bricks of a Volume, grouped by subvols or not
+
+    :returns: Dict of brick name => (subvol name, brick)
+    """
+    subvols = vol.get("subvols", None)
+    if subvols is None:
+        return dict((brick["name"], (None, brick))
+                    for brick in vol["bricks"])
+
+    return dict((brick["name"], (subvol["name"], brick))
+                for subvol in subvols for brick in subvol["bricks"])
+
+
+def _used_ratio(value, kind):
+    total = value.get(kind + "_total", 0)
+    if not total:
+        return None
+
+    return value.get(kind + "_used", 0) / total
+
+
+def _capacity_events(old, new, thresholds, vol, subvol=None, brick=None):
+    events = []
+    for kind in (CAPACITY_SIZE, CAPACITY_INODES):
+        old_ratio = _used_ratio(old, kind)
+        new_ratio = _used_ratio(new, kind)
+        if old_ratio is None or new_ratio is None:
+            continue
+
+        # Number of thresholds reached
+        old_level = bisect_right(thresholds, old_ratio)
+        new_level = bisect_right(thresholds, new_ratio)
+        if old_level == new_level:
+            continue
+
+        if new_level > old_level:
+            event = _event(EVENT_CAPACITY_ABOVE, vol, old_ratio, new_ratio,
+                           subvol, brick)
+            # Highest threshold crossed
+            event["threshold"] = thresholds[new_level - 1]
+        else:
+            event = _event(EVENT_CAPACITY_BELOW, vol, old_ratio, new_ratio,
+                           subvol, brick)
+            event["threshold"] = thresholds[new_level]
+
+        event["capacity"] = kind
+        events.append(event)
+
+    return events
+
+
+def _brick_events(old_brick, new_brick, thresholds, vol, subvol, name):
+    events = []
+    if old_brick["online"] != new_brick["online"]:
+        event_type = EVENT_BRICK_ONLINE if new_brick["online"] \
+            else EVENT_BRICK_OFFLINE
+        events.append(_event(event_type, vol, old_brick["online"],
+                             new_brick["online"], subvol, name))
+    elif new_brick["online"]:
+        if old_brick["pid"] != new_brick["pid"]:
+            events.append(_event(EVENT_BRICK_RESTARTED, vol,
+                                 old_brick["pid"], new_brick["pid"],
+                                 subvol, name))
+
+        if old_brick["ports"] != new_brick["ports"]:
+            events.append(_event(EVENT_BRICK_PORT, vol, old_brick["ports"],
+                                 new_brick["ports"], subvol, name))
+
+    # Offline bricks report zero sizes, compare only online ones
+    if old_brick["online"] and new_brick["online"]:
+        events += _capacity_events(old_brick, new_brick, thresholds, vol,
+                                   subvol, name)
+
+    return events
+
+
+def _volume_events(old_vol, new_vol, thresholds):
+    events = []
+    if old_vol["status"] != new_vol["status"]:
+        events.append(_event(EVENT_VOLUME_STATUS, new_vol, old_vol["status"],
+                             new_vol["status"]))
+
+    old_health = old_vol.get("health", None)
+    new_health = new_vol.get("health", None)
+    if old_health != new_health:
+        events.append(_event(EVENT_VOLUME_HEALTH, new_vol, old_health,
+                             new_health))
+
+    old_subvols = dict((subvol["name"], subvol)
+                       for subvol in old_vol.get("subvols", None) or [])
+    for subvol in new_vol.get("subvols", None) or []:
+        old_subvol = old_subvols.get(subvol["name"], None)
+        if old_subvol is None:
+            continue
+
+        old_health = old_subvol.get("health", None)
+        new_health = subvol.get("health", None)
+        if old_health != new_health:
+            events.append(_event(EVENT_SUBVOL_HEALTH, new_vol, old_health,
+                                 new_health, subvol=subvol["name"]))
+
+    # Volume sizes are available only with group_subvols
+    events += _capacity_events(old_vol, new_vol, thresholds, new_vol)
+
+    old_bricks = _vol_bricks(old_vol)
+    new_bricks = _vol_bricks(new_vol)
+    for name, (subvol, brick) in new_bricks.items():
+        old = old_bricks.get(name, None)
+        if old is None:
+            events.append(_event(EVENT_BRICK_ADDED, new_vol, None,
+                                 brick["online"], subvol, name))
+            continue
+
+        events += _brick_events(old[1], brick, thresholds, new_vol, subvol,
+                                name)
+
+    for name, (subvol, brick) in old_bricks.items():
+        if name not in new_bricks:
+            events.append(_event(EVENT_BRICK_REMOVED, new_vol,
+                                 brick["online"], None, subvol, name))
+
+    return events
+
+
+def diff_status(old, new, thresholds=DEFAULT_CAPACITY_THRESHOLDS):
+    """
+    Compare two Volume status snapshots and list the changes. Bricks
+    and Volumes are matched by name, snapshots can be grouped by
+    subvols or not and dicts or records(volume.status_detail output).
+    Health and Volume capacity events need group_subvols=True.
+
+    :param old: Previous output of volume.status_detail
+    :param new: Latest output of volume.status_detail
+    :param thresholds: Fractions of size or inodes used, an
+     event is emitted when a brick or Volume crosses any of them
+    :returns: List of change events, in the order of new
+        {
+            "type": EVENT_TYPE,  # EVENT_* constants, for example
+                                 # "brick_offline"
+            "volume": VOLUME_NAME,
+            "subvol": SUBVOL_NAME,  # None if not grouped by subvols
+                                    # or not a brick/subvol event
+            "brick": BRICK_NAME,  # None if not a brick event
+            "old": OLD_VALUE,  # online, pid, ports, health, status
+            "new": NEW_VALUE,  # or used fraction, None if added or
+                               # removed
+            "threshold": THRESHOLD,  # Only for capacity events
+            "capacity": "size" or "inodes"  # Only for capacity events
+        }
+    """
+    thresholds = sorted(thresholds)
+    old_vols = dict((vol["name"], vol) for vol in old)
+    new_names = set()
+    events = []
+    for vol in new:
+        new_names.add(vol["name"])
+        old_vol = old_vols.get(vol["name"], None)
+        if old_vol is None:
+            events.append(_event(EVENT_VOLUME_ADDED, vol, None,
+                                 vol["status"]))
+            continue
+
+        events += _volume_events(old_vol, vol, thresholds)
+
+    for vol in old:
+        if vol["name"] not in new_names:
+            events.append(_event(EVENT_VOLUME_REMOVED, vol, vol["status"],
+                                 None))
+
+    return events
+
+
+class StatusDiffer(object):
+    """
+    Keeps the last Volume status snapshot and emits the changes of
+    every new snapshot, see diff_status. The first snapshot is the
+    baseline and emits no events.
+
+    :param volname: Volume Name or List of volumes for sample,
+     default is all the Volumes
+    :param thresholds: Fractions of size or inodes used
+    """
+    def __init__(self, volname=None,
+                 thresholds=DEFAULT_CAPACITY_THRESHOLDS):
+        self.volname = volname
+        self.thresholds = thresholds
+        self.last = None
+        self._lock = threading.Lock()
+
+    def update(self, status):
+        """
+        Compare a Volume status snapshot with the previous one
+
+        :param status: Output of volume.status_detail
+        :returns: List of change events, see diff_status
+        """
+        with self._lock:
+            last = self.last
+            self.last = status
+
+        if last is None:
+            return []
+
+        return diff_status(last, status, self.thresholds)
+
+    def sample(self):
+        """
+        Fetch the Volume status(group_subvols=True) and compare it
+        with the previous snapshot
+
+        :returns: List of change events, see diff_status
+        """
+        return self.update(volume.status_detail(self.volname,
+                                                group_subvols=True))
+
+    def reset(self):
+        """
+        Forget the last snapshot, the next one is a new baseline
+        """
+        with self._lock:
+            self.last = None
@@ -1,14 +1,230 @@
+from concurrent.futures import Future
 import os
+import queue
+import threading
+import time
 
 from glustercli.metrics.utils import get_local_bricks
 
+DEFAULT_STATVFS_WORKERS = 8
+# Threads stuck in a statvfs beyond the timeout are replaced, up to
+# these many stuck threads
+DEFAULT_MAX_STUCK_WORKERS = 32
 
-def local_utilization(volname=None):
+# Bricks which timed out are skipped for the backoff window, doubled
+# on every consecutive timeout up to the max
+STATVFS_BACKOFF = 60
+STATVFS_MAX_BACKOFF = 900
+
+UTILIZATION_FIELDS = ["block_size", "blocks_total", "blocks_free",
+                      "blocks_avail", "inodes_total", "inodes_free",
+                      "inodes_avail"]
+
+
+def _update_utilization(brick, stat):
+    brick["block_size"] = stat.f_frsize
+    brick["blocks_total"] = stat.f_blocks
+    brick["blocks_free"] = stat.f_bfree
+    brick["blocks_avail"] = stat.f_bavail
+    brick["inodes_total"] = stat.f_files
+    brick["inodes_free"] = stat.f_ffree
+    brick["inodes_avail"] = stat.f_favail
+
+
+class StatvfsPool(object):
+    """
+    Bounded pool of daemon threads running statvfs. A statvfs stuck
+    on a hung mount keeps its thread blocked, daemon threads make sure
+    that does not block the interpreter exit. Threads still running a
+    statvfs after the timeout are not counted against max_workers,
+    replacements are started(up to max_stuck stuck threads) so that
+    the healthy bricks are not queued behind the hung ones. Paths with
+    a statvfs still in flight are not submitted again, and paths which
+    timed out are skipped for a backoff window.
+    """
+    def __init__(self, max_workers=DEFAULT_STATVFS_WORKERS,
+                 max_stuck=DEFAULT_MAX_STUCK_WORKERS):
+        self.max_workers = max_workers
+        self.max_stuck = max_stuck
+        self._tasks = queue.Queue()
+        self._workers = 0
+        # Futures running past their timeout
+        self._stuck = set()
+        # Future => time its statvfs started
+        self._started = {}
+        self._inflight = {}
+        # path => (skip until, backoff seconds)
+        self._backoff = {}
+        self._lock = threading.Lock()
+        # Notified when a statvfs starts or finishes
+        self._changed = threading.Condition(self._lock)
+
+    def _worker(self):
+        while True:
+            path, fut = self._tasks.get()
+            with self._lock:
+                running = fut.set_running_or_notify_cancel()
+                if running:
+                    self._started[fut] = time.monotonic()
+                    self._changed.notify_all()
+
+            if running:
+                try:
+                    fut.set_result(os.statvfs(path))
+                except Exception as err:  # noqa # pylint: disable=broad-except
+                    fut.set_exception(err)
+
+            with self._lock:
+                if self._inflight.get(path) is fut:
+                    del self._inflight[path]
+
+                self._started.pop(fut, None)
+                self._stuck.discard(fut)
+                self._changed.notify_all()
+                # Surplus thread, started while this one was stuck
+                if self._workers - len(self._stuck) > self.max_workers:
+                    self._workers -= 1
+                    return
+
+    def _start_worker(self):
+        # Caller must hold the lock
+        if self._workers - len(self._stuck) < self.max_workers and \
+           self._workers < self.max_workers + self.max_stuck:
+            thrd = threading.Thread(target=self._worker,
+                                    name="glustercli-statvfs")
+            thrd.daemon = True
+            thrd.start()
+            self._workers += 1
+
+    def _submit(self, path):
+        fut = Future()
+        self._inflight[path] = fut
+        self._start_worker()
+        self._tasks.put((path, fut))
+        return fut
+
+    def _wait(self, futures, timeout):
+        # Caller must hold the lock. Waits till every future is done,
+        # ran past the timeout or can not start
+        timed_out = set()
+        while True:
+            now = time.monotonic()
+            next_deadline = None
+            queued = False
+            for path, fut in futures.items():
+                if fut.done() or path in timed_out:
+                    continue
+
+                started = self._started.get(fut, None)
+                if started is None:
+                    queued = True
+                    continue
+
+                deadline = started + timeout
+                if deadline <= now:
+                    # Stuck, start a replacement for the queued paths
+                    timed_out.add(path)
+                    self._stuck.add(fut)
+                    self._start_worker()
+                elif next_deadline is None or deadline < next_deadline:
+                    next_deadline = deadline
+
+            if next_deadline is None:
+                # Every thread is stuck and no more can be started,
+                # the queued paths will not run
+                if not queued or (
+                        len(self._stuck) >= self._workers and
+                        self._workers >= self.max_workers + self.max_stuck):
+                    return
+
+                self._changed.wait()
+            else:
+                self._changed.wait(next_deadline - now)
+
+    def statvfs(self, paths, timeout):
+        """
+        Run statvfs of the paths in parallel
+
+        :param paths: List of paths
+        :param timeout: Seconds to wait for each path, counted from
+         the time its statvfs starts running
+        :returns: Dict of path to (statvfs result, error), error is
+         "timeout", "skipped" or the error message
+        """
+        now = time.monotonic()
+        futures = {}
+        results = {}
+        with self._lock:
+            for path in paths:
+                if path in futures or path in results:
+                    continue
+
+                skip_until, _ = self._backoff.get(path, (0, 0))
+                if skip_until > now or path in self._inflight:
+                    results[path] = (None, "skipped")
+                    continue
+
+                futures[path] = self._submit(path)
+
+            self._wait(futures, timeout)
+
+            for path, fut in futures.items():
+                if fut.cancel():
+                    # Never started, not backed off
+                    if self._inflight.get(path) is fut:
+                        del self._inflight[path]
+                    results[path] = (None, "timeout")
+                    continue
+
+                if not fut.done():
+                    _, backoff = self._backoff.get(path, (0, 0))
+                    backoff = min(backoff * 2 or STATVFS_BACKOFF,
+                                  STATVFS_MAX_BACKOFF)
+                    self._backoff[path] = (time.monotonic() + backoff,
+                                           backoff)
+                    results[path] = (None, "timeout")
+                    continue
+
+                self._backoff.pop(path, None)
+                err = fut.exception()
+                if err is not None:
+                    results[path] = (None, str(err))
+                else:
+                    results[path] = (fut.result(), None)
+
+        return results
+
+
+_statvfs_pool = None
+_statvfs_pool_lock = threading.Lock()
+
+
+def _get_statvfs_pool(max_workers):
+    global _statvfs_pool
+
+    with _statvfs_pool_lock:
+        if _statvfs_pool is None:
+            _statvfs_pool = StatvfsPool(max_workers)
+        else:
+            _statvfs_pool.max_workers = max_workers
+
+        return _statvfs_pool
+
+
+def local_utilization(volname=None, timeout=None,
+                      max_workers=DEFAULT_STATVFS_WORKERS):
     """
     Collect Utilization details of local bricks
 
     :param volname: Volume Name
-    :returns: List of utilization information
+    :param timeout: If set, statvfs of bricks are run in parallel and
+     the bricks not done within timeout seconds of their statvfs
+     starting are returned with the error "timeout". A brick which
+     timed out is skipped(error "skipped") for a backoff window and
+     while its previous statvfs is still running.
+    :param max_workers: Maximum number of parallel statvfs calls
+    :returns: List of utilization information, with error as None
+     if timeout is set and the statvfs succeeded
         {
             "volume": VOLUME_NAME,
             "brick_index": BRICK_INDEX_IN_VOL_INFO,
@@ -20,22 +236,30 @@ def local_utilization(volname=None):
             "blocks_avail": ST_F_BAVAIL,
             "inodes_total": ST_F_FILES,
             "inodes_free": ST_F_FFREE,
-            "inodes_avail": ST_F_FAVAIL
+            "inodes_avail": ST_F_FAVAIL,
+            "error": ERROR  # Only if timeout is set
         }
     """
 
     local_bricks = get_local_bricks(volname)
 
-    for brick in local_bricks:
-        bpath = brick["brick"].split(":", 1)[-1]
-        stat = os.statvfs(bpath)
-
-        brick["block_size"] = stat.f_frsize
-        brick["blocks_total"] = stat.f_blocks
-        brick["blocks_free"] = stat.f_bfree
-        brick["blocks_avail"] = stat.f_bavail
-        brick["inodes_total"] = stat.f_files
-        brick["inodes_free"] = stat.f_ffree
-        brick["inodes_avail"] = stat.f_favail
+    if timeout is None:
+        for brick in local_bricks:
+            bpath = brick["brick"].split(":", 1)[-1]
+            _update_utilization(brick, os.statvfs(bpath))
+
+        return local_bricks
+
+    paths = [brick["brick"].split(":", 1)[-1] for brick in local_bricks]
+    results = _get_statvfs_pool(max_workers).statvfs(paths, timeout)
+    for brick, bpath in zip(local_bricks, paths):
+        stat, err = results[bpath]
+        if stat is None:
+            for field in UTILIZATION_FIELDS:
+                brick[field] = None
+        else:
+            _update_utilization(brick, stat)
+
+        brick["error"] = err
 
     return local_bricks
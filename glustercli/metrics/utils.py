@@ -1,8 +1,15 @@
-from glustercli.cli import volume
+import os
+import threading
 
+GLUSTERD_WORKDIR = "/var/lib/glusterd"
 UUID_FILE = "/var/lib/glusterd/glusterd.info"
 
+BRICK_DISCOVERY_CLI = "cli"
+BRICK_DISCOVERY_STORE = "store"
+BRICK_DISCOVERY_BACKENDS = [BRICK_DISCOVERY_CLI, BRICK_DISCOVERY_STORE]
+
 myuuid = None
+brick_discovery = BRICK_DISCOVERY_CLI
 
 
 def get_node_id():
@@ -22,17 +29,138 @@ def get_node_id():
     return val
 
 
+def set_brick_discovery(backend):
+    """
+    Set how the local bricks are discovered for the metrics
+
+    :param backend: "cli"(default) to use Volume info from glusterd,
+     "store" to read the glusterd store(/var/lib/glusterd/vols)
+     directly, which works even if glusterd is slow or down. Falls
+     back to "cli" if a brick in the store has no uuid.
+    """
+    global brick_discovery
+
+    if backend not in BRICK_DISCOVERY_BACKENDS:
+        raise ValueError("Invalid brick discovery backend: {0}".format(
+            backend))
+
+    brick_discovery = backend
+
+
+def _read_store_file(path):
+    values = {}
+    with open(path) as store_file:
+        for line in store_file:
+            key, sep, value = line.rstrip("\n").partition("=")
+            if sep:
+                values[key] = value
+
+    return values
+
+
+class BrickStore(object):
+    """
+    Reads the bricks of Volumes from the glusterd store. Parsed
+    Volumes are cached till the mtime of the Volume's info file or
+    bricks directory changes(glusterd replaces these files on every
+    update).
+    """
+    def __init__(self, workdir=GLUSTERD_WORKDIR):
+        self.workdir = workdir
+        # volname => (mtimes, bricks)
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def _volume_bricks(self, volname):
+        vol_dir = os.path.join(self.workdir, "vols", volname)
+        info_path = os.path.join(vol_dir, "info")
+        bricks_dir = os.path.join(vol_dir, "bricks")
+        try:
+            mtimes = (os.stat(info_path).st_mtime_ns,
+                      os.stat(bricks_dir).st_mtime_ns)
+        except OSError:
+            # Not a Volume or Volume is being deleted
+            return None
+
+        cached = self._cache.get(volname, None)
+        if cached is not None and cached[0] == mtimes:
+            return cached[1]
+
+        info = _read_store_file(info_path)
+        brick_keys = []
+        for key, value in info.items():
+            if key.startswith("brick-") and key[6:].isdigit():
+                brick_keys.append((int(key[6:]), value))
+
+        bricks = []
+        for _, brick_file in sorted(brick_keys):
+            brickinfo = _read_store_file(os.path.join(bricks_dir,
+                                                      brick_file))
+            bricks.append({
+                "name": "{0}:{1}".format(brickinfo["hostname"],
+                                         brickinfo["path"]),
+                "uuid": brickinfo.get("uuid", None)
+            })
+
+        self._cache[volname] = (mtimes, bricks)
+        return bricks
+
+    def volumes(self, volname=None):
+        """
+        List of (VOLUME_NAME, LIST_OF_BRICKS) from the store
+        """
+        if volname is not None:
+            volnames = [volname]
+        else:
+            try:
+                volnames = sorted(os.listdir(os.path.join(self.workdir,
+                                                          "vols")))
+            except OSError:
+                volnames = []
+
+        out = []
+        with self._lock:
+            for name in volnames:
+                bricks = self._volume_bricks(name)
+                if bricks is not None:
+                    out.append((name, bricks))
+
+            # Forget the deleted Volumes
+            if volname is None:
+                for name in set(self._cache) - set(volnames):
+                    del self._cache[name]
+
+        return out
+
+
+brick_store = BrickStore()
+
+
+def _volume_bricks(volname):
+    if brick_discovery == BRICK_DISCOVERY_STORE:
+        volumes = brick_store.volumes(volname)
+        # Local bricks are identified by the uuid, which is missing
+        # in the brick files written by older glusterd versions
+        if all(brick["uuid"] is not None
+               for _, bricks in volumes for brick in bricks):
+            return volumes
+
+    # Imported here so that the store backend does not load the CLI
+    from glustercli.cli import volume  # noqa # pylint: disable=import-outside-toplevel
+
+    return [(vol["name"], vol["bricks"]) for vol in volume.info(volname)]
+
+
 def get_local_bricks(volname=None):
     local_node_id = get_node_id()
-    volinfo = volume.info(volname)
     bricks = []
-    for vol in volinfo:
-        for jdx, brick in enumerate(vol["bricks"]):
+    for name, vol_bricks in _volume_bricks(volname):
+        for jdx, brick in enumerate(vol_bricks):
             if brick["uuid"] != local_node_id:
                 continue
 
             bricks.append({
-                "volume": vol["name"],
+                "volume": name,
                 "brick_index": jdx,
                 "node_id": brick["uuid"],
                 "brick": brick["name"]})
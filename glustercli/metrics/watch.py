@@ -0,0 +1,542 @@
+import contextvars
+import hashlib
+import logging
+import threading
+import time
+
+from glustercli.cli import georep
+from glustercli.cli.parsers import (parse_volume_info, parse_volume_status,
+                                    parse_heal_info, parse_georep_status,
+                                    parse_rebalance_status, HEALTH_UP,
+                                    STATE_STARTED)
+from glustercli.cli.utils import (volume_execute_xml, heal_execute_xml,
+                                  georep_execute_xml, volume_execute_xml_async,
+                                  heal_execute_xml_async,
+                                  georep_execute_xml_async, parse_output)
+
+DEFAULT_WATCH_INTERVAL = 30
+DEFAULT_FAST_INTERVAL = 5
+DEFAULT_MAX_INTERVAL = 300
+# Interval of a stable query is multiplied by this on every poll
+# without changes, up to the max interval
+DEFAULT_BACKOFF = 2
+
+# Geo-rep pairs in these states are polled at the fast interval
+GEOREP_ACTIVE_STATUS = set(["Initializing...", "Faulty"])
+GEOREP_ACTIVE_CRAWL_STATUS = set(["History Crawl", "Hybrid Crawl"])
+
+logger = logging.getLogger(__name__)
+
+
+def _digest(outputs):
+    digest = hashlib.blake2b(digest_size=16)
+    for out in outputs:
+        if isinstance(out, str):
+            out = out.encode()
+        # Length prefix, outputs are not mixed up at their boundaries
+        digest.update("{0}:".format(len(out)).encode())
+        digest.update(out)
+    return digest.digest()
+
+
+class WatchQuery(object):
+    """
+    A query polled by the Watcher. Raw outputs are hashed before
+    parsing, outputs same as the previous poll are not parsed nor
+    delivered. A query keeps its poll state, add it to only one
+    Watcher.
+
+    :param name: Name of the query, used in the updates
+    :param fetch: Function returning a tuple of raw outputs
+    :param parse: Function called with the raw outputs, returns the
+     result
+    :param active: Function called with the result, returns True if
+     the query should be polled at the fast interval, for example
+     while a heal or rebalance is in progress
+    :param fetch_async: asyncio variant of fetch, default is to run
+     fetch in the default executor
+    :param interval: Seconds between polls while stable
+    :param fast_interval: Seconds between polls while active
+    """
+    # noqa # pylint: disable=too-many-arguments
+    def __init__(self, name, fetch, parse, active=None, fetch_async=None,
+                 interval=DEFAULT_WATCH_INTERVAL,
+                 fast_interval=DEFAULT_FAST_INTERVAL):
+        self.name = name
+        self.fetch = fetch
+        self.parse = parse
+        self.active = active
+        self.fetch_async = fetch_async
+        self.interval = interval
+        self.fast_interval = fast_interval
+        self.max_interval = DEFAULT_MAX_INTERVAL
+        self.backoff = DEFAULT_BACKOFF
+        # Monotonic time of the next poll, 0 to poll now
+        self.next_poll = 0
+        self.current_interval = interval
+        self.polls = 0
+        self.parses = 0
+        self._digest = None
+        self._error = None
+        self._active = False
+
+    def _next_interval(self, changed):
+        if self._active:
+            return self.fast_interval
+
+        if changed or self._error is not None:
+            return self.interval
+
+        return min(max(self.current_interval * self.backoff, self.interval),
+                   self.max_interval)
+
+    def finish(self, outputs, error=None):
+        """
+        Record a poll of the query and schedule the next one
+
+        :param outputs: Tuple of raw outputs returned by fetch
+        :param error: Exception raised by fetch, if any
+        :returns: Update if the outputs or the error changed since the
+         previous poll, else None. See Watcher.poll
+        """
+        self.polls += 1
+        result = None
+        changed = False
+        if error is None:
+            digest = _digest(outputs)
+            if digest != self._digest or self._error is not None:
+                try:
+                    result = self.parse(*outputs)
+                    self.parses += 1
+                    self._active = bool(self.active is not None and
+                                        self.active(result))
+                    self._digest = digest
+                    self._error = None
+                    changed = True
+                except Exception as err:  # noqa # pylint: disable=broad-except
+                    error = err
+
+        if error is not None:
+            # Same error again is not delivered
+            changed = str(error) != self._error
+            self._digest = None
+            self._error = str(error)
+            self._active = False
+
+        self.current_interval = self._next_interval(changed)
+        self.next_poll = time.monotonic() + self.current_interval
+        if not changed:
+            return None
+
+        return {
+            "query": self.name,
+            "time": time.time(),
+            "result": result,
+            "error": error,
+            "active": self._active,
+            "interval": self.current_interval,
+        }
+
+
+def _info_cmd(volname):
+    cmd = ["info"]
+    if volname is not None:
+        cmd += [volname]
+    return cmd
+
+
+def _volume_status_active(volumes):
+    for vol in volumes:
+        if vol["status"] != STATE_STARTED:
+            continue
+
+        # Health is available only with group_subvols
+        health = vol.get("health", None)
+        if health is not None:
+            if health != HEALTH_UP:
+                return True
+            continue
+
+        for brick in vol["bricks"]:
+            if not brick["online"]:
+                return True
+
+    return False
+
+
+def volume_status_query(volname=None, group_subvols=True, records=False,
+                        interval=DEFAULT_WATCH_INTERVAL,
+                        fast_interval=DEFAULT_FAST_INTERVAL):
+    """
+    Volume status(detail) query, result is same as
+    volume.status_detail. Active while any Volume is not healthy(any
+    brick offline if not grouped by subvols).
+
+    :param volname: Volume Name, default is all the Volumes
+    :param group_subvols: Show Subvolume Information in Groups
+    :param records: Return compact Volume records instead of dicts
+    :param interval: Seconds between polls while stable
+    :param fast_interval: Seconds between polls while active
+    :returns: WatchQuery
+    """
+    status_cmd = ["status", "all" if volname is None else volname, "detail"]
+
+    def fetch():
+        return (volume_execute_xml(list(status_cmd)),
+                volume_execute_xml(_info_cmd(volname)))
+
+    async def fetch_async():
+        import asyncio  # noqa # pylint: disable=import-outside-toplevel
+
+        return tuple(await asyncio.gather(
+            volume_execute_xml_async(list(status_cmd)),
+            volume_execute_xml_async(_info_cmd(volname))))
+
+    def parse(status_out, info_out):
+        volinfo = parse_output(["volume"] + _info_cmd(volname),
+                               parse_volume_info, info_out)
+        return parse_output(["volume"] + status_cmd, parse_volume_status,
+                            status_out, volinfo,
+                            group_subvols=group_subvols, records=records)
+
+    return WatchQuery("volume status " + status_cmd[1], fetch, parse,
+                      active=_volume_status_active, fetch_async=fetch_async,
+                      interval=interval, fast_interval=fast_interval)
+
+
+def _heal_info_active(healinfo):
+    for brick in healinfo:
+        # Number of entries is "-" if the brick is offline
+        if brick["nr_entries"].isdigit() and int(brick["nr_entries"]) > 0:
+            return True
+
+    return False
+
+
+def heal_info_query(volname, interval=DEFAULT_WATCH_INTERVAL,
+                    fast_interval=DEFAULT_FAST_INTERVAL):
+    """
+    Heal info query, result is same as heal.info. Active while any
+    brick has entries to be healed.
+
+    :param volname: Volume Name
+    :param interval: Seconds between polls while stable
+    :param fast_interval: Seconds between polls while active
+    :returns: WatchQuery
+    """
+    def fetch():
+        return (heal_execute_xml([volname, "info"]),)
+
+    async def fetch_async():
+        return (await heal_execute_xml_async([volname, "info"]),)
+
+    def parse(heal_out):
+        return parse_output(["volume", "heal", volname, "info"],
+                            parse_heal_info, heal_out)
+
+    return WatchQuery("heal info " + volname, fetch, parse,
+                      active=_heal_info_active, fetch_async=fetch_async,
+                      interval=interval, fast_interval=fast_interval)
+
+
+def _georep_status_active(sessions):
+    for session in sessions:
+        for pair in session:
+            if pair["status"] in GEOREP_ACTIVE_STATUS or \
+               pair["crawl_status"] in GEOREP_ACTIVE_CRAWL_STATUS:
+                return True
+
+    return False
+
+
+# noqa # pylint: disable=too-many-arguments
+def georep_status_query(primary_volume=None, secondary_host=None,
+                        secondary_volume=None, secondary_user="root",
+                        interval=DEFAULT_WATCH_INTERVAL,
+                        fast_interval=DEFAULT_FAST_INTERVAL):
+    """
+    Geo-replication status query, result is same as georep.status.
+    Active while any pair is Initializing, Faulty or in History or
+    Hybrid Crawl.
+
+    :param primary_volume: Primary Volume Name
+    :param secondary_host: Secondary Hostname or IP
+    :param secondary_volume: Secondary Volume
+    :param secondary_user: Secondary User, default is "root"
+    :param interval: Seconds between polls while stable
+    :param fast_interval: Seconds between polls while active
+    :returns: WatchQuery
+    """
+    cmd = georep._status_cmd(primary_volume, secondary_host,
+                             secondary_volume, secondary_user)
+
+    def fetch():
+        return (georep_execute_xml(list(cmd)),
+                volume_execute_xml(_info_cmd(None)))
+
+    async def fetch_async():
+        import asyncio  # noqa # pylint: disable=import-outside-toplevel
+
+        return tuple(await asyncio.gather(
+            georep_execute_xml_async(list(cmd)),
+            volume_execute_xml_async(_info_cmd(None))))
+
+    def parse(georep_out, info_out):
+        volinfo = parse_output(["volume", "info"], parse_volume_info,
+                               info_out)
+        return parse_output(["volume", "geo-replication"] + cmd,
+                            parse_georep_status, georep_out, volinfo)
+
+    return WatchQuery("georep " + " ".join(cmd), fetch, parse,
+                      active=_georep_status_active, fetch_async=fetch_async,
+                      interval=interval, fast_interval=fast_interval)
+
+
+def _rebalance_status_active(status):
+    return "in progress" in status["aggregate"]["status"]
+
+
+def rebalance_status_query(volname, interval=DEFAULT_WATCH_INTERVAL,
+                           fast_interval=DEFAULT_FAST_INTERVAL):
+    """
+    Rebalance status query, result is same as rebalance.status.
+    Active while the rebalance(or fix-layout) is in progress.
+
+    :param volname: Volume Name
+    :param interval: Seconds between polls while stable
+    :param fast_interval: Seconds between polls while active
+    :returns: WatchQuery
+    """
+    cmd = ["rebalance", volname, "status"]
+
+    def fetch():
+        return (volume_execute_xml(list(cmd)),)
+
+    async def fetch_async():
+        return (await volume_execute_xml_async(list(cmd)),)
+
+    def parse(rebalance_out):
+        return parse_output(["volume"] + cmd, parse_rebalance_status,
+                            rebalance_out)
+
+    return WatchQuery("rebalance status " + volname, fetch, parse,
+                      active=_rebalance_status_active,
+                      fetch_async=fetch_async, interval=interval,
+                      fast_interval=fast_interval)
+
+
+class Watcher(object):
+    """
+    Polls the queries on their adaptive intervals and delivers the
+    changed results to the callbacks, from a background
+    thread(start) or an async iterator(updates). Queries always run
+    the gluster CLI with --xml, the raw XML is needed for the
+    de-duplication.
+
+    :param queries: List of WatchQuery, see volume_status_query,
+     heal_info_query, georep_status_query and rebalance_status_query
+    :param callbacks: List of functions called with each update
+    """
+    def __init__(self, queries=None, callbacks=None):
+        self.queries = list(queries or [])
+        self.callbacks = list(callbacks or [])
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        # Set to end the wait of the thread early(stop or add)
+        self._wakeup = threading.Event()
+        # (loop, asyncio.Event) of the running updates iterator
+        self._async_wakeup = None
+        self._thread = None
+
+    def _wake(self):
+        self._wakeup.set()
+        with self._lock:
+            async_wakeup = self._async_wakeup
+
+        if async_wakeup is not None:
+            loop, event = async_wakeup
+            loop.call_soon_threadsafe(event.set)
+
+    def add(self, query):
+        """
+        Add a query, polled on the next run
+
+        :param query: WatchQuery
+        """
+        query.next_poll = 0
+        with self._lock:
+            self.queries.append(query)
+
+        self._wake()
+
+    def remove(self, query):
+        with self._lock:
+            self.queries.remove(query)
+
+    def add_callback(self, callback):
+        """
+        Add a function to be called with each update
+
+        :param callback: Function called with the update dict
+        """
+        with self._lock:
+            self.callbacks.append(callback)
+
+    def remove_callback(self, callback):
+        with self._lock:
+            self.callbacks.remove(callback)
+
+    def _deliver(self, update):
+        with self._lock:
+            callbacks = list(self.callbacks)
+
+        for callback in callbacks:
+            try:
+                callback(update)
+            except Exception:  # noqa # pylint: disable=broad-except
+                logger.exception("Watch callback failed for %s",
+                                 update["query"])
+                with self._lock:
+                    self.errors += 1
+
+    def _due(self):
+        now = time.monotonic()
+        with self._lock:
+            return [query for query in self.queries
+                    if query.next_poll <= now]
+
+    def _wait_time(self):
+        with self._lock:
+            if not self.queries:
+                return DEFAULT_WATCH_INTERVAL
+
+            next_poll = min(query.next_poll for query in self.queries)
+
+        return max(0, next_poll - time.monotonic())
+
+    def poll(self, query):
+        """
+        Poll a query now. Updates are not delivered to the callbacks.
+
+        :param query: WatchQuery
+        :returns: Update if the result or the error changed since the
+         previous poll, else None
+            {
+                "query": QUERY_NAME,
+                "time": UNIX_TIME,
+                "result": PARSED_RESULT,  # None on error
+                "error": EXCEPTION,  # None on success
+                "active": True if polled at the fast interval,
+                "interval": SECONDS_TO_NEXT_POLL
+            }
+        """
+        try:
+            outputs = query.fetch()
+        except Exception as err:  # noqa # pylint: disable=broad-except
+            return query.finish(None, err)
+
+        return query.finish(outputs)
+
+    async def poll_async(self, query):
+        """
+        Poll a query now, asyncio variant of poll
+        """
+        import asyncio  # noqa # pylint: disable=import-outside-toplevel
+
+        try:
+            if query.fetch_async is not None:
+                outputs = await query.fetch_async()
+            else:
+                # Active client is carried to the executor thread
+                outputs = await asyncio.get_running_loop().run_in_executor(
+                    None, contextvars.copy_context().run, query.fetch)
+        except Exception as err:  # noqa # pylint: disable=broad-except
+            return query.finish(None, err)
+
+        return query.finish(outputs)
+
+    def run_pending(self):
+        """
+        Poll the queries which are due and deliver the updates to the
+        callbacks
+
+        :returns: List of updates
+        """
+        updates = []
+        for query in self._due():
+            update = self.poll(query)
+            if update is not None:
+                self._deliver(update)
+                updates.append(update)
+
+        return updates
+
+    async def updates(self):
+        """
+        Async iterator of the updates, polls the due queries
+        concurrently. Updates are also delivered to the callbacks.
+        Iteration ends as soon as stop is called, also if stop was
+        called before the iteration started(start clears it).
+
+            async for update in watcher.updates():
+                ...
+        """
+        import asyncio  # noqa # pylint: disable=import-outside-toplevel
+
+        wakeup = asyncio.Event()
+        async_wakeup = (asyncio.get_running_loop(), wakeup)
+        with self._lock:
+            self._async_wakeup = async_wakeup
+
+        try:
+            while not self._stop.is_set():
+                # Cleared before polling, a stop or add during the
+                # polls ends the next wait right away
+                wakeup.clear()
+                due = self._due()
+                for update in await asyncio.gather(
+                        *[self.poll_async(query) for query in due]):
+                    if self._stop.is_set():
+                        return
+
+                    if update is not None:
+                        self._deliver(update)
+                        yield update
+
+                try:
+                    await asyncio.wait_for(wakeup.wait(), self._wait_time())
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            with self._lock:
+                if self._async_wakeup is async_wakeup:
+                    self._async_wakeup = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wakeup.clear()
+            self.run_pending()
+            self._wakeup.wait(self._wait_time())
+
+    def start(self):
+        """
+        Start polling in a background thread, queries run with the
+        client active in the caller(GlusterClient.activate)
+        """
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=contextvars.copy_context().run, args=(self._run,),
+            name="glustercli-watch")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the background thread and end the updates iteration
+        """
+        self._stop.set()
+        self._wake()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
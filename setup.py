@@ -22,6 +22,15 @@ setup(
     url='https://github.com/gluster/glustercli-python',
     packages=["glustercli", "glustercli.cli", "glustercli.metrics"],
     install_requires=["paramiko"],
+    extras_require={
+        # NumPy views of the columnar outputs
+        "numpy": ["numpy"]
+    },
+    entry_points={
+        "console_scripts": [
+            "glustercli-exporter = glustercli.metrics.exporter:main"
+        ]
+    },
     classifiers=[
         'Development Status :: 5 - Production/Stable',
         'Intended Audience :: Developers',
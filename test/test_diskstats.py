@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from glustercli.metrics import diskstats
+from glustercli.metrics.diskstats import COUNTER_WRAP_32, COUNTER_WRAP_64, \
+    DiskstatsSampler, counter_delta, diskstats_rates
+
+
+def _counters(value, in_progress=0):
+    counters = dict((key, value) for key in diskstats.RATE_COUNTERS)
+    counters["ios_currently_in_progress"] = in_progress
+    return counters
+
+
+class CounterDeltaTest(unittest.TestCase):
+    def test_increase(self):
+        self.assertEqual(counter_delta(100, 250), 150)
+        self.assertEqual(counter_delta(7, 7), 0)
+
+    def test_wrap_32(self):
+        self.assertEqual(counter_delta(COUNTER_WRAP_32 - 10, 5), 15)
+
+    def test_wrap_64(self):
+        self.assertEqual(counter_delta(COUNTER_WRAP_64 - 3, 4), 7)
+
+    def test_reset(self):
+        # Far from the wrap boundary, device re-created
+        self.assertIsNone(counter_delta(1000000, 5))
+        self.assertIsNone(counter_delta(COUNTER_WRAP_32 // 2, 5))
+        self.assertIsNone(counter_delta(2 ** 40, 7))
+
+    def test_rates_reset(self):
+        prev = _counters(1000000)
+        cur = _counters(2000000)
+        self.assertIsNotNone(diskstats_rates(prev, cur, 1.0))
+
+        cur["sectors_written"] = 10
+        self.assertIsNone(diskstats_rates(prev, cur, 1.0))
+
+    def test_rates_wrap(self):
+        prev = _counters(100)
+        prev["reads_completed"] = COUNTER_WRAP_32 - 50
+        cur = _counters(100)
+        cur["reads_completed"] = 50
+        rates = diskstats_rates(prev, cur, 2.0)
+        self.assertEqual(rates["read_iops"], 50.0)
+        self.assertEqual(rates["write_iops"], 0.0)
+
+
+class DiskstatsSamplerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.diskstats_path = os.path.join(self.tmpdir, "diskstats")
+        self.now = 100.0
+
+        bricks = [{"volume": "gv1", "brick_index": idx, "node_id": "n1",
+                   "brick": "node1:/bricks/{0}".format(dev)}
+                  for idx, dev in enumerate(["sda", "sdb"])]
+
+        def resolve(path):
+            return {"fs": "/dev/" + os.path.basename(path),
+                    "device": os.path.basename(path),
+                    "parent_devices": []}
+
+        fake_time = mock.Mock()
+        fake_time.monotonic.side_effect = lambda: self.now
+        for target, name, value in [
+                (diskstats, "DISKSTATS", self.diskstats_path),
+                (diskstats, "get_local_bricks",
+                 mock.Mock(side_effect=lambda volname: [
+                     dict(brick) for brick in bricks])),
+                (diskstats.device_resolver, "resolve", resolve),
+                (diskstats, "time", fake_time)]:
+            patcher = mock.patch.object(target, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _write(self, devices):
+        with open(self.diskstats_path, "w") as stat_file:
+            for idx, (dev, value) in enumerate(sorted(devices.items())):
+                stat_file.write("8 {0} {1} {2} 0\n".format(
+                    idx * 16, dev, " ".join([str(value)] * 10)))
+
+    def _sample(self, sampler, devices, elapsed=1.0):
+        self.now += elapsed
+        self._write(devices)
+        return dict((brick["device"], brick) for brick in sampler.sample())
+
+    def test_first_sample(self):
+        sampler = DiskstatsSampler()
+        out = self._sample(sampler, {"sda": 100, "sdb": 100})
+        self.assertIsNone(out["sda"]["rates"])
+        self.assertIsNone(out["sda"]["interval"])
+
+        out = self._sample(sampler, {"sda": 300, "sdb": 100}, 2.0)
+        self.assertEqual(out["sda"]["interval"], 2.0)
+        self.assertEqual(out["sda"]["rates"]["read_iops"], 100.0)
+        self.assertEqual(out["sdb"]["rates"]["read_iops"], 0.0)
+
+    def test_counter_reset(self):
+        sampler = DiskstatsSampler()
+        self._sample(sampler, {"sda": 1000000, "sdb": 100})
+        out = self._sample(sampler, {"sda": 5, "sdb": 200})
+        self.assertIsNone(out["sda"]["rates"])
+        self.assertEqual(out["sdb"]["rates"]["read_iops"], 100.0)
+
+        # Rates resume from the reset counters
+        out = self._sample(sampler, {"sda": 25, "sdb": 300})
+        self.assertEqual(out["sda"]["rates"]["read_iops"], 20.0)
+
+    def test_counter_wrap(self):
+        sampler = DiskstatsSampler()
+        self._sample(sampler, {"sda": COUNTER_WRAP_32 - 10, "sdb": 100})
+        out = self._sample(sampler, {"sda": 10, "sdb": 100})
+        self.assertEqual(out["sda"]["rates"]["read_iops"], 20.0)
+
+    def test_device_disappears(self):
+        sampler = DiskstatsSampler()
+        self._sample(sampler, {"sda": 100, "sdb": 100})
+        out = self._sample(sampler, {"sda": 200})
+        self.assertIsNone(out["sdb"]["rates"])
+        self.assertIsNone(out["sdb"]["interval"])
+        self.assertEqual(out["sda"]["rates"]["read_iops"], 100.0)
+
+        # Back again, starts afresh
+        out = self._sample(sampler, {"sda": 300, "sdb": 50})
+        self.assertIsNone(out["sdb"]["rates"])
+        out = self._sample(sampler, {"sda": 400, "sdb": 150})
+        self.assertEqual(out["sdb"]["rates"]["read_iops"], 100.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from glustercli.metrics import utils
+
+NODE_ID = "00000001-0000-4000-8000-000000000000"
+OTHER_ID = "00000002-0000-4000-8000-000000000000"
+
+
+def _write(path, values):
+    with open(path, "w") as store_file:
+        for key, value in values:
+            store_file.write("{0}={1}\n".format(key, value))
+
+
+class BrickDiscoveryTest(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.workdir)
+        for name, value in [("brick_store", utils.BrickStore(self.workdir)),
+                            ("brick_discovery",
+                             utils.BRICK_DISCOVERY_STORE),
+                            ("myuuid", NODE_ID)]:
+            patcher = mock.patch.object(utils, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _add_volume(self, volname, bricks):
+        bricks_dir = os.path.join(self.workdir, "vols", volname, "bricks")
+        os.makedirs(bricks_dir)
+        info = []
+        for idx, (host, path, node_id) in enumerate(bricks, start=1):
+            brick_file = "{0}:{1}".format(host, path.replace("/", "-"))
+            info.append(("brick-{0}".format(idx - 1), brick_file))
+            values = [("hostname", host), ("path", path)]
+            if node_id is not None:
+                values.append(("uuid", node_id))
+            _write(os.path.join(bricks_dir, brick_file), values)
+
+        _write(os.path.join(self.workdir, "vols", volname, "info"), info)
+
+    def test_store(self):
+        self._add_volume("gv1", [("node1", "/bricks/b1", NODE_ID),
+                                 ("node2", "/bricks/b2", OTHER_ID)])
+
+        self.assertEqual(utils.get_local_bricks(), [{
+            "volume": "gv1",
+            "brick_index": 0,
+            "node_id": NODE_ID,
+            "brick": "node1:/bricks/b1"
+        }])
+
+    def test_store_without_uuid(self):
+        self._add_volume("gv1", [("node1", "/bricks/b1", None),
+                                 ("node2", "/bricks/b2", None)])
+        volinfo = [{"name": "gv1", "bricks": [
+            {"name": "node1:/bricks/b1", "uuid": NODE_ID},
+            {"name": "node2:/bricks/b2", "uuid": OTHER_ID}]}]
+
+        # Local bricks can not be identified from the store
+        with mock.patch("glustercli.cli.volume.info",
+                        return_value=volinfo) as info:
+            bricks = utils.get_local_bricks()
+
+        info.assert_called_once_with(None)
+        self.assertEqual([brick["brick"] for brick in bricks],
+                         ["node1:/bricks/b1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
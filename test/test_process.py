@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+import unittest
+
+from glustercli.metrics.process import ProcessCollector
+
+
+def _write(path, data):
+    with open(path, "wb") as out_file:
+        out_file.write(data)
+
+
+class ProcessCollectorTest(unittest.TestCase):
+    def setUp(self):
+        self.proc_root = tempfile.mkdtemp()
+        _write(os.path.join(self.proc_root, "uptime"), b"1000.00 900.00\n")
+        _write(os.path.join(self.proc_root, "meminfo"),
+               b"MemTotal:       16000000 kB\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.proc_root)
+
+    def _add_process(self, pid, comm, args):
+        proc_dir = os.path.join(self.proc_root, str(pid))
+        os.mkdir(proc_dir)
+        # Fields after the command name, utime/stime are 10 ticks
+        fields = ["S"] + ["0"] * 10 + ["10", "10"] + ["0"] * 4 + \
+            ["4", "0", "100"] + ["0"] * 30
+        _write(os.path.join(proc_dir, "stat"), "{0} ({1}) {2}\n".format(
+            pid, comm, " ".join(fields)).encode())
+        _write(os.path.join(proc_dir, "cmdline"),
+               b"\x00".join(arg.encode() for arg in args) + b"\x00")
+        _write(os.path.join(proc_dir, "statm"), b"2000 1000 0 0 0 0 0\n")
+
+    def test_long_cmdline(self):
+        # Larger than the initial read buffer
+        long_arg = "x" * 6000
+        self._add_process(4242, "python", ["/usr/bin/python", "-c",
+                                           long_arg])
+
+        details = ProcessCollector(proc_root=self.proc_root,
+                                   names=["python"]).collect()
+
+        self.assertEqual(len(details), 1)
+        self.assertEqual(details[0]["pid"], 4242)
+        self.assertEqual(details[0]["num_threads"], 4)
+
+    def test_read_bytes_grows_buffer(self):
+        collector = ProcessCollector(proc_root=self.proc_root)
+        path = os.path.join(self.proc_root, "big")
+        data = os.urandom(3) * 5000
+        _write(path, data)
+
+        self.assertEqual(collector._read_bytes(path), data)
+        # Shorter file after the buffer is grown
+        self.assertEqual(collector._read_bytes(
+            os.path.join(self.proc_root, "uptime")), b"1000.00 900.00\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
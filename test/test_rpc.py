@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import unittest
+
+from benchmarks import fake_gluster, fake_glusterd
+from glustercli.cli import GlusterClient, GlusterCmdException, peer, volume
+from glustercli.cli.rpc import RpcClient
+
+
+class _OneShotHandler(fake_glusterd._Handler):
+    # Serves one call and closes the connection, like glusterd closing
+    # an idle connection
+    def handle(self):
+        call = self._recv_record()
+        self.server.calls += 1
+        xid = struct.unpack_from(">I", call, 0)[0]
+        body = fake_glusterd.reply_body(
+            self.server.cluster, fake_glusterd.LIST_VOLUME,
+            fake_glusterd._opaque(fake_glusterd.encode_dict({})))
+        reply = struct.pack(">6I", xid, 1, 0, 0, 0, 0) + body
+        self.request.sendall(struct.pack(">I", 0x80000000 | len(reply)) +
+                             reply)
+
+
+class _TruncatedHandler(fake_glusterd._Handler):
+    # Replies with the record header and a part of the record
+    def handle(self):
+        call = self._recv_record()
+        xid = struct.unpack_from(">I", call, 0)[0]
+        self.request.sendall(struct.pack(">II", 0x80000000 | 64, xid))
+        if self.server.hold is not None:
+            self.server.hold.wait()
+
+
+class _ShortReplyHandler(fake_glusterd._Handler):
+    # Complete record with a reply body cut short
+    def handle(self):
+        call = self._recv_record()
+        xid = struct.unpack_from(">I", call, 0)[0]
+        reply = struct.pack(">6I", xid, 1, 0, 0, 0, 0) + b"\x00\x00"
+        self.request.sendall(struct.pack(">I", 0x80000000 | len(reply)) +
+                             reply)
+
+
+class RpcTransportTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.socket_path = os.path.join(self.tmpdir, "glusterd.socket")
+        self.server = fake_glusterd.FakeGlusterd(
+            self.socket_path, fake_gluster.cluster_from_env())
+        self.server.hold = None
+        self.server.start()
+
+    def tearDown(self):
+        if self.server.hold is not None:
+            self.server.hold.set()
+        self.server.stop()
+        shutil.rmtree(self.tmpdir)
+
+    def _both(self, func, *args, **kwargs):
+        cli = GlusterClient(gluster_path=fake_gluster.PATH)
+        rpc = GlusterClient(glusterd_socket=self.socket_path,
+                            transport="rpc")
+        with cli.activate():
+            expected = func(*args, **kwargs)
+
+        calls = self.server.calls
+        with rpc.activate():
+            out = func(*args, **kwargs)
+        rpc.rpc_client().close()
+
+        self.assertGreater(self.server.calls, calls)
+        return expected, out
+
+    def test_volume_info(self):
+        expected, out = self._both(volume.info)
+        self.assertEqual(out, expected)
+
+        expected, out = self._both(volume.info, "vol1", group_subvols=True)
+        self.assertEqual(out, expected)
+
+    def test_volume_status_detail(self):
+        expected, out = self._both(volume.status_detail)
+        self.assertEqual(out, expected)
+
+        expected, out = self._both(volume.status_detail, "vol2",
+                                   group_subvols=True)
+        self.assertEqual(out, expected)
+
+    def test_volume_list(self):
+        expected, out = self._both(volume.vollist)
+        self.assertEqual(out, expected)
+
+    def test_peer_status(self):
+        expected, out = self._both(peer.status)
+        self.assertEqual(out, expected)
+
+    def test_pool_list(self):
+        expected, out = self._both(peer.pool)
+        self.assertEqual(out, expected)
+        self.assertEqual(out[-1]["hostname"], "localhost")
+
+    def test_volume_not_found(self):
+        rpc = GlusterClient(glusterd_socket=self.socket_path,
+                            transport="rpc")
+        with rpc.activate():
+            with self.assertRaises(GlusterCmdException):
+                volume.info("novol")
+        rpc.rpc_client().close()
+
+    def test_stale_pooled_socket(self):
+        self.server.RequestHandlerClass = _OneShotHandler
+        client = RpcClient(self.socket_path, timeout=5)
+        first = client.execute(["volume", "list"])
+        # Pooled connection is closed by the server by now, the call
+        # is retried once on a new connection
+        self.assertEqual(client.execute(["volume", "list"]), first)
+        self.assertEqual(self.server.calls, 2)
+        client.close()
+
+    def test_truncated_record(self):
+        self.server.RequestHandlerClass = _TruncatedHandler
+        client = RpcClient(self.socket_path, timeout=5)
+        with self.assertRaises(GlusterCmdException):
+            client.execute(["volume", "list"])
+
+    def test_truncated_record_connection_open(self):
+        self.server.RequestHandlerClass = _TruncatedHandler
+        self.server.hold = threading.Event()
+        client = RpcClient(self.socket_path, timeout=0.5)
+        with self.assertRaises(GlusterCmdException):
+            client.execute(["volume", "list"])
+
+    def test_truncated_reply(self):
+        self.server.RequestHandlerClass = _ShortReplyHandler
+        client = RpcClient(self.socket_path, timeout=5)
+        with self.assertRaises(GlusterCmdException):
+            client.execute(["volume", "list"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import threading
+import time
+import unittest
+
+from glustercli.cli.utils import SingleFlight, _Lane
+
+
+def _wait_for(cond, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not cond():
+        if time.monotonic() > deadline:
+            raise AssertionError("Timed out waiting")
+        time.sleep(0.005)
+
+
+class LaneTest(unittest.TestCase):
+    def _queue_threads(self, lane, num, order):
+        threads = []
+        for idx in range(num):
+            def run(idx=idx):
+                lane.acquire()
+                order.append(idx)
+
+            thrd = threading.Thread(target=run)
+            thrd.daemon = True
+            thrd.start()
+            threads.append(thrd)
+            # Enqueued in the thread start order
+            _wait_for(lambda idx=idx: len(lane._waiters) == idx + 1)
+
+        return threads
+
+    def test_fifo(self):
+        lane = _Lane("read", 1)
+        lane.acquire()
+        order = []
+        threads = self._queue_threads(lane, 5, order)
+
+        for idx in range(5):
+            lane.release()
+            _wait_for(lambda idx=idx: len(order) == idx + 1)
+
+        for thrd in threads:
+            thrd.join(2)
+        self.assertEqual(order, list(range(5)))
+        self.assertEqual(lane.active, 1)
+        self.assertEqual(lane.max_queued, 5)
+
+    def test_raise_limit_wakes_waiters(self):
+        lane = _Lane("read", 1)
+        lane.acquire()
+        order = []
+        threads = self._queue_threads(lane, 3, order)
+
+        lane.set_limit(3)
+        _wait_for(lambda: len(order) == 2)
+        self.assertEqual(order, [0, 1])
+        self.assertEqual(lane.active, 3)
+        self.assertEqual(len(lane._waiters), 1)
+
+        lane.set_limit(None)
+        _wait_for(lambda: len(order) == 3)
+        for thrd in threads:
+            thrd.join(2)
+        self.assertEqual(lane.active, 4)
+
+    def test_lower_limit(self):
+        lane = _Lane("read", 3)
+        for _ in range(3):
+            lane.acquire()
+        order = []
+        self._queue_threads(lane, 1, order)
+
+        lane.set_limit(1)
+        # Released slots are not handed over till active is below
+        # the new limit
+        lane.release()
+        lane.release()
+        self.assertEqual(order, [])
+        self.assertEqual(lane.active, 1)
+        lane.release()
+        _wait_for(lambda: order == [0])
+        self.assertEqual(lane.active, 1)
+
+    def test_async_waiter_cancelled(self):
+        lane = _Lane("read", 1)
+
+        async def main():
+            await lane.acquire_async()
+            first = asyncio.ensure_future(lane.acquire_async())
+            second = asyncio.ensure_future(lane.acquire_async())
+            await asyncio.sleep(0)
+            self.assertEqual(len(lane._waiters), 2)
+
+            # Cancelled while queued, removed from the queue
+            first.cancel()
+            await asyncio.sleep(0)
+            self.assertEqual(len(lane._waiters), 1)
+
+            lane.release()
+            await asyncio.wait_for(second, 2)
+            self.assertEqual(lane.active, 1)
+            lane.release()
+            self.assertEqual(lane.active, 0)
+
+        asyncio.run(main())
+
+    def test_async_cancelled_after_handover(self):
+        lane = _Lane("read", 1)
+
+        async def main():
+            await lane.acquire_async()
+            waiter = asyncio.ensure_future(lane.acquire_async())
+            await asyncio.sleep(0)
+
+            # Slot is handed over and the waiter is cancelled before
+            # it runs, the slot must be passed on
+            lane.release()
+            waiter.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await waiter
+
+            self.assertEqual(lane.active, 0)
+            self.assertEqual(len(lane._waiters), 0)
+
+        asyncio.run(main())
+
+    def test_sync_acquire_in_event_loop(self):
+        lane = _Lane("read", 1)
+
+        async def main():
+            await lane.acquire_async()
+            # Would wait forever for the slot held by this loop
+            lane.acquire()
+            self.assertEqual(lane.active, 2)
+            lane.release()
+            lane.release()
+            self.assertEqual(lane.active, 0)
+
+        asyncio.run(main())
+
+
+class SingleFlightTest(unittest.TestCase):
+    def setUp(self):
+        self.flight = SingleFlight()
+        self.release = threading.Event()
+        self.calls = 0
+
+    def _func(self, result=None, error=None):
+        def func():
+            self.calls += 1
+            self.release.wait(2)
+            if error is not None:
+                raise error
+            return result
+        return func
+
+    def _followers(self, key, num, func, out):
+        threads = []
+        for _ in range(num):
+            def run():
+                try:
+                    out.append(self.flight.do(key, func))
+                except Exception as err:  # noqa # pylint: disable=broad-except
+                    out.append(err)
+
+            thrd = threading.Thread(target=run)
+            thrd.daemon = True
+            thrd.start()
+            threads.append(thrd)
+
+        return threads
+
+    def _wait_joined(self, key, num):
+        _wait_for(lambda: key in self.flight._flights and
+                  len(self.flight._flights[key].wakers) == num)
+
+    def test_followers_share_result(self):
+        out = []
+        func = self._func(result="out")
+        threads = self._followers("k", 1, func, out)
+        _wait_for(lambda: self.calls == 1)
+        threads += self._followers("k", 4, func, out)
+        self._wait_joined("k", 4)
+        self.release.set()
+        for thrd in threads:
+            thrd.join(2)
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(out, [("out", True)] * 5)
+        self.assertEqual(self.flight.stats(),
+                         {"calls": 1, "shared": 4, "in_flight": 0})
+
+    def test_followers_share_exception(self):
+        out = []
+        error = ValueError("failed")
+        func = self._func(error=error)
+        threads = self._followers("k", 1, func, out)
+        _wait_for(lambda: self.calls == 1)
+        threads += self._followers("k", 2, func, out)
+        self._wait_joined("k", 2)
+        self.release.set()
+        for thrd in threads:
+            thrd.join(2)
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(out, [error] * 3)
+
+    def test_abandoned_leader(self):
+        out = []
+        interrupted = []
+        leader_release = threading.Event()
+
+        def leader_func():
+            self.calls += 1
+            leader_release.wait(2)
+            raise KeyboardInterrupt()
+
+        def leader():
+            try:
+                self.flight.do("k", leader_func)
+            except KeyboardInterrupt:
+                interrupted.append(True)
+
+        thrd = threading.Thread(target=leader)
+        thrd.daemon = True
+        thrd.start()
+        _wait_for(lambda: self.calls == 1)
+        threads = self._followers("k", 3, self._func(result="out"), out)
+        self._wait_joined("k", 3)
+
+        # Followers retry, one of them leads the new flight
+        leader_release.set()
+        _wait_for(lambda: self.calls == 2)
+        self._wait_joined("k", 2)
+        self.release.set()
+        for follower in threads + [thrd]:
+            follower.join(2)
+
+        self.assertEqual(interrupted, [True])
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(out, [("out", True)] * 3)
+
+    def test_async_follower_cancelled(self):
+        async def func():
+            self.calls += 1
+            await asyncio.sleep(0.05)
+            return "out"
+
+        async def main():
+            leader = asyncio.ensure_future(self.flight.do_async("k", func))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(
+                self.flight.do_async("k", func))
+            other = asyncio.ensure_future(self.flight.do_async("k", func))
+            await asyncio.sleep(0)
+            self.assertEqual(len(self.flight._flights["k"].wakers), 2)
+
+            follower.cancel()
+            await asyncio.sleep(0)
+            self.assertEqual(len(self.flight._flights["k"].wakers), 1)
+
+            self.assertEqual(await leader, ("out", True))
+            self.assertEqual(await other, ("out", True))
+
+        asyncio.run(main())
+        self.assertEqual(self.calls, 1)
+
+    def test_async_leader_cancelled(self):
+        async def func():
+            self.calls += 1
+            await asyncio.sleep(0.05)
+            return "out"
+
+        async def main():
+            leader = asyncio.ensure_future(self.flight.do_async("k", func))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(
+                self.flight.do_async("k", func))
+            await asyncio.sleep(0)
+
+            leader.cancel()
+            # Follower leads the retried flight
+            self.assertEqual(await asyncio.wait_for(follower, 2),
+                             ("out", False))
+
+        asyncio.run(main())
+        self.assertEqual(self.calls, 2)
+
+    def test_sync_call_in_event_loop(self):
+        async def func():
+            await asyncio.sleep(0.05)
+            return "async"
+
+        async def main():
+            leader = asyncio.ensure_future(self.flight.do_async("k", func))
+            await asyncio.sleep(0)
+            # Would wait forever for the leader running on this loop
+            self.assertEqual(self.flight.do("k", lambda: "sync"),
+                             ("sync", False))
+            self.assertEqual(await leader, ("async", False))
+
+        asyncio.run(main())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+import os
+import threading
+import time
+import unittest
+from unittest import mock
+
+from glustercli.metrics.utilization import StatvfsPool
+
+
+class FakeStatvfs(object):
+    """
+    statvfs blocking on the paths starting with /hung till released,
+    failing for /bad and returning the path for the rest
+    """
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, path):
+        with self._lock:
+            self.calls.append(path)
+
+        if path.startswith("/hung"):
+            self.release.wait()
+        elif path == "/bad":
+            raise OSError("bad path")
+
+        return path
+
+
+class StatvfsPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.statvfs = FakeStatvfs()
+        patcher = mock.patch.object(os, "statvfs", self.statvfs)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.statvfs.release.set)
+
+    def test_healthy_bricks_behind_hung_mounts(self):
+        pool = StatvfsPool(max_workers=2, max_stuck=8)
+        hung = ["/hung{0}".format(idx) for idx in range(4)]
+        start = time.monotonic()
+        results = pool.statvfs(hung + ["/ok0", "/ok1", "/bad"], 0.2)
+
+        # Each hung path runs its own timeout, replacements serve the
+        # queued paths
+        self.assertLess(time.monotonic() - start, 2)
+        for path in hung:
+            self.assertEqual(results[path], (None, "timeout"))
+        self.assertEqual(results["/ok0"], ("/ok0", None))
+        self.assertEqual(results["/ok1"], ("/ok1", None))
+        self.assertEqual(results["/bad"], (None, "bad path"))
+
+    def test_backoff_and_stuck_workers(self):
+        pool = StatvfsPool(max_workers=2, max_stuck=8)
+        pool.statvfs(["/hung0", "/ok0"], 0.1)
+
+        results = pool.statvfs(["/hung0", "/ok0"], 0.1)
+        self.assertEqual(results["/hung0"], (None, "skipped"))
+        self.assertEqual(results["/ok0"], ("/ok0", None))
+        self.assertEqual(self.statvfs.calls.count("/hung0"), 1)
+
+        # Stuck threads finish and the surplus ones exit
+        self.statvfs.release.set()
+        deadline = time.monotonic() + 2
+        while time.monotonic() < deadline:
+            with pool._lock:
+                if not pool._stuck and not pool._inflight:
+                    break
+            time.sleep(0.01)
+
+        self.assertEqual(pool._stuck, set())
+        self.assertLessEqual(pool._workers, pool.max_workers)
+        # Still in the backoff window
+        self.assertEqual(pool.statvfs(["/hung0"], 0.1)["/hung0"],
+                         (None, "skipped"))
+
+    def test_backoff_doubles(self):
+        pool = StatvfsPool(max_workers=1, max_stuck=4)
+        pool.statvfs(["/hung0"], 0.05)
+        _, first = pool._backoff["/hung0"]
+
+        self.statvfs.release.set()
+        while "/hung0" in pool._inflight:
+            time.sleep(0.01)
+        self.statvfs.release.clear()
+
+        # Backoff window expired
+        pool._backoff["/hung0"] = (0, first)
+        pool.statvfs(["/hung0"], 0.05)
+        self.assertEqual(pool._backoff["/hung0"][1], first * 2)
+
+    def test_stuck_limit(self):
+        pool = StatvfsPool(max_workers=1, max_stuck=1)
+        start = time.monotonic()
+        results = pool.statvfs(["/hung0", "/hung1", "/ok0"], 0.1)
+
+        # Both threads stuck, /ok0 can not start and is not backed off
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual(pool._workers, 2)
+        self.assertEqual(results["/hung0"], (None, "timeout"))
+        self.assertEqual(results["/hung1"], (None, "timeout"))
+        self.assertEqual(results["/ok0"], (None, "timeout"))
+        self.assertNotIn("/ok0", pool._backoff)
+        self.assertNotIn("/ok0", self.statvfs.calls)
+        self.assertEqual(pool.statvfs(["/ok0"], 0.1)["/ok0"],
+                         (None, "timeout"))
+
+        self.statvfs.release.set()
+        deadline = time.monotonic() + 2
+        while pool._stuck and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(pool.statvfs(["/ok0"], 0.1)["/ok0"],
+                         ("/ok0", None))
+
+
+if __name__ == "__main__":
+    unittest.main()